@@ -1,15 +1,22 @@
+import secrets
 from typing import Annotated
 from uuid import UUID
 
 from fastapi import Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from core.security import oauth_scheme_seller, oauth_scheme_partner
+from config import security_settings
+from core.security import oauth_scheme_seller, oauth_scheme_partner, admin_key_scheme
 from database.models import Seller, DeliveryPartner
 from database.redis import is_jti_blacklisted
 from database.session import get_session
+from services.bulk_import import BulkImportService
 from services.delivery_partner import DeliveryPartnerService
+from services.export import ExportService
+from services.idempotency import IdempotencyService
+from services.route_planner import RoutePlannerService
 from services.seller import SellerService
+from services.seller_stats import SellerStatsService
 from services.shipment import ShipmentService
 from services.shipment_event import ShipmentEventService
 from utils.jwt_auth import verify_token
@@ -87,11 +94,42 @@ async def get_current_partner(
     return partner
 
 
+# admin api key -> ops only endpoints
+async def verify_admin_key(key: Annotated[str, Depends(admin_key_scheme)]):
+    admin_key = security_settings.ADMIN_API_KEY
+
+    if not admin_key or not secrets.compare_digest(key, admin_key):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid admin key",
+        )
+
+
 # delivery partner service
 def get_delivery_partner_service(session: sessionDep):
     return DeliveryPartnerService(session)
 
 
+# export service
+def get_export_service(session: sessionDep):
+    return ExportService(session)
+
+
+# bulk import service
+def get_bulk_import_service(session: sessionDep):
+    return BulkImportService(session)
+
+
+# partner route planning service
+def get_route_planner_service(session: sessionDep):
+    return RoutePlannerService(DeliveryPartnerService(session))
+
+
+# seller dashboard stats service
+def get_seller_stats_service(session: sessionDep):
+    return SellerStatsService(session)
+
+
 # Seller Dep
 SellerDep = Annotated[Seller, Depends(get_current_seller)]
 
@@ -109,3 +147,26 @@ SellerServiceDep = Annotated[SellerService, Depends(get_seller_service)]
 DeliveryPartnerServiceDep = Annotated[
     DeliveryPartnerService, Depends(get_delivery_partner_service)
 ]
+
+# export service dep Annotation
+ExportServiceDep = Annotated[ExportService, Depends(get_export_service)]
+
+# bulk import service dep Annotation
+BulkImportServiceDep = Annotated[BulkImportService, Depends(get_bulk_import_service)]
+
+
+# route planner service dep Annotation
+RoutePlannerServiceDep = Annotated[
+    RoutePlannerService, Depends(get_route_planner_service)
+]
+
+# seller stats service dep Annotation
+SellerStatsServiceDep = Annotated[SellerStatsService, Depends(get_seller_stats_service)]
+
+
+# Idempotency-Key handling dep
+def get_idempotency_service():
+    return IdempotencyService()
+
+
+IdempotencyServiceDep = Annotated[IdempotencyService, Depends(get_idempotency_service)]
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from routers import shipment, seller, delivery_partner
+from routers import shipment, seller, delivery_partner, export
 
 
 master_router = APIRouter()
@@ -8,3 +8,4 @@ master_router = APIRouter()
 master_router.include_router(shipment.router)
 master_router.include_router(seller.router)
 master_router.include_router(delivery_partner.router)
+master_router.include_router(export.router)
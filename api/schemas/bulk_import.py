@@ -0,0 +1,12 @@
+from pydantic import BaseModel, Field
+
+
+class ImportRowError(BaseModel):
+    line: int
+    detail: str
+
+
+class ImportReport(BaseModel):
+    imported: int = 0
+    skipped: int = Field(default=0, description="valid rows that already exist")
+    errors: list[ImportRowError] = Field(default_factory=list)
@@ -1,3 +1,4 @@
+from datetime import datetime
 from uuid import UUID
 
 from pydantic import BaseModel, EmailStr, Field
@@ -21,3 +22,30 @@ class DeliveryPartnerUpdate(BaseModel):
 
 class DeliveryPartnerCreate(BaseDeliveryPartner):
     password: str
+
+
+# GET /partner/route
+class RouteShipment(BaseModel):
+    id: UUID
+    content: str
+    weight: float
+    estimated_delivery: datetime
+    client_contact_phone: int | None = None
+
+
+class RouteStop(BaseModel):
+    sequence: int
+    destination: int
+    # from the start along the route
+    distance_km: float
+    eta: datetime
+    # zip code not in ZIP_COORDINATES_FILE -> located at the closest listed one
+    approximate: bool = False
+    shipments: list[RouteShipment]
+
+
+class RoutePlan(BaseModel):
+    start: int | None
+    approximate_start: bool = False
+    distance_km: float
+    stops: list[RouteStop]
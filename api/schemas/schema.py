@@ -1,5 +1,6 @@
 # pydantic validation
 from datetime import datetime
+from enum import Enum
 from random import randint
 from uuid import UUID
 
@@ -83,3 +84,65 @@ class ShipmentCreate(BaseShipment):
 class ShipmentReview(BaseShipment):
     rating: int = Field(ge=1, le=5)
     comment: str | None = Field(default=None)
+
+
+# sparse shipment row for list endpoints -> only requested fields are set
+class ShipmentSummary(BaseModel):
+    id: UUID | None = None
+    content: str | None = None
+    weight: float | None = None
+    destination: int | None = None
+    status: ShipmentStatus | None = None
+    estimated_delivery: datetime | None = None
+    created_at: datetime | None = None
+    client_contact_email: EmailStr | None = None
+    client_contact_phone: int | None = None
+    delivery_partner_id: UUID | None = None
+
+    # embed=timeline,tags,seller
+    timeline: list[ShipmentEventRead] | None = None
+    tags: list[TagRead] | None = None
+    seller: SellerRead | None = None
+
+
+class ShipmentPage(BaseModel):
+    items: list[ShipmentSummary]
+    next_cursor: str | None = None
+
+
+class TagAction(str, Enum):
+    add = "add"
+    remove = "remove"
+
+
+# POST /shipment/tags:batch
+class ShipmentTagBatch(BaseModel):
+    shipment_ids: list[UUID] = Field(min_length=1, max_length=5000)
+    tags: list[TagName] = Field(min_length=1)
+    action: TagAction
+
+
+class ShipmentTagBatchResult(BaseModel):
+    # shipments that gained (add) or lost (remove) at least one tag
+    affected: list[UUID]
+
+
+# POST /shipment/cancel:batch
+class ShipmentCancelBatch(BaseModel):
+    shipment_ids: list[UUID] = Field(min_length=1, max_length=5000)
+
+
+class ShipmentCancelBatchResult(BaseModel):
+    cancelled: list[UUID]
+    # already delivered or cancelled
+    skipped: list[UUID]
+
+
+# POST /shipment/delete:batch
+class ShipmentDeleteBatch(BaseModel):
+    shipment_ids: list[UUID] = Field(min_length=1, max_length=5000)
+
+
+class ShipmentDeleteBatchResult(BaseModel):
+    # ids not owned by the seller are not deleted
+    deleted: list[UUID]
@@ -1,7 +1,10 @@
+from datetime import date
 from uuid import UUID
 
 from pydantic import BaseModel, EmailStr
 
+from database.models import ShipmentStatus
+
 
 class BaseSeller(BaseModel):
     name: str
@@ -14,3 +17,16 @@ class SellerRead(BaseSeller):
 
 class SellerCreate(BaseSeller):
     password: str
+
+
+# GET /seller/stats -> reached, averages and reviews are for start..end
+class SellerStats(BaseModel):
+    start: date | None
+    end: date | None
+    # shipments in each status now
+    current: dict[ShipmentStatus, int]
+    # shipments that reached each status in the period
+    reached: dict[ShipmentStatus, int]
+    average_delivery_hours: float | None
+    average_rating: float | None
+    reviews: int
@@ -0,0 +1,60 @@
+from datetime import datetime
+from enum import Enum
+from uuid import UUID
+
+from fastapi.responses import ORJSONResponse
+
+from database.models import Shipment
+
+# Json ready dicts of loaded models, same output as ShipmentRead.
+# The objects are already typed -> no pydantic validation, encode the result
+# with ORJSONResponse.
+
+
+def _datetime(value: datetime | None) -> str | None:
+    return value.isoformat() if value is not None else None
+
+
+def _uuid(value: UUID) -> str:
+    return str(value)
+
+
+def _enum(value: Enum | None):
+    return value.value if value is not None else None
+
+
+def shipment_payload(shipment: Shipment) -> dict:
+    timeline = [
+        {
+            "id": _uuid(event.id),
+            "created_at": _datetime(event.created_at),
+            "location": event.location,
+            "status": _enum(event.status),
+            "description": event.description,
+        }
+        for event in shipment.timeline
+    ]
+
+    return {
+        "content": shipment.content,
+        "weight": shipment.weight,
+        "destination": shipment.destination,
+        "id": _uuid(shipment.id),
+        "timeline": timeline,
+        "estimated_delivery": _datetime(shipment.estimated_delivery),
+        "seller": {
+            "id": _uuid(shipment.seller.id),
+            "name": shipment.seller.name,
+            "email": shipment.seller.email,
+        },
+        "tags": [
+            {"name": _enum(tag.name), "instruction": tag.instruction}
+            for tag in shipment.tags
+        ],
+        # latest timeline status, as ShipmentRead.status
+        "status": timeline[-1]["status"] if timeline else None,
+    }
+
+
+def shipment_response(shipment: Shipment, status_code: int = 200) -> ORJSONResponse:
+    return ORJSONResponse(shipment_payload(shipment), status_code=status_code)
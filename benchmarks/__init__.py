@@ -0,0 +1,5 @@
+from pathlib import Path
+
+# written by benchmarks.seed, read by benchmarks.run
+STATE_FILE = Path(__file__).parent / "seed_state.json"
+BASELINE_FILE = Path(__file__).parent / "baseline.json"
@@ -0,0 +1,81 @@
+import statistics
+
+# percentiles reported and compared against the baseline
+PERCENTILES = (50, 95, 99)
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict:
+    """
+    Latency percentiles (ms) and throughput (requests/s) of one scenario
+    """
+    requests = len(latencies) + errors
+    summary = {
+        "requests": requests,
+        "errors": errors,
+        "throughput": round(requests / elapsed, 2) if elapsed else 0.0,
+    }
+
+    if len(latencies) > 1:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        values = [cuts[p - 1] for p in PERCENTILES]
+    else:
+        values = [latencies[0] if latencies else 0.0] * len(PERCENTILES)
+
+    for percentile, value in zip(PERCENTILES, values):
+        summary[f"p{percentile}"] = round(value, 2)
+
+    return summary
+
+
+def compare(
+    results: dict[str, dict],
+    baseline: dict[str, dict],
+    tolerance: float = 0.2,
+    max_error_rate: float = 0.01,
+) -> list[str]:
+    """
+    Regressions of results against the baseline: slower p95/p99 or lower
+    throughput by more than tolerance, or too many errors.
+    Scenarios missing from the baseline are not compared.
+    """
+    regressions = []
+
+    for name, result in results.items():
+        if (
+            result["requests"]
+            and result["errors"] / result["requests"] > max_error_rate
+        ):
+            regressions.append(f"{name}: {result['errors']} errors")
+
+        base = baseline.get(name)
+        if base is None:
+            continue
+
+        for key in ("p95", "p99"):
+            if result[key] > base[key] * (1 + tolerance):
+                regressions.append(
+                    f"{name}: {key} {result[key]} ms > baseline {base[key]} ms"
+                )
+
+        if result["throughput"] < base["throughput"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {result['throughput']}/s "
+                f"< baseline {base['throughput']}/s"
+            )
+
+    return regressions
+
+
+def render(results: dict[str, dict], baseline: dict[str, dict]) -> str:
+    lines = [
+        f"{'scenario':<18}{'req':>8}{'err':>6}{'req/s':>10}"
+        f"{'p50':>10}{'p95':>10}{'p99':>10}{'base p95':>10}"
+    ]
+    for name, result in results.items():
+        base_p95 = baseline.get(name, {}).get("p95", "-")
+        lines.append(
+            f"{name:<18}{result['requests']:>8}{result['errors']:>6}"
+            f"{result['throughput']:>10}{result['p50']:>10}{result['p95']:>10}"
+            f"{result['p99']:>10}{base_p95:>10}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,202 @@
+"""
+Run the benchmark workloads against a running api seeded with
+benchmarks.seed and compare them with the stored baseline.
+
+    python -m benchmarks.run --base-url http://localhost:8000 --duration 30
+    python -m benchmarks.run --save-baseline   # record a new baseline
+
+Exits with 1 when a scenario regressed past --tolerance.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable
+
+import httpx
+
+from benchmarks import BASELINE_FILE, STATE_FILE
+from benchmarks.report import compare, render, summarize
+
+
+@dataclass
+class Context:
+    state: dict
+    seller_tokens: list[str] = field(default_factory=list)
+    # partner token -> shipments assigned to that partner
+    partner_shipments: list[tuple[str, list[str]]] = field(default_factory=list)
+
+
+Scenario = Callable[[httpx.AsyncClient, Context, random.Random], Awaitable]
+
+
+def _auth(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def create_shipment(client, context: Context, rng: random.Random):
+    return await client.post(
+        "/shipment/",
+        json={
+            "content": "benchmark",
+            "weight": round(rng.uniform(0.1, 24.9), 2),
+            "destination": rng.choice(context.state["destinations"]),
+            "client_contact_email": "client@example.com",
+        },
+        headers=_auth(rng.choice(context.seller_tokens)),
+    )
+
+
+async def update_shipment(client, context: Context, rng: random.Random):
+    token, shipments = rng.choice(context.partner_shipments)
+    return await client.patch(
+        "/shipment/",
+        params={"id": rng.choice(shipments)},
+        json={"status": "in_transit", "location": rng.randint(10000, 50000)},
+        headers=_auth(token),
+    )
+
+
+async def get_shipment(client, context: Context, rng: random.Random):
+    return await client.get(
+        "/shipment/", params={"id": rng.choice(context.state["shipments"])}
+    )
+
+
+async def track_shipment(client, context: Context, rng: random.Random):
+    return await client.get(
+        "/shipment/track", params={"id": rng.choice(context.state["shipments"])}
+    )
+
+
+async def tagged_shipments(client, context: Context, rng: random.Random):
+    return await client.get(
+        "/shipment/tagged", params={"tag_name": context.state["tagged"]}
+    )
+
+
+SCENARIOS: dict[str, Scenario] = {
+    "create_shipment": create_shipment,
+    "update_shipment": update_shipment,
+    "get_shipment": get_shipment,
+    "track_shipment": track_shipment,
+    "tagged_shipments": tagged_shipments,
+}
+
+
+async def _login(client: httpx.AsyncClient, prefix: str, email: str, password: str):
+    response = await client.post(
+        f"/{prefix}/login", data={"username": email, "password": password}
+    )
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def _run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    context: Context,
+    args: argparse.Namespace,
+) -> dict:
+    latencies: list[float] = []
+    errors = 0
+
+    async def worker(number: int, deadline: float, record: bool):
+        nonlocal errors
+        # seeded per worker -> the same request mix on every run
+        rng = random.Random(args.seed * 1000 + number)
+
+        while time.perf_counter() < deadline:
+            started_at = time.perf_counter()
+            try:
+                response = await scenario(client, context, rng)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            elapsed = (time.perf_counter() - started_at) * 1000
+
+            if not record:
+                continue
+            if failed:
+                errors += 1
+            else:
+                latencies.append(elapsed)
+
+    for record, duration in ((False, args.warmup), (True, args.duration)):
+        deadline = time.perf_counter() + duration
+        started_at = time.perf_counter()
+        await asyncio.gather(
+            *(worker(n, deadline, record) for n in range(args.concurrency))
+        )
+
+    return summarize(latencies, errors, time.perf_counter() - started_at)
+
+
+async def run(args: argparse.Namespace) -> int:
+    state = json.loads(args.state.read_text())
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    names = args.scenarios or list(SCENARIOS)
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        base_url=args.base_url, limits=limits, timeout=args.timeout
+    ) as client:
+        context = Context(state=state)
+        for email in state["sellers"]:
+            context.seller_tokens.append(
+                await _login(client, "seller", email, state["password"])
+            )
+        for email, shipments in state["partner_shipments"].items():
+            token = await _login(client, "partner", email, state["password"])
+            context.partner_shipments.append((token, shipments))
+
+        results = {}
+        for name in names:
+            print(f"running {name} ({args.duration}s, {args.concurrency} workers)")
+            results[name] = await _run_scenario(client, SCENARIOS[name], context, args)
+
+    print(render(results, baseline))
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps({**baseline, **results}, indent=2))
+        print(f"baseline saved to {args.baseline}")
+        return 0
+
+    if not baseline:
+        print("no baseline -> rerun with --save-baseline to record one")
+        return 0
+
+    regressions = compare(results, baseline, tolerance=args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FastShip endpoint benchmarks")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS))
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="seconds")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--state", type=Path, default=STATE_FILE)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--output", type=Path, help="write results as json")
+    parser.add_argument("--save-baseline", action="store_true")
+
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
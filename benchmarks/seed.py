@@ -0,0 +1,289 @@
+"""
+Seed a local database with synthetic, reproducible benchmark data.
+The same --seed generates the same rows (dates relative to today).
+
+    python -m benchmarks.seed --sellers 50 --partners 200 --shipments 1000000
+
+Writes benchmarks/seed_state.json (credentials and sample ids) for
+benchmarks.run. Point it at a throwaway database, never production.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from benchmarks import STATE_FILE
+from database.models import CLOSED_STATUSES, ShipmentStatus, TagName
+from database.partitions import add_months, create_partition_sql, is_partitioned
+from database.session import create_db_tables, engine
+from database.tags import tag_registry
+from utils.hashing import hash_password
+
+PASSWORD = "benchmark"
+
+BATCH_SIZE = 10_000
+
+# zip codes used by the api (random_destination)
+ZIP_RANGE = (10000, 50000)
+
+# share of shipments carrying a tag -> temperature_controlled stays rare so
+# /shipment/tagged returns a bounded list
+TAG_WEIGHTS = {
+    TagName.EXPRESS: 0.15,
+    TagName.STANDARD: 0.4,
+    TagName.FRAGILE: 0.1,
+    TagName.HEAVY: 0.05,
+    TagName.INTERNATIONAL: 0.02,
+    TagName.DOMESTIC: 0.3,
+    TagName.TEMPERATURE_CONTROLLED: 0.00005,
+    TagName.GIFT: 0.05,
+    TagName.RETURN: 0.03,
+    TagName.DOCUMENT: 0.05,
+}
+
+# timeline of a shipment up to its current status
+PROGRESSION = [
+    ShipmentStatus.placed,
+    ShipmentStatus.in_transit,
+    ShipmentStatus.out_for_delivery,
+    ShipmentStatus.delivered,
+]
+
+CONTENTS = ["books", "shoes", "laptop", "phone", "clothes", "toys", "groceries"]
+
+# sample sizes kept for the workloads
+SAMPLE_SHIPMENTS = 2_000
+SAMPLE_PARTNERS = 20
+SAMPLE_PER_PARTNER = 50
+
+
+def _uuid(rng: random.Random) -> UUID:
+    return UUID(int=rng.getrandbits(128), version=4)
+
+
+async def _copy(connection: AsyncConnection, table: str, columns, records):
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(
+        table, records=records, columns=columns
+    )
+
+
+async def _ensure_tags() -> dict[TagName, UUID]:
+    await tag_registry.load()  # seeds missing tags
+    return {name: (await tag_registry.get(name)).id for name in TagName}
+
+
+async def _ensure_partitions(connection: AsyncConnection, start: datetime):
+    # older months would otherwise all land in the default partition
+    if not await is_partitioned(connection):
+        return
+
+    month, last = start.date().replace(day=1), date.today().replace(day=1)
+    while month <= last:
+        await connection.execute(text(create_partition_sql(month)))
+        month = add_months(month, 1)
+
+
+def _users(rng: random.Random, kind: str, count: int, password_hash: str, now):
+    return [
+        {
+            "id": _uuid(rng),
+            "name": f"Bench {kind} {n}",
+            "email": f"{kind}{n}@bench.fastship.dev",
+            "email_verified": True,
+            "password_hash": password_hash,
+            "created_at": now,
+        }
+        for n in range(count)
+    ]
+
+
+def _coverage(rng: random.Random) -> list[int]:
+    # a contiguous block of zips around a random hub
+    size = rng.randint(50, 300)
+    start = rng.randint(ZIP_RANGE[0], ZIP_RANGE[1] - size)
+    return list(range(start, start + size))
+
+
+async def seed(args: argparse.Namespace):
+    rng = random.Random(args.seed)
+    now = datetime.now().replace(microsecond=0)
+    start = now - timedelta(days=args.days)
+
+    await create_db_tables()
+    tag_ids = await _ensure_tags()
+    # one hash for every benchmark user -> bcrypt once
+    password_hash = hash_password(PASSWORD)
+
+    sellers = _users(rng, "seller", args.sellers, password_hash, now)
+    for seller in sellers:
+        seller["zip_code"] = rng.randint(*ZIP_RANGE)
+
+    partners = _users(rng, "partner", args.partners, password_hash, now)
+    for partner in partners:
+        partner["serviceable_zip_codes"] = _coverage(rng)
+        # generous capacity -> POST /shipment/ keeps finding a partner
+        partner["max_handling_capacity"] = args.shipments
+
+    state = {
+        "password": PASSWORD,
+        "sellers": [seller["email"] for seller in sellers[:10]],
+        "destinations": sorted(
+            {rng.choice(p["serviceable_zip_codes"]) for p in partners}
+        ),
+        "shipments": [],
+        # open shipments per partner -> PATCH /shipment/ targets
+        "partner_shipments": {p["email"]: [] for p in partners[:SAMPLE_PARTNERS]},
+        "tagged": TagName.TEMPERATURE_CONTROLLED.value,
+    }
+    sampled_partners = {p["id"]: p["email"] for p in partners[:SAMPLE_PARTNERS]}
+    sample_rate = min(1.0, SAMPLE_SHIPMENTS / max(args.shipments, 1))
+
+    async with engine.begin() as connection:
+        await _ensure_partitions(connection, start)
+        for table, rows in (("seller", sellers), ("delivery_partner", partners)):
+            columns = list(rows[0])
+            await _copy(
+                connection,
+                table,
+                columns,
+                [tuple(row[c] for c in columns) for row in rows],
+            )
+
+    tag_names, tag_weights = zip(*TAG_WEIGHTS.items())
+    seeded = 0
+    while seeded < args.shipments:
+        shipments, events, shipment_tags = [], [], []
+
+        for _ in range(min(BATCH_SIZE, args.shipments - seeded)):
+            id = _uuid(rng)
+            partner = rng.choice(partners)
+            created_at = start + timedelta(
+                seconds=rng.randint(0, args.days * 24 * 3600)
+            )
+            shipments.append(
+                (
+                    id,
+                    rng.choice(CONTENTS),
+                    round(rng.uniform(0.1, 24.9), 2),
+                    rng.choice(partner["serviceable_zip_codes"]),
+                    created_at + timedelta(days=3),
+                    f"client{seeded}@example.com",
+                    None,
+                    created_at,
+                    rng.choice(sellers)["id"],
+                    partner["id"],
+                )
+            )
+
+            # older shipments are further along
+            age = (now - created_at) / (now - start)
+            stage = min(int(age * len(PROGRESSION) + rng.random()), 3)
+            statuses = PROGRESSION[: stage + 1]
+            if stage < 3 and rng.random() < 0.03:
+                statuses.append(ShipmentStatus.cancelled)
+
+            event_at = created_at
+            for status in statuses:
+                events.append(
+                    (
+                        _uuid(rng),
+                        event_at,
+                        rng.choice(partner["serviceable_zip_codes"]),
+                        status.value,
+                        f"shipment {status.value}",
+                        id,
+                    )
+                )
+                event_at = min(event_at + timedelta(hours=rng.randint(2, 30)), now)
+
+            for name, weight in zip(tag_names, tag_weights):
+                if rng.random() < weight:
+                    shipment_tags.append((id, tag_ids[name]))
+
+            if rng.random() < sample_rate:
+                state["shipments"].append(str(id))
+            email = sampled_partners.get(partner["id"])
+            if email and statuses[-1] not in CLOSED_STATUSES:
+                samples = state["partner_shipments"][email]
+                if len(samples) < SAMPLE_PER_PARTNER:
+                    samples.append(str(id))
+
+            seeded += 1
+
+        async with engine.begin() as connection:
+            await _copy(
+                connection,
+                "shipment",
+                [
+                    "id",
+                    "content",
+                    "weight",
+                    "destination",
+                    "estimated_delivery",
+                    "client_contact_email",
+                    "client_contact_phone",
+                    "created_at",
+                    "seller_id",
+                    "delivery_partner_id",
+                ],
+                shipments,
+            )
+            await _copy(
+                connection,
+                "shipment_event",
+                [
+                    "id",
+                    "created_at",
+                    "location",
+                    "status",
+                    "description",
+                    "shipment_id",
+                ],
+                events,
+            )
+            await _copy(
+                connection, "shipment_tag", ["shipment_id", "tag_id"], shipment_tags
+            )
+
+        print(f"seeded {seeded}/{args.shipments} shipments")
+
+    async with engine.begin() as connection:
+        # fresh statistics -> realistic plans right away
+        for table in (
+            "seller",
+            "delivery_partner",
+            "shipment",
+            "shipment_event",
+            "shipment_tag",
+        ):
+            await connection.execute(text(f"ANALYZE {table}"))
+
+    state["partner_shipments"] = {
+        email: ids for email, ids in state["partner_shipments"].items() if ids
+    }
+    args.state.write_text(json.dumps(state, indent=2))
+    print(f"state written to {args.state}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed FastShip benchmark data")
+    parser.add_argument("--sellers", type=int, default=50)
+    parser.add_argument("--partners", type=int, default=200)
+    parser.add_argument("--shipments", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=180, help="shipment history")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--state", type=Path, default=STATE_FILE)
+
+    asyncio.run(seed(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
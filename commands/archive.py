@@ -0,0 +1,44 @@
+"""
+Archive closed shipments older than N days to parquet files.
+
+    python -m commands.archive --older-than 90
+    python -m commands.archive --reindex
+"""
+
+import argparse
+import asyncio
+
+from config import app_settings
+from database.session import async_session
+from services.archive import ArchiveService
+
+
+async def archive(args: argparse.Namespace):
+    async with async_session() as session:
+        if args.reindex:
+            indexed = await ArchiveService(session, args.output).reindex()
+            print(f"indexed {indexed} archived shipments in {args.output}")
+            return
+
+        archived = await ArchiveService(session, args.output).archive(args.older_than)
+
+    print(f"archived {archived} shipments to {args.output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive closed shipments")
+    parser.add_argument(
+        "--older-than", type=int, default=app_settings.ARCHIVE_AFTER_DAYS, help="days"
+    )
+    parser.add_argument("--output", default=app_settings.ARCHIVE_DIR)
+    parser.add_argument(
+        "--reindex",
+        action="store_true",
+        help="rebuild the archived shipment index from the files",
+    )
+
+    asyncio.run(archive(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
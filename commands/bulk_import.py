@@ -0,0 +1,55 @@
+"""
+Bulk import shipments or delivery partners from a csv file.
+
+    python -m commands.bulk_import shipments shipments.csv --seller-id <uuid>
+    python -m commands.bulk_import partners partners.csv --no-notify
+"""
+
+import argparse
+import asyncio
+import csv
+from uuid import UUID
+
+from database.models import Seller
+from database.session import async_session
+from services.bulk_import import BulkImportService
+
+
+async def bulk_import(args: argparse.Namespace):
+    async with async_session() as session:
+        service = BulkImportService(session)
+
+        with open(args.file, newline="", encoding="utf-8") as file:
+            rows = csv.DictReader(file)
+
+            if args.entity == "shipments":
+                seller = await session.get(Seller, args.seller_id)
+                if seller is None:
+                    raise SystemExit(f"Seller {args.seller_id} not found")
+                report = await service.import_shipments(
+                    rows, seller, notify=args.notify
+                )
+            else:
+                report = await service.import_partners(rows, notify=args.notify)
+
+    print(report.model_dump_json(indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import FastShip data")
+    parser.add_argument("entity", choices=["shipments", "partners"])
+    parser.add_argument("file")
+    parser.add_argument("--seller-id", type=UUID)
+    parser.add_argument(
+        "--no-notify", dest="notify", action="store_false", help="skip emails"
+    )
+
+    args = parser.parse_args()
+    if args.entity == "shipments" and args.seller_id is None:
+        parser.error("--seller-id is required for shipments")
+
+    asyncio.run(bulk_import(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Export shipments, events or reviews to a csv / ndjson file.
+
+    python -m commands.export shipments --format csv --output shipments.csv
+    python -m commands.export events --seller-id <uuid> --cursor <last cursor>
+"""
+
+import argparse
+import asyncio
+from datetime import datetime
+from uuid import UUID
+
+from database.session import async_session
+from services.export import (
+    ExportEntity,
+    ExportFormat,
+    ExportService,
+    export_fieldnames,
+)
+from utils.pagination import decode_cursor
+from utils.streaming import csv_lines, ndjson_lines
+
+
+async def export(args: argparse.Namespace):
+    entity = ExportEntity(args.entity)
+    fmt = ExportFormat(args.format)
+    output = args.output or f"{entity.value}.{fmt.value}"
+
+    async with async_session() as session:
+        rows = ExportService(session).rows(
+            entity,
+            seller_id=args.seller_id,
+            partner_id=args.partner_id,
+            start=args.start,
+            end=args.end,
+            after=args.after,
+        )
+        lines = (
+            csv_lines(export_fieldnames(entity), rows, header=not args.cursor)
+            if fmt == ExportFormat.csv
+            else ndjson_lines(rows)
+        )
+
+        # resumed exports are appended to the existing file
+        with open(output, "a" if args.cursor else "w", newline="") as file:
+            async for chunk in lines:
+                file.write(chunk)
+
+    print(f"exported {entity.value} to {output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export FastShip data")
+    parser.add_argument("entity", choices=[entity.value for entity in ExportEntity])
+    parser.add_argument(
+        "--format", choices=[fmt.value for fmt in ExportFormat], default="csv"
+    )
+    parser.add_argument("--output")
+    parser.add_argument("--seller-id", type=UUID)
+    parser.add_argument("--partner-id", type=UUID)
+    parser.add_argument("--start", type=datetime.fromisoformat)
+    parser.add_argument("--end", type=datetime.fromisoformat)
+    parser.add_argument("--cursor", help="resume after the row with this cursor")
+
+    args = parser.parse_args()
+    args.after = None
+    if args.cursor:
+        args.after = decode_cursor(args.cursor)
+        if args.after is None:
+            parser.error("invalid --cursor")
+
+    asyncio.run(export(args))
+
+
+if __name__ == "__main__":
+    main()
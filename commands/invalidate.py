@@ -0,0 +1,28 @@
+"""
+Drop an in-process cache in every api worker, e.g. after editing the tag
+table by hand or rebuilding shipment history.
+
+    python -m commands.invalidate tags|eta|tokens [--key <key>]
+"""
+
+import argparse
+import asyncio
+
+from database.invalidation import invalidation_bus
+
+
+async def invalidate(args: argparse.Namespace):
+    await invalidation_bus.publish(args.cache, args.key)
+    print(f"invalidated {args.cache} {args.key or '(all)'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Invalidate api worker caches")
+    parser.add_argument("cache", choices=["tags", "eta", "tokens"])
+    parser.add_argument("--key", help="only this entry, default all")
+
+    asyncio.run(invalidate(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Maintain shipment_event monthly partitions: create the coming months and
+drop expired, already archived (empty) months.
+
+    python -m commands.partitions --months-ahead 3 --retention-months 24
+"""
+
+import argparse
+import asyncio
+
+from database.partitions import drop_expired_event_partitions, ensure_event_partitions
+from database.session import engine
+
+
+async def maintain(args: argparse.Namespace):
+    async with engine.begin() as connection:
+        created = await ensure_event_partitions(connection, args.months_ahead)
+        print(f"partitions ensured: {', '.join(created) or 'table not partitioned'}")
+
+        if args.retention_months is None:
+            return
+
+        dropped, kept = await drop_expired_event_partitions(
+            connection, args.retention_months
+        )
+        print(f"dropped: {', '.join(dropped) or '-'}")
+        if kept:
+            print(f"kept (not archived yet): {', '.join(kept)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain shipment_event partitions")
+    parser.add_argument("--months-ahead", type=int, default=3)
+    parser.add_argument("--retention-months", type=int)
+
+    asyncio.run(maintain(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Recompute the delivery partner scores used to rank assignment candidates.
+
+    python -m commands.partner_scores --window-days 90
+"""
+
+import argparse
+import asyncio
+import time
+
+from config import app_settings
+from database.session import async_session
+from services.partner_scoring import PartnerScoringService
+
+
+async def rescore(args: argparse.Namespace):
+    started = time.perf_counter()
+    async with async_session() as session:
+        scored = await PartnerScoringService(session).rescore(args.window_days)
+
+    print(f"scored {scored} partner zip codes in {time.perf_counter() - started:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score delivery partners")
+    parser.add_argument(
+        "--window-days",
+        type=int,
+        default=app_settings.PARTNER_SCORE_WINDOW_DAYS,
+        help="delivered shipments created in the last N days",
+    )
+
+    asyncio.run(rescore(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Delete every shipment of a seller with its events, tags and reviews.
+
+    python -m commands.purge --seller-id <uuid>
+"""
+
+import argparse
+import asyncio
+from uuid import UUID
+
+from database.session import async_session
+from services.delivery_partner import DeliveryPartnerService
+from services.shipment import ShipmentService
+from services.shipment_event import ShipmentEventService
+
+
+async def purge(args: argparse.Namespace):
+    async with async_session() as session:
+        service = ShipmentService(
+            session, DeliveryPartnerService(session), ShipmentEventService(session)
+        )
+        deleted = await service.delete_for_seller(args.seller_id)
+
+    print(f"deleted {deleted} shipments of seller {args.seller_id}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Purge the shipments of a seller")
+    parser.add_argument("--seller-id", type=UUID, required=True)
+
+    asyncio.run(purge(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""
+Rebuild the seller dashboard rollup from the shipment events and reviews.
+
+    python -m commands.seller_stats
+    python -m commands.seller_stats --seller-id <uuid>
+"""
+
+import argparse
+import asyncio
+from uuid import UUID
+
+from database.session import async_session
+from services.seller_stats import SellerStatsService
+
+
+async def rebuild(args: argparse.Namespace):
+    async with async_session() as session:
+        rows = await SellerStatsService(session).rebuild(args.seller_id)
+
+    print(f"rebuilt {rows} seller stats rows")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the seller stats rollup")
+    parser.add_argument("--seller-id", type=UUID, help="default: every seller")
+
+    asyncio.run(rebuild(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
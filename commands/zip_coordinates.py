@@ -0,0 +1,72 @@
+"""
+Build ZIP_COORDINATES_FILE from the census ZCTA gazetteer (one internal point
+per zip code tabulation area). Downloads the national file unless --source
+points to an already downloaded .zip or .txt.
+
+    python -m commands.zip_coordinates
+    python -m commands.zip_coordinates --source 2023_Gaz_zcta_national.zip
+"""
+
+import argparse
+import csv
+import io
+import tempfile
+import urllib.request
+import zipfile
+from pathlib import Path
+from typing import TextIO
+
+from config import app_settings
+from utils.routing import gazetteer_coordinates
+
+GAZETTEER_URL = (
+    "https://www2.census.gov/geo/docs/maps-data/data/gazetteer/"
+    "2023_Gazetteer/2023_Gaz_zcta_national.zip"
+)
+
+
+def _open_gazetteer(path: Path) -> TextIO:
+    if not zipfile.is_zipfile(path):
+        return open(path, encoding="utf-8")
+
+    archive = zipfile.ZipFile(path)
+    # the archive holds the single .txt file
+    member = next(name for name in archive.namelist() if name.endswith(".txt"))
+    return io.TextIOWrapper(archive.open(member), encoding="utf-8")
+
+
+def build(source: Path, output: Path) -> int:
+    with _open_gazetteer(source) as gazetteer:
+        rows = sorted(gazetteer_coordinates(gazetteer))
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["zip_code", "latitude", "longitude"])
+        writer.writerows(rows)
+
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the zip coordinates csv")
+    parser.add_argument("--source", type=Path, help="downloaded gazetteer file")
+    parser.add_argument(
+        "--output", type=Path, default=Path(app_settings.ZIP_COORDINATES_FILE)
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = args.source
+        if source is None:
+            source = Path(directory) / "gazetteer.zip"
+            print(f"downloading {GAZETTEER_URL}")
+            urllib.request.urlretrieve(GAZETTEER_URL, source)
+
+        count = build(source, args.output)
+
+    print(f"{count} zip codes written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
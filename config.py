@@ -5,6 +5,49 @@ class Appsettings(BaseSettings):
     APP_NAME: str = "FastShip"
     APP_DOMAIN: str = "localhost:8000"
 
+    # closed shipments archived as parquet files
+    ARCHIVE_DIR: str = "archive"
+    ARCHIVE_AFTER_DAYS: int = 90
+
+    # celery worker prometheus exporter
+    WORKER_METRICS_PORT: int = 9808
+
+    # speedscope profiles of requests sent with X-Profile: 1
+    PROFILE_DIR: str = "profiles"
+
+    # Idempotency-Key on POST /shipment/ -> stored responses and in flight locks
+    IDEMPOTENCY_TTL: int = 24 * 60 * 60  # seconds
+    IDEMPOTENCY_LOCK_TIMEOUT: int = 30  # seconds
+
+    # delivered shipments scored by python -m commands.partner_scores
+    PARTNER_SCORE_WINDOW_DAYS: int = 90
+
+    # estimated_delivery from transit time quantiles -> services/eta.py
+    ETA_QUANTILE: float = 0.8
+    ETA_WINDOW_DAYS: int = 90
+    ETA_MIN_SAMPLES: int = 5
+    ETA_REFRESH_INTERVAL: int = 300  # seconds
+    # without enough history
+    ETA_DEFAULT_HOURS: float = 72
+
+    # celery beat overdue detector -> delay emails for past estimated_delivery
+    OVERDUE_CHECK_INTERVAL: int = 15 * 60  # seconds
+    OVERDUE_CHUNK_SIZE: int = 1000
+
+    # partner route planning -> csv of zip_code,latitude,longitude
+    ZIP_COORDINATES_FILE: str = "data/zip_coordinates.csv"
+    ROUTE_SPEED_KMH: float = 30
+    ROUTE_STOP_MINUTES: float = 5
+
+    # a jti redis reported as not blacklisted is trusted for this long,
+    # logouts drop it in every worker right away
+    TOKEN_CACHE_TTL: float = 5  # seconds
+
+    # concurrent reads of the same shipment share one load
+    # redis -> also across workers
+    SINGLE_FLIGHT_REDIS: bool = False
+    SINGLE_FLIGHT_LOCK_TIMEOUT: int = 5  # seconds
+
 
 class DatabaseSettings(BaseSettings):
     POSTGRES_SERVER: str
@@ -17,6 +60,19 @@ class DatabaseSettings(BaseSettings):
     REDIS_HOST: str
     REDIS_PORT: int
 
+    # sql logging and per request query budgets
+    DB_ECHO: bool = False
+
+    # connections per api worker -> gunicorn.conf.py derives them from the
+    # server's max_connections, DB_RESERVED_CONNECTIONS are left for celery,
+    # migrations and psql, API_HOSTS hosts share the rest
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_RESERVED_CONNECTIONS: int = 20
+    API_HOSTS: int = 1
+    QUERY_BUDGET: int | None = None
+    QUERY_BUDGET_STRICT: bool = False  # raise instead of warn, for tests
+
     model_config = SettingsConfigDict(
         env_file=".env", env_ignore_empty=True, extra="ignore"
     )
@@ -56,6 +112,9 @@ class SecuritySettings(BaseSettings):
     JWT_SECRET: str
     JWT_ALGORITHM: str
 
+    # ops endpoints (exports, ...) -> disabled when not set
+    ADMIN_API_KEY: str | None = None
+
     model_config = SettingsConfigDict(
         env_file=".env", env_ignore_empty=True, extra="ignore"
     )
@@ -50,6 +50,30 @@ class DeliveryPartnerCapacityExceeded(FastShipError):
     status = status.HTTP_406_NOT_ACCEPTABLE
 
 
+class InvalidCursor(FastShipError):
+    """
+    Pagination cursor is invalid
+    """
+
+    status = status.HTTP_400_BAD_REQUEST
+
+
+class IdempotencyKeyReused(FastShipError):
+    """
+    Idempotency-Key was already used for a different request
+    """
+
+    status = status.HTTP_422_UNPROCESSABLE_CONTENT
+
+
+class IdempotencyKeyInProgress(FastShipError):
+    """
+    A request with this Idempotency-Key is still in progress
+    """
+
+    status = status.HTTP_409_CONFLICT
+
+
 def _get_handler(status_code: int, detail: str):
     def handler(request: Request, exception: Exception) -> JSONResponse:
         return JSONResponse(
@@ -0,0 +1,138 @@
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger("fastship.db")
+
+
+@dataclass
+class QueryStats:
+    statements: int = 0
+    duration: float = 0.0  # seconds
+    rows: int = 0
+
+
+class QueryBudgetExceeded(AssertionError):
+    """
+    Request issued more sql statements than its query budget
+    """
+
+
+# stats of the request being served -> None outside of requests
+_query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> QueryStats | None:
+    return _query_stats.get()
+
+
+def query_budget(statements: int) -> Callable:
+    """
+    Max sql statements a route may issue, e.g. @query_budget(6) under the
+    route decorator. Checked by QueryStatsMiddleware.
+    """
+
+    def decorator(endpoint: Callable) -> Callable:
+        endpoint.query_budget = statements
+        return endpoint
+
+    return decorator
+
+
+def instrument_engine(engine: Engine):
+    # async engines -> pass engine.sync_engine
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        context.query_started_at = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        stats = _query_stats.get()
+        if stats is None:
+            return
+
+        stats.statements += 1
+        stats.duration += time.perf_counter() - context.query_started_at
+        stats.rows += max(cursor.rowcount, 0)
+
+
+class QueryStatsMiddleware:
+    """
+    Counts statements, db time and rows per request. Sent as a Server-Timing
+    header and logged with the route; budgets warn, or raise when strict.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        default_budget: int | None = None,
+        strict: bool = False,
+    ):
+        self.app = app
+        self.default_budget = default_budget
+        self.strict = strict
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = QueryStats()
+        token = _query_stats.set(stats)
+        started_at = time.perf_counter()
+
+        async def send_with_timing(message: Message):
+            # streamed bodies may query after this -> the log line has the totals
+            if message["type"] == "http.response.start":
+                db_ms = stats.duration * 1000
+                app_ms = (time.perf_counter() - started_at) * 1000
+                timing = (
+                    f'db;dur={db_ms:.1f};desc="{stats.statements} queries", '
+                    f"app;dur={app_ms:.1f}"
+                )
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timing.encode("latin-1")))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _query_stats.reset(token)
+
+        route = scope.get("route")
+        path = getattr(route, "path", scope["path"])
+
+        logger.info(
+            "%s %s -> %s queries, %.1f ms db, %s rows",
+            scope["method"],
+            path,
+            stats.statements,
+            stats.duration * 1000,
+            stats.rows,
+            extra={
+                "method": scope["method"],
+                "route": path,
+                "db_statements": stats.statements,
+                "db_time_ms": round(stats.duration * 1000, 1),
+                "db_rows": stats.rows,
+            },
+        )
+
+        budget = getattr(getattr(route, "endpoint", None), "query_budget", None)
+        budget = budget if budget is not None else self.default_budget
+        if budget is None or stats.statements <= budget:
+            return
+
+        detail = (
+            f"{scope['method']} {path} issued {stats.statements} queries, "
+            f"budget is {budget}"
+        )
+        if self.strict:
+            raise QueryBudgetExceeded(detail)
+        logger.warning(detail)
@@ -0,0 +1,183 @@
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+from celery.signals import after_task_publish, before_task_publish
+from fastapi import Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# api
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Request latency per route",
+    ["method", "route", "status"],
+)
+
+# database pool
+DB_POOL_CHECKOUTS = Counter("db_pool_checkouts_total", "Pool connection checkouts")
+DB_POOL_WAIT = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting for a pool connection",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+DB_POOL_TIMEOUTS = Counter("db_pool_timeouts_total", "Pool checkout timeouts")
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out",
+    multiprocess_mode="livesum",
+)
+
+# redis
+REDIS_LATENCY = Histogram(
+    "redis_call_duration_seconds",
+    "Redis call latency",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+
+# partner assignment
+ASSIGNMENT_ATTEMPTS = Counter(
+    "partner_assignment_attempts_total", "Delivery partner assignment attempts"
+)
+ASSIGNMENT_FAILURES = Counter(
+    "partner_assignment_failures_total",
+    "Assignments without a partner with capacity (406)",
+)
+
+# celery
+CELERY_ENQUEUE_LATENCY = Histogram(
+    "celery_enqueue_duration_seconds",
+    "Time to publish a task to the broker",
+    ["task"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+EMAIL_SEND_DURATION = Histogram(
+    "celery_send_template_email_duration_seconds",
+    "send_template_email task duration (worker)",
+)
+
+
+def metrics_registry() -> CollectorRegistry:
+    # several processes (gunicorn / prefork workers) -> aggregate their files
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def reset_multiprocess_dir():
+    # files of a previous run would be summed up with the new ones -> call
+    # in the parent before any child records a value
+    if directory := os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        shutil.rmtree(directory, ignore_errors=True)
+        Path(directory).mkdir(parents=True)
+
+
+def metrics_response() -> Response:
+    return Response(generate_latest(metrics_registry()), media_type=CONTENT_TYPE_LATEST)
+
+
+class MeteredQueuePool(AsyncAdaptedQueuePool):
+    """
+    Default async pool with checkout count, wait time and timeout metrics
+    """
+
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            DB_POOL_TIMEOUTS.inc()
+            raise
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - started_at)
+
+        DB_POOL_CHECKOUTS.inc()
+        DB_POOL_CHECKED_OUT.set(self.checkedout())
+        return connection
+
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        DB_POOL_CHECKED_OUT.set(self.checkedout())
+
+
+class MetricsMiddleware:
+    """
+    Request latency histogram labelled by route template, not raw path
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started_at = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            REQUEST_LATENCY.labels(
+                method=scope["method"],
+                # unmatched paths share one label -> bounded cardinality
+                route=getattr(route, "path", "unmatched"),
+                status=status_code,
+            ).observe(time.perf_counter() - started_at)
+
+
+# celery publish timing -> keyed by task id between the two signals
+_publish_started: dict[str, float] = {}
+_publish_lock = threading.Lock()
+# failed publishes never send after_task_publish -> their entries are
+# dropped once this old
+PUBLISH_STALE_AFTER = 60  # seconds
+
+
+@before_task_publish.connect
+def _before_task_publish(sender=None, headers=None, **kwargs):
+    if not headers or "id" not in headers:
+        return
+
+    now = time.perf_counter()
+    with _publish_lock:
+        # insertion order -> oldest first
+        for task_id, started_at in list(_publish_started.items()):
+            if now - started_at < PUBLISH_STALE_AFTER:
+                break
+            del _publish_started[task_id]
+        _publish_started[headers["id"]] = now
+
+
+@after_task_publish.connect
+def _after_task_publish(sender=None, headers=None, **kwargs):
+    with _publish_lock:
+        started_at = _publish_started.pop((headers or {}).get("id"), None)
+    if started_at is not None:
+        CELERY_ENQUEUE_LATENCY.labels(task=sender).observe(
+            time.perf_counter() - started_at
+        )
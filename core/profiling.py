@@ -0,0 +1,77 @@
+import logging
+import secrets
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import parse_qs
+from uuid import uuid4
+
+from pyinstrument import Profiler
+from pyinstrument.renderers import SpeedscopeRenderer
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger("fastship.profiling")
+
+PROFILE_HEADER = b"x-profile"
+ADMIN_KEY_HEADER = b"x-admin-key"
+
+
+class ProfilerMiddleware:
+    """
+    Wall clock profile of a single request, enabled with the X-Profile: 1
+    header or ?profile=1 and a valid X-Admin-Key. Awaits (asyncpg, redis)
+    show up as [await] frames. Saved as speedscope json, the file name is
+    returned in the X-Profile header.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        admin_key: str | None,
+        directory: Path | str = "profiles",
+        interval: float = 0.001,
+    ):
+        self.app = app
+        self.admin_key = admin_key
+        self.directory = Path(directory)
+        self.interval = interval
+
+    def _requested(self, scope: Scope) -> bool:
+        # disabled without an admin key configured
+        if scope["type"] != "http" or not self.admin_key:
+            return False
+
+        headers = dict(scope["headers"])
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        if headers.get(PROFILE_HEADER) != b"1" and query.get("profile") != ["1"]:
+            return False
+
+        # silently ignored for everyone else -> no hint the flag exists
+        return secrets.compare_digest(
+            headers.get(ADMIN_KEY_HEADER, b""), self.admin_key.encode()
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if not self._requested(scope):
+            return await self.app(scope, receive, send)
+
+        file = self.directory / (
+            f"{datetime.now():%Y%m%dT%H%M%S}-{scope['method']}-{uuid4().hex[:8]}"
+            ".speedscope.json"
+        )
+
+        async def send_with_profile(message: Message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((PROFILE_HEADER, file.name.encode("latin-1")))
+                message["headers"] = headers
+            await send(message)
+
+        profiler = Profiler(interval=self.interval, async_mode="enabled")
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            profiler.stop()
+            self.directory.mkdir(parents=True, exist_ok=True)
+            file.write_text(profiler.output(SpeedscopeRenderer()))
+            logger.info("profile of %s %s -> %s", scope["method"], scope["path"], file)
@@ -1,5 +1,5 @@
 # from fastapi import Depends
-from fastapi.security import OAuth2PasswordBearer  # , HTTPBearer
+from fastapi.security import APIKeyHeader, OAuth2PasswordBearer  # , HTTPBearer
 
 # from sqlalchemy.sql.annotation import Annotated
 
@@ -11,6 +11,7 @@ oauth_scheme_seller = OAuth2PasswordBearer(
 oauth_scheme_partner = OAuth2PasswordBearer(
     tokenUrl="/partner/login", scheme_name="Delivery Partner"
 )
+admin_key_scheme = APIKeyHeader(name="X-Admin-Key", scheme_name="Admin")
 
 
 # # manual implementation of bearer token -> when not using oauth@ password bearer
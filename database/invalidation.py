@@ -0,0 +1,109 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Callable
+from uuid import uuid4
+
+import orjson
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from config import db_settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "fastship:invalidate"
+
+
+class InvalidationBus:
+    """
+    Keeps the in-process caches of all api workers coherent. Writers call
+    publish(cache, key) after changing cached data; the handlers subscribed
+    for the cache run in every worker, the publishing one right away.
+    key None means everything.
+
+    Pub/sub is fire and forget -> after a reconnect every cache is dropped,
+    caches still need a short lifetime of their own. Start it before loading
+    the caches so nothing published meanwhile is missed.
+    """
+
+    RECONNECT_DELAY = 1  # seconds
+    # startup goes on without the bus when redis is down
+    SUBSCRIBE_TIMEOUT = 5  # seconds
+
+    def __init__(self, redis: Redis):
+        self.redis = redis
+        # messages of this process are applied when published
+        self.origin = uuid4().hex
+        self._handlers: dict[str, list[Callable[[str | None], None]]] = defaultdict(
+            list
+        )
+        self._listener: asyncio.Task | None = None
+        self._subscribed = asyncio.Event()
+
+    def subscribe(self, cache: str, handler: Callable[[str | None], None]):
+        self._handlers[cache].append(handler)
+
+    def _apply(self, cache: str, key: str | None):
+        for handler in self._handlers.get(cache, []):
+            handler(key)
+
+    def _apply_all(self):
+        for cache in self._handlers:
+            self._apply(cache, None)
+
+    async def publish(self, cache: str, key: str | None = None):
+        self._apply(cache, key)
+        try:
+            await self.redis.publish(
+                CHANNEL,
+                orjson.dumps({"origin": self.origin, "cache": cache, "key": key}),
+            )
+        except RedisError:
+            # the others catch up through their cache lifetimes
+            logger.exception("invalidation of %s %s not published", cache, key)
+
+    async def _listen(self):
+        reconnect = False
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(CHANNEL)
+                    # messages may have been missed while disconnected, the
+                    # caches loaded before the first subscribe are current
+                    if reconnect:
+                        self._apply_all()
+                    reconnect = True
+                    self._subscribed.set()
+
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        event = orjson.loads(message["data"])
+                        if event["origin"] != self.origin:
+                            self._apply(event["cache"], event["key"])
+            except RedisError:
+                logger.warning("invalidation bus disconnected, reconnecting")
+                await asyncio.sleep(self.RECONNECT_DELAY)
+
+    async def start(self):
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+        try:
+            await asyncio.wait_for(self._subscribed.wait(), self.SUBSCRIBE_TIMEOUT)
+        except TimeoutError:
+            logger.warning("invalidation bus not subscribed yet, starting anyway")
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+
+invalidation_bus = InvalidationBus(
+    Redis(host=db_settings.REDIS_HOST, port=db_settings.REDIS_PORT, db=0)
+)
@@ -1,12 +1,11 @@
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
 from typing import List
 from uuid import UUID, uuid4
 
 from pydantic import EmailStr
-from sqlalchemy import ARRAY, INTEGER, select
+from sqlalchemy import INTEGER, REAL, Index, select, text
 from sqlalchemy.dialects import postgresql
-from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import Field, SQLModel, Relationship, Column
 
 
@@ -19,6 +18,17 @@ class ShipmentStatus(str, Enum):
     cancelled = "cancelled"
 
 
+# statuses after which a shipment no longer uses partner capacity
+CLOSED_STATUSES = (ShipmentStatus.delivered, ShipmentStatus.cancelled)
+
+# open shipments without a delay email -> predicate of the overdue index,
+# repeated verbatim by the detector query so the planner can use it
+OVERDUE_CANDIDATE = (
+    "overdue_notified_at IS NULL"
+    " AND current_status NOT IN ('delivered', 'cancelled')"
+)
+
+
 class TagName(str, Enum):
     EXPRESS = "express"
     STANDARD = "standard"
@@ -31,12 +41,13 @@ class TagName(str, Enum):
     RETURN = "return"
     DOCUMENT = "document"
 
-    async def tag(self, session: AsyncSession):
-        return await session.scalar(select(Tag).where(Tag.name == self.value))
-
 
 class Tag(SQLModel, table=True):
     __tablename__ = "tag"
+    __table_args__ = (
+        # one row per name -> concurrent seeding inserts ON CONFLICT DO NOTHING
+        Index("ix_tag_name", "name", unique=True),
+    )
     id: UUID = Field(
         default_factory=uuid4,
         sa_column=Column(
@@ -59,6 +70,10 @@ class Tag(SQLModel, table=True):
 # linking table for shipment
 class ShipmentTag(SQLModel, table=True):
     __tablename__ = "shipment_tag"
+    __table_args__ = (
+        # shipments of a tag -> the primary key only covers shipment_id first
+        Index("ix_shipment_tag_tag_id_shipment_id", "tag_id", "shipment_id"),
+    )
     shipment_id: UUID = Field(
         foreign_key="shipment.id",
         primary_key=True,
@@ -71,6 +86,23 @@ class ShipmentTag(SQLModel, table=True):
 
 class Shipment(SQLModel, table=True):
     __tablename__ = "shipment"
+    __table_args__ = (
+        # keyset pagination of a seller's shipments -> (created_at, id)
+        Index("ix_shipment_seller_id_created_at", "seller_id", "created_at", "id"),
+        # partner manifest -> shipments of a partner grouped by zip
+        Index(
+            "ix_shipment_partner_id_destination", "delivery_partner_id", "destination"
+        ),
+        # overdue detector -> open shipments not notified yet, keyset on
+        # (estimated_delivery, id) per status
+        Index(
+            "ix_shipment_current_status_estimated_delivery",
+            "current_status",
+            "estimated_delivery",
+            "id",
+            postgresql_where=text(OVERDUE_CANDIDATE),
+        ),
+    )
 
     id: UUID = Field(
         default_factory=uuid4,
@@ -82,6 +114,15 @@ class Shipment(SQLModel, table=True):
     weight: float = Field(default=0.0, le=25)
     destination: int
     estimated_delivery: datetime
+    # latest timeline status, kept in sync by the event writers
+    current_status: ShipmentStatus = Field(
+        default=ShipmentStatus.placed,
+        sa_column_kwargs={"server_default": ShipmentStatus.placed.value},
+    )
+    # delay email sent for the current estimated_delivery
+    overdue_notified_at: datetime | None = Field(
+        default=None, sa_column=Column(postgresql.TIMESTAMP, nullable=True)
+    )
     client_contact_email: EmailStr
     client_contact_phone: int | None
 
@@ -92,8 +133,9 @@ class Shipment(SQLModel, table=True):
         },
     )
 
+    # lower bound of the shipment's events -> prunes shipment_event partitions
     created_at: datetime = Field(
-        sa_column=Column(postgresql.TIMESTAMP, default=datetime.now)
+        sa_column=Column(postgresql.TIMESTAMP, default=datetime.now, nullable=False)
     )
 
     seller_id: UUID = Field(foreign_key="seller.id")
@@ -135,14 +177,23 @@ class Shipment(SQLModel, table=True):
 #     shipment event model
 class ShipmentEvent(SQLModel, table=True):
     __tablename__ = "shipment_event"
+    __table_args__ = (
+        # latest event (current status) lookup per shipment
+        Index("ix_shipment_event_shipment_id_created_at", "shipment_id", "created_at"),
+        # unfiltered keyset exports
+        Index("ix_shipment_event_created_at_id", "created_at", "id"),
+        # monthly partitions -> database/partitions.py
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
     id: UUID = Field(
         default_factory=uuid4,
         sa_column=Column(
             postgresql.UUID(as_uuid=True), default=uuid4, primary_key=True
         ),
     )
+    # partition key -> part of the primary key, never before shipment.created_at
     created_at: datetime = Field(
-        sa_column=Column(postgresql.TIMESTAMP, default=datetime.now)
+        sa_column=Column(postgresql.TIMESTAMP, default=datetime.now, primary_key=True)
     )
     location: int
     status: ShipmentStatus
@@ -191,13 +242,23 @@ class Seller(User, table=True):
 
 class DeliveryPartner(User, table=True):
     __tablename__ = "delivery_partner"
+    __table_args__ = (
+        # partners serving a zip -> serviceable_zip_codes @> ARRAY[zip]
+        Index(
+            "ix_delivery_partner_serviceable_zip_codes",
+            "serviceable_zip_codes",
+            postgresql_using="gin",
+        ),
+    )
     id: UUID = Field(
         default_factory=uuid4,
         sa_column=Column(
             postgresql.UUID(as_uuid=True), default=uuid4, primary_key=True
         ),
     )
-    serviceable_zip_codes: list[int] = Field(sa_column=Column(ARRAY(INTEGER)))
+    serviceable_zip_codes: list[int] = Field(
+        sa_column=Column(postgresql.ARRAY(INTEGER))
+    )
     max_handling_capacity: int
     created_at: datetime = Field(
         sa_column=Column(postgresql.TIMESTAMP, default=datetime.now)
@@ -215,8 +276,7 @@ class DeliveryPartner(User, table=True):
         return [
             shipment
             for shipment in self.shipments
-            if shipment.timeline
-            and shipment.timeline[-1].status != ShipmentStatus.delivered
+            if shipment.timeline and shipment.timeline[-1].status not in CLOSED_STATUSES
         ]
 
     @property
@@ -226,6 +286,11 @@ class DeliveryPartner(User, table=True):
 
 class Review(SQLModel, table=True):
     __tablename__ = "review"
+    __table_args__ = (
+        Index("ix_review_shipment_id", "shipment_id"),
+        # unfiltered keyset exports
+        Index("ix_review_created_at_id", "created_at", "id"),
+    )
     id: UUID = Field(
         default_factory=uuid4,
         sa_column=Column(
@@ -247,3 +312,43 @@ class Review(SQLModel, table=True):
             "lazy": "selectin",
         },
     )
+
+
+# dashboard rollup -> services/seller_stats.py keeps it up to date
+class SellerDailyStats(SQLModel, table=True):
+    __tablename__ = "seller_daily_stats"
+    seller_id: UUID = Field(foreign_key="seller.id", primary_key=True)
+    day: date = Field(primary_key=True)
+    status: ShipmentStatus = Field(primary_key=True)
+
+    # shipments that reached / moved on from the status that day
+    entered: int = Field(default=0)
+    exited: int = Field(default=0)
+    # delivered rows only: shipment created -> delivered, reviews of the day
+    delivery_seconds: float = Field(default=0.0)
+    rating_sum: int = Field(default=0)
+    rating_count: int = Field(default=0)
+
+
+# assignment ranking per partner and zip -> services/partner_scoring.py
+class PartnerScore(SQLModel, table=True):
+    __tablename__ = "partner_score"
+    # scores of a deleted partner go with it
+    delivery_partner_id: UUID = Field(
+        foreign_key="delivery_partner.id", primary_key=True, ondelete="CASCADE"
+    )
+    zip_code: int = Field(primary_key=True)
+
+    deliveries: int
+    on_time_rate: float = Field(sa_type=REAL)
+    median_transit_hours: float = Field(sa_type=REAL)
+    rating: float | None = Field(default=None, sa_type=REAL)
+    score: float = Field(sa_type=REAL)
+
+
+# archived shipment -> parquet partition, services/archive.py reads only that
+class ArchivedShipment(SQLModel, table=True):
+    __tablename__ = "archived_shipment"
+    id: UUID = Field(primary_key=True)
+    year: int
+    month: int
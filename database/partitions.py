@@ -0,0 +1,110 @@
+import re
+from datetime import date
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+# shipment_event is range partitioned by month on created_at
+PARTITIONED_TABLE = "shipment_event"
+DEFAULT_PARTITION = f"{PARTITIONED_TABLE}_default"
+
+_PARTITION_NAME = re.compile(rf"^{PARTITIONED_TABLE}_y(\d{{4}})m(\d{{2}})$")
+
+
+def add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARTITIONED_TABLE}_y{month:%Y}m{month:%m}"
+
+
+def create_partition_sql(month: date) -> str:
+    start = month.replace(day=1)
+    end = add_months(start, 1)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(start)} "
+        f"PARTITION OF {PARTITIONED_TABLE} FOR VALUES FROM ('{start}') TO ('{end}')"
+    )
+
+
+def create_default_partition_sql() -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} "
+        f"PARTITION OF {PARTITIONED_TABLE} DEFAULT"
+    )
+
+
+async def is_partitioned(connection: AsyncConnection) -> bool:
+    # false until the partitioning migration ran on an existing database
+    result = await connection.execute(
+        text("SELECT relkind = 'p' FROM pg_class WHERE relname = :table"),
+        {"table": PARTITIONED_TABLE},
+    )
+    return bool(result.scalar())
+
+
+async def ensure_event_partitions(
+    connection: AsyncConnection, months_ahead: int = 3, today: date | None = None
+) -> list[str]:
+    """
+    Create the current and next months_ahead monthly partitions.
+    Created ahead of time so rows never land in the default partition.
+    """
+    if not await is_partitioned(connection):
+        return []
+
+    first = (today or date.today()).replace(day=1)
+    await connection.execute(text(create_default_partition_sql()))
+
+    months = [add_months(first, offset) for offset in range(months_ahead + 1)]
+    for month in months:
+        await connection.execute(text(create_partition_sql(month)))
+
+    return [partition_name(month) for month in months]
+
+
+async def drop_expired_event_partitions(
+    connection: AsyncConnection, retention_months: int, today: date | None = None
+) -> tuple[list[str], list[str]]:
+    """
+    Drop monthly partitions older than retention_months once they are empty
+    (the archive job moved their shipments out). Non-empty ones are kept.
+    Returns (dropped, kept).
+    """
+    if not await is_partitioned(connection):
+        return [], []
+
+    cutoff = add_months((today or date.today()).replace(day=1), -retention_months)
+
+    result = await connection.execute(
+        text(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = :table
+            """
+        ),
+        {"table": PARTITIONED_TABLE},
+    )
+
+    dropped, kept = [], []
+    for name in sorted(result.scalars().all()):
+        match = _PARTITION_NAME.match(name)
+        if not match or date(int(match[1]), int(match[2]), 1) >= cutoff:
+            continue
+
+        has_rows = await connection.execute(
+            text(f"SELECT EXISTS (SELECT 1 FROM {name})")
+        )
+        if has_rows.scalar():
+            kept.append(name)
+            continue
+
+        await connection.execute(text(f"DROP TABLE {name}"))
+        dropped.append(name)
+
+    return dropped, kept
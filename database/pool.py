@@ -0,0 +1,11 @@
+def worker_pool_size(
+    max_connections: int, workers: int, hosts: int = 1, reserved: int = 0
+) -> tuple[int, int]:
+    """
+    (pool_size, max_overflow) per api worker -> all workers of all hosts at
+    their overflow limit stay within max_connections minus reserved
+    """
+    per_worker = max(1, (max_connections - reserved) // (workers * hosts))
+    # half kept open, half opened under load
+    pool_size = (per_worker + 1) // 2
+    return pool_size, per_worker - pool_size
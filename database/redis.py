@@ -1,8 +1,14 @@
+import json
+import secrets
 import time
 
+import orjson
+
 from redis.asyncio import Redis
 
-from config import db_settings
+from config import app_settings, db_settings
+from core.metrics import REDIS_LATENCY
+from database.invalidation import invalidation_bus
 
 _token_blacklist = Redis(
     host=db_settings.REDIS_HOST,
@@ -11,6 +17,30 @@ _token_blacklist = Redis(
     decode_responses=True,  # return strings instead of bytes
 )
 
+# idempotent responses and single flight results
+_request_store = Redis(
+    host=db_settings.REDIS_HOST,
+    port=db_settings.REDIS_PORT,
+    db=1,
+    decode_responses=True,
+)
+
+
+# jti -> when redis last said it is not blacklisted, logouts drop it in
+# every worker through the invalidation bus
+_not_blacklisted: dict[str, float] = {}
+_NOT_BLACKLISTED_MAX = 100_000
+
+
+def _forget_tokens(jti: str | None):
+    if jti is None:
+        _not_blacklisted.clear()
+    else:
+        _not_blacklisted.pop(jti, None)
+
+
+invalidation_bus.subscribe("tokens", _forget_tokens)
+
 
 async def add_jti_to_blacklist(jti: str, exp: int):
     # Calculate remaining lifetime of the token
@@ -20,8 +50,113 @@ async def add_jti_to_blacklist(jti: str, exp: int):
     if ttl <= 0:
         return  # token already expired
 
-    await _token_blacklist.set(jti, "blacklisted")
+    with REDIS_LATENCY.labels("blacklist_add").time():
+        await _token_blacklist.set(jti, "blacklisted")
+    await invalidation_bus.publish("tokens", jti)
 
 
 async def is_jti_blacklisted(jti: str) -> bool:
-    return await _token_blacklist.exists(jti)
+    checked_at = _not_blacklisted.get(jti)
+    if (
+        checked_at is not None
+        and time.monotonic() - checked_at < app_settings.TOKEN_CACHE_TTL
+    ):
+        return False
+
+    with REDIS_LATENCY.labels("blacklist_exists").time():
+        blacklisted = await _token_blacklist.exists(jti)
+
+    if not blacklisted:
+        if len(_not_blacklisted) >= _NOT_BLACKLISTED_MAX:
+            _not_blacklisted.clear()
+        _not_blacklisted[jti] = time.monotonic()
+    return blacklisted
+
+
+# released only by the holder -> a lock that expired and was taken over
+# is not deleted by the late first holder
+_release_lock = _request_store.register_script(
+    """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('del', KEYS[1])
+    end
+    return 0
+    """
+)
+
+
+# keeps a lock alive while its holder is still running
+_extend_lock = _request_store.register_script(
+    """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('expire', KEYS[1], ARGV[2])
+    end
+    return 0
+    """
+)
+
+
+async def _acquire_lock(name: str, ttl: int) -> str | None:
+    token = secrets.token_hex(16)
+    if await _request_store.set(name, token, nx=True, ex=ttl):
+        return token
+    return None
+
+
+async def get_idempotency_record(key: str) -> dict | None:
+    with REDIS_LATENCY.labels("idempotency_get").time():
+        record = await _request_store.get(f"idempotency:{key}")
+    return json.loads(record) if record else None
+
+
+async def set_idempotency_record(key: str, record: dict, ttl: int):
+    with REDIS_LATENCY.labels("idempotency_set").time():
+        await _request_store.set(f"idempotency:{key}", json.dumps(record), ex=ttl)
+
+
+# only one request per key runs at a time -> token of the lock, None when
+# already held
+async def acquire_idempotency_lock(key: str, ttl: int) -> str | None:
+    with REDIS_LATENCY.labels("idempotency_lock").time():
+        return await _acquire_lock(f"idempotency-lock:{key}", ttl)
+
+
+# False when the lock expired and may be held by another request
+async def extend_idempotency_lock(key: str, token: str, ttl: int) -> bool:
+    return bool(await _extend_lock(keys=[f"idempotency-lock:{key}"], args=[token, ttl]))
+
+
+async def release_idempotency_lock(key: str, token: str):
+    await _release_lock(keys=[f"idempotency-lock:{key}"], args=[token])
+
+
+async def get_flight_result(key: str) -> dict | None:
+    record = await _request_store.get(f"flight:{key}")
+    return orjson.loads(record) if record else None
+
+
+async def set_flight_result(key: str, record: dict, ttl: int):
+    # orjson -> uuids, datetimes and enums encoded as in the responses
+    await _request_store.set(f"flight:{key}", orjson.dumps(record), ex=ttl)
+
+
+# sequence of the finished loads of a key, outlives their results
+FLIGHT_SEQUENCE_TTL = 24 * 60 * 60  # seconds
+
+
+async def next_flight_sequence(key: str) -> int:
+    async with _request_store.pipeline() as pipe:
+        pipe.incr(f"flight-seq:{key}")
+        pipe.expire(f"flight-seq:{key}", FLIGHT_SEQUENCE_TTL)
+        sequence, _ = await pipe.execute()
+    return sequence
+
+
+# token of the lock -> None when already held
+async def acquire_flight_lock(key: str, ttl: int) -> str | None:
+    with REDIS_LATENCY.labels("flight_lock").time():
+        return await _acquire_lock(f"flight-lock:{key}", ttl)
+
+
+async def release_flight_lock(key: str, token: str):
+    await _release_lock(keys=[f"flight-lock:{key}"], args=[token])
@@ -1,8 +1,12 @@
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from sqlmodel import SQLModel
 
 from config import db_settings
+from core.instrumentation import instrument_engine
+from core.metrics import MeteredQueuePool
+from database.partitions import ensure_event_partitions
 
 
 # sqlite
@@ -10,16 +14,32 @@ from config import db_settings
 #     url="sqlite:///data.db", echo=True, connect_args={"check_same_thread": False}
 # )
 
-engine = create_async_engine(url=db_settings.POSTGRES_URL, echo=True)
+engine = create_async_engine(
+    url=db_settings.POSTGRES_URL,
+    echo=db_settings.DB_ECHO,
+    poolclass=MeteredQueuePool,  # checkout / wait metrics
+    # per worker -> sized from max_connections by gunicorn.conf.py
+    pool_size=db_settings.DB_POOL_SIZE,
+    max_overflow=db_settings.DB_MAX_OVERFLOW,
+)
+
+# per request statement count, db time and rows -> core/instrumentation.py
+instrument_engine(engine.sync_engine)
 
 
 async def create_db_tables():
     async with engine.begin() as conn:
+        # every api worker runs this on startup -> one at a time
+        await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": 1})
+
         # creating tables for db
         from database.models import Shipment, Seller
 
         await conn.run_sync(SQLModel.metadata.create_all)
 
+        # shipment_event monthly partitions for the coming months
+        await ensure_event_partitions(conn)
+
 
 async_session = sessionmaker(
     bind=engine,
@@ -0,0 +1,111 @@
+import asyncio
+from dataclasses import dataclass
+from uuid import UUID, uuid4
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import select
+
+from database.invalidation import invalidation_bus
+from database.models import Tag, TagName
+from database.session import async_session
+
+# instructions of tags missing from the database
+TAG_INSTRUCTIONS = {
+    TagName.EXPRESS: "Deliver with priority",
+    TagName.STANDARD: "Regular delivery",
+    TagName.FRAGILE: "Handle with care",
+    TagName.HEAVY: "Two person lift",
+    TagName.INTERNATIONAL: "Customs documents required",
+    TagName.DOMESTIC: "Domestic delivery",
+    TagName.TEMPERATURE_CONTROLLED: "Keep refrigerated",
+    TagName.GIFT: "Gift wrapped, hide the invoice",
+    TagName.RETURN: "Return to seller",
+    TagName.DOCUMENT: "Keep flat and dry",
+}
+
+
+@dataclass(frozen=True)
+class TagEntry:
+    id: UUID
+    name: TagName
+    instruction: str
+
+
+class TagRegistry:
+    """
+    Tag rows kept in memory. Tags are a fixed enum -> loaded once, missing
+    ones are seeded. After changing the tag table publish a "tags"
+    invalidation -> every worker reloads them on the next access.
+    Loads run on their own session, a reload in the middle of a request
+    never commits the request's transaction.
+    """
+
+    def __init__(self):
+        self._by_name: dict[TagName, TagEntry] = {}
+        self._by_id: dict[UUID, TagEntry] = {}
+        self._lock = asyncio.Lock()
+
+    async def _load(self):
+        async with async_session() as session:
+            tags = {tag.name: tag for tag in (await session.scalars(select(Tag))).all()}
+
+            missing = [name for name in TagName if name not in tags]
+            if missing:
+                # other workers may seed them at the same time -> theirs win
+                await session.execute(
+                    insert(Tag)
+                    .values(
+                        [
+                            {
+                                "id": uuid4(),
+                                "name": name,
+                                "instruction": TAG_INSTRUCTIONS[name],
+                            }
+                            for name in missing
+                        ]
+                    )
+                    .on_conflict_do_nothing(index_elements=["name"])
+                )
+                await session.commit()
+                tags = {
+                    tag.name: tag for tag in (await session.scalars(select(Tag))).all()
+                }
+
+        entries = [
+            TagEntry(id=tag.id, name=tag.name, instruction=tag.instruction)
+            for tag in tags.values()
+        ]
+        self._by_name = {entry.name: entry for entry in entries}
+        self._by_id = {entry.id: entry for entry in entries}
+
+    async def load(self):
+        async with self._lock:
+            await self._load()
+
+    async def _ensure(self):
+        if self._by_name:
+            return
+        async with self._lock:
+            # loaded while waiting for the lock
+            if not self._by_name:
+                await self._load()
+
+    def invalidate(self):
+        self._by_name, self._by_id = {}, {}
+
+    async def get(self, name: TagName) -> TagEntry:
+        await self._ensure()
+        return self._by_name[name]
+
+    async def by_id(self, id: UUID) -> TagEntry:
+        await self._ensure()
+        if id not in self._by_id:
+            # added after the load -> reloaded once
+            async with self._lock:
+                if id not in self._by_id:
+                    await self._load()
+        return self._by_id[id]
+
+
+tag_registry = TagRegistry()
+invalidation_bus.subscribe("tags", lambda key: tag_registry.invalidate())
@@ -0,0 +1,88 @@
+"""
+Multi worker api server, one uvicorn worker per core.
+
+    gunicorn main:app -c gunicorn.conf.py
+
+WEB_CONCURRENCY overrides the number of workers. The db pool of every worker
+is sized from the server's max_connections unless DB_POOL_SIZE is set.
+"""
+
+import asyncio
+import os
+import shutil
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", os.process_cpu_count() or 1))
+worker_class = "uvicorn_worker.UvicornWorker"
+graceful_timeout = 30
+keepalive = 5
+
+
+async def _max_connections(url: str) -> int:
+    # own engine -> nothing pooled is inherited by the forked workers
+    engine = create_async_engine(url, poolclass=NullPool)
+    try:
+        async with engine.connect() as conn:
+            return int(await conn.scalar(text("SHOW max_connections")))
+    finally:
+        await engine.dispose()
+
+
+def _size_pools(server):
+    # the app directory is only on sys.path once gunicorn started
+    from config import db_settings
+    from database.pool import worker_pool_size
+
+    # set explicitly
+    if {"DB_POOL_SIZE", "DB_MAX_OVERFLOW"} & db_settings.model_fields_set:
+        return
+
+    try:
+        max_connections = asyncio.run(_max_connections(db_settings.POSTGRES_URL))
+    except Exception:
+        server.log.exception(
+            "max_connections not read, pool of %s + %s per worker",
+            db_settings.DB_POOL_SIZE,
+            db_settings.DB_MAX_OVERFLOW,
+        )
+        return
+
+    pool_size, max_overflow = worker_pool_size(
+        max_connections,
+        server.cfg.workers,
+        hosts=db_settings.API_HOSTS,
+        reserved=db_settings.DB_RESERVED_CONNECTIONS,
+    )
+    # workers are forked after this and create their engine on import of
+    # database.session
+    db_settings.DB_POOL_SIZE = pool_size
+    db_settings.DB_MAX_OVERFLOW = max_overflow
+
+    server.log.info(
+        "max_connections %s, %s workers -> pool of %s + %s per worker",
+        max_connections,
+        server.cfg.workers,
+        pool_size,
+        max_overflow,
+    )
+
+
+def on_starting(server):
+    # metric files of a previous run would be summed up with the new ones
+    if directory := os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        shutil.rmtree(directory, ignore_errors=True)
+        Path(directory).mkdir(parents=True)
+
+    _size_pools(server)
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -7,8 +7,15 @@ from fastapi import FastAPI, BackgroundTasks
 from starlette.middleware.cors import CORSMiddleware
 
 from api.router import master_router
+from config import app_settings, db_settings, security_settings
 from core.exceptions import add_exception_handlers
-from database.session import create_db_tables
+from core.instrumentation import QueryStatsMiddleware
+from core.metrics import MetricsMiddleware, metrics_response
+from core.profiling import ProfilerMiddleware
+from database.invalidation import invalidation_bus
+from database.session import async_session, create_db_tables
+from database.tags import tag_registry
+from services.eta import eta_engine
 from services.notification import NotificationService
 
 
@@ -16,7 +23,15 @@ from services.notification import NotificationService
 async def lifespan_handler(app: FastAPI):
     print(panel.Panel("server started", border_style="green"))
     await create_db_tables()
+    # cache invalidations published by the other workers
+    await invalidation_bus.start()
+    # tag name -> id map, seeds missing tags
+    await tag_registry.load()
+    async with async_session() as session:
+        # transit time quantiles for estimated_delivery
+        await eta_engine.load(session)
     yield
+    await invalidation_bus.stop()
     print(panel.Panel("server stopped", border_style="red"))
 
 
@@ -26,6 +41,7 @@ app = FastAPI(
     docs_url=None,  # disables auto generated docs
     redoc_url=None,  # disables auto generated redocs
     version="0.1.0",
+    lifespan=lifespan_handler,
 )
 
 
@@ -36,6 +52,24 @@ app.add_middleware(
     allow_methods=["*"],
 )
 
+# QUERY COUNT / DB TIME MIDDLEWARE
+app.add_middleware(
+    QueryStatsMiddleware,
+    default_budget=db_settings.QUERY_BUDGET,
+    strict=db_settings.QUERY_BUDGET_STRICT,
+)
+
+
+# REQUEST LATENCY METRICS MIDDLEWARE
+app.add_middleware(MetricsMiddleware)
+
+# ON DEMAND PROFILER -> admin only
+app.add_middleware(
+    ProfilerMiddleware,
+    admin_key=security_settings.ADMIN_API_KEY,
+    directory=app_settings.PROFILE_DIR,
+)
+
 
 # router for all endpoints
 app.include_router(master_router)
@@ -50,6 +84,12 @@ async def root():
     return {"message": "Server is running...."}
 
 
+# prometheus metrics
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return metrics_response()
+
+
 # @app.get("/mail")
 # async def send_test_mail(tasks: BackgroundTasks):
 #     tasks.add_task(
@@ -0,0 +1,122 @@
+"""partition shipment_event by month
+
+Revision ID: 083a80af8880
+Revises: 7bf3a4d00990
+Create Date: 2026-10-18 23:32:10.000000
+
+"""
+
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from database.partitions import (
+    add_months,
+    create_default_partition_sql,
+    create_partition_sql,
+)
+
+# revision identifiers, used by Alembic.
+revision: str = "083a80af8880"
+down_revision: Union[str, Sequence[str], None] = "7bf3a4d00990"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# partitions created ahead of the current month
+MONTHS_AHEAD = 3
+
+COLUMNS = "id, created_at, location, status, description, shipment_id"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("ALTER TABLE shipment_event RENAME TO shipment_event_old")
+    op.execute(
+        "ALTER TABLE shipment_event_old "
+        "RENAME CONSTRAINT shipment_event_pkey TO shipment_event_old_pkey"
+    )
+    op.execute("DROP INDEX IF EXISTS ix_shipment_event_shipment_id_created_at")
+
+    # the partition key has to be part of the primary key
+    op.execute(
+        """
+        CREATE TABLE shipment_event (
+            id UUID NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            location INTEGER NOT NULL,
+            status shipmentstatus NOT NULL,
+            description VARCHAR,
+            shipment_id UUID NOT NULL REFERENCES shipment (id),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    op.create_index(
+        "ix_shipment_event_shipment_id_created_at",
+        "shipment_event",
+        ["shipment_id", "created_at"],
+    )
+
+    # one partition per month from the oldest event up to MONTHS_AHEAD
+    oldest = (
+        op.get_bind()
+        .execute(sa.text("SELECT min(created_at) FROM shipment_event_old"))
+        .scalar()
+    )
+    current = date.today().replace(day=1)
+    month = oldest.date().replace(day=1) if oldest else current
+
+    op.execute(create_default_partition_sql())
+    while month <= add_months(current, MONTHS_AHEAD):
+        op.execute(create_partition_sql(month))
+        month = add_months(month, 1)
+
+    op.execute(
+        f"""
+        INSERT INTO shipment_event ({COLUMNS})
+        SELECT id, COALESCE(created_at, now()), location, status, description,
+               shipment_id
+        FROM shipment_event_old
+        """
+    )
+    op.execute("DROP TABLE shipment_event_old")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE shipment_event RENAME TO shipment_event_partitioned")
+    op.execute(
+        "ALTER TABLE shipment_event_partitioned "
+        "RENAME CONSTRAINT shipment_event_pkey TO shipment_event_partitioned_pkey"
+    )
+    op.execute("DROP INDEX IF EXISTS ix_shipment_event_shipment_id_created_at")
+
+    op.execute(
+        """
+        CREATE TABLE shipment_event (
+            id UUID NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE,
+            location INTEGER NOT NULL,
+            status shipmentstatus NOT NULL,
+            description VARCHAR,
+            shipment_id UUID NOT NULL REFERENCES shipment (id),
+            CONSTRAINT shipment_event_pkey PRIMARY KEY (id)
+        )
+        """
+    )
+    op.execute(
+        f"""
+        INSERT INTO shipment_event ({COLUMNS})
+        SELECT {COLUMNS} FROM shipment_event_partitioned
+        """
+    )
+    # dropping the parent drops every partition
+    op.execute("DROP TABLE shipment_event_partitioned")
+
+    op.create_index(
+        "ix_shipment_event_shipment_id_created_at",
+        "shipment_event",
+        ["shipment_id", "created_at"],
+    )
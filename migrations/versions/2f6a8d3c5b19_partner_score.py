@@ -0,0 +1,44 @@
+"""partner score
+
+Revision ID: 2f6a8d3c5b19
+Revises: 9c1e4b7d2a63
+Create Date: 2026-10-19 14:05:37.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "2f6a8d3c5b19"
+down_revision: Union[str, Sequence[str], None] = "9c1e4b7d2a63"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "partner_score",
+        sa.Column(
+            "delivery_partner_id",
+            sa.Uuid(),
+            sa.ForeignKey("delivery_partner.id"),
+            nullable=False,
+        ),
+        sa.Column("zip_code", sa.Integer(), nullable=False),
+        sa.Column("deliveries", sa.Integer(), nullable=False),
+        sa.Column("on_time_rate", sa.REAL(), nullable=False),
+        sa.Column("median_transit_hours", sa.REAL(), nullable=False),
+        sa.Column("rating", sa.REAL(), nullable=True),
+        sa.Column("score", sa.REAL(), nullable=False),
+        sa.PrimaryKeyConstraint("delivery_partner_id", "zip_code"),
+    )
+    # filled with: python -m commands.partner_scores
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("partner_score")
@@ -0,0 +1,35 @@
+"""archived shipment index
+
+Revision ID: 3a7f5c2e9b14
+Revises: 8e4c1a7b3d25
+Create Date: 2026-10-20 10:02:47.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "3a7f5c2e9b14"
+down_revision: Union[str, Sequence[str], None] = "8e4c1a7b3d25"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # existing archives -> python -m commands.archive --reindex
+    op.create_table(
+        "archived_shipment",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("year", sa.Integer(), nullable=False),
+        sa.Column("month", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("archived_shipment")
@@ -0,0 +1,58 @@
+"""hot query indexes
+
+Revision ID: 5d2e8c9a1f47
+Revises: 083a80af8880
+Create Date: 2026-10-19 00:12:40.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "5d2e8c9a1f47"
+down_revision: Union[str, Sequence[str], None] = "083a80af8880"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # partner lookup by zip -> serviceable_zip_codes @> ARRAY[zip]
+    op.create_index(
+        "ix_delivery_partner_serviceable_zip_codes",
+        "delivery_partner",
+        ["serviceable_zip_codes"],
+        postgresql_using="gin",
+        if_not_exists=True,
+    )
+    # shipments of a tag
+    op.create_index(
+        "ix_shipment_tag_tag_id_shipment_id",
+        "shipment_tag",
+        ["tag_id", "shipment_id"],
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_review_shipment_id",
+        "review",
+        ["shipment_id"],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_review_shipment_id", table_name="review", if_exists=True)
+    op.drop_index(
+        "ix_shipment_tag_tag_id_shipment_id",
+        table_name="shipment_tag",
+        if_exists=True,
+    )
+    op.drop_index(
+        "ix_delivery_partner_serviceable_zip_codes",
+        table_name="delivery_partner",
+        if_exists=True,
+    )
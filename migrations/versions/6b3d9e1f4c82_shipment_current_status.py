@@ -0,0 +1,71 @@
+"""shipment current status and overdue index
+
+Revision ID: 6b3d9e1f4c82
+Revises: 2f6a8d3c5b19
+Create Date: 2026-10-19 18:22:04.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "6b3d9e1f4c82"
+down_revision: Union[str, Sequence[str], None] = "2f6a8d3c5b19"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "shipment",
+        sa.Column(
+            "current_status",
+            postgresql.ENUM(name="shipmentstatus", create_type=False),
+            nullable=False,
+            server_default="placed",
+        ),
+    )
+    op.add_column(
+        "shipment",
+        sa.Column("overdue_notified_at", postgresql.TIMESTAMP(), nullable=True),
+    )
+    # latest timeline status of the existing shipments
+    op.execute(
+        """
+        UPDATE shipment s
+        SET current_status = latest.status
+        FROM (
+            SELECT DISTINCT ON (se.shipment_id) se.shipment_id, se.status
+            FROM shipment_event se
+            ORDER BY se.shipment_id, se.created_at DESC
+        ) latest
+        WHERE latest.shipment_id = s.id
+        """
+    )
+    # open shipments without a delay email -> models.OVERDUE_CANDIDATE
+    op.create_index(
+        "ix_shipment_current_status_estimated_delivery",
+        "shipment",
+        ["current_status", "estimated_delivery", "id"],
+        postgresql_where=sa.text(
+            "overdue_notified_at IS NULL"
+            " AND current_status NOT IN ('delivered', 'cancelled')"
+        ),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_shipment_current_status_estimated_delivery",
+        table_name="shipment",
+        if_exists=True,
+    )
+    op.drop_column("shipment", "overdue_notified_at")
+    op.drop_column("shipment", "current_status")
@@ -0,0 +1,37 @@
+"""shipment partner destination index
+
+Revision ID: 7bf3a4d00990
+Revises: c4145bb41135
+Create Date: 2026-10-18 22:41:05.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "7bf3a4d00990"
+down_revision: Union[str, Sequence[str], None] = "c4145bb41135"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_shipment_partner_id_destination",
+        "shipment",
+        ["delivery_partner_id", "destination"],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_shipment_partner_id_destination",
+        table_name="shipment",
+        if_exists=True,
+    )
@@ -0,0 +1,45 @@
+"""export keyset indexes
+
+Revision ID: 8e4c1a7b3d25
+Revises: 6b3d9e1f4c82
+Create Date: 2026-10-20 09:14:31.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "8e4c1a7b3d25"
+down_revision: Union[str, Sequence[str], None] = "6b3d9e1f4c82"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # unfiltered exports -> ORDER BY created_at, id
+    op.create_index(
+        "ix_shipment_event_created_at_id",
+        "shipment_event",
+        ["created_at", "id"],
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_review_created_at_id",
+        "review",
+        ["created_at", "id"],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_review_created_at_id", table_name="review", if_exists=True)
+    op.drop_index(
+        "ix_shipment_event_created_at_id",
+        table_name="shipment_event",
+        if_exists=True,
+    )
@@ -0,0 +1,45 @@
+"""seller daily stats rollup
+
+Revision ID: 9c1e4b7d2a63
+Revises: 5d2e8c9a1f47
+Create Date: 2026-10-19 09:41:12.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "9c1e4b7d2a63"
+down_revision: Union[str, Sequence[str], None] = "5d2e8c9a1f47"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "seller_daily_stats",
+        sa.Column("seller_id", sa.Uuid(), sa.ForeignKey("seller.id"), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column(
+            "status",
+            postgresql.ENUM(name="shipmentstatus", create_type=False),
+            nullable=False,
+        ),
+        sa.Column("entered", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("exited", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("delivery_seconds", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("rating_sum", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("rating_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.PrimaryKeyConstraint("seller_id", "day", "status"),
+    )
+    # filled with: python -m commands.seller_stats
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("seller_daily_stats")
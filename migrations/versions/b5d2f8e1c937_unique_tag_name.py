@@ -0,0 +1,51 @@
+"""unique tag name
+
+Revision ID: b5d2f8e1c937
+Revises: 3a7f5c2e9b14
+Create Date: 2026-10-20 11:41:09.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "b5d2f8e1c937"
+down_revision: Union[str, Sequence[str], None] = "3a7f5c2e9b14"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# duplicate tags seeded by concurrent workers -> the first id per name stays
+_DUPLICATES = """
+    SELECT tag.id, kept.id AS kept_id
+    FROM tag
+    JOIN (SELECT DISTINCT ON (name) id, name FROM tag ORDER BY name, id) kept
+        ON kept.name = tag.name
+    WHERE tag.id <> kept.id
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        f"""
+        INSERT INTO shipment_tag (shipment_id, tag_id)
+        SELECT DISTINCT shipment_tag.shipment_id, duplicate.kept_id
+        FROM shipment_tag
+        JOIN ({_DUPLICATES}) duplicate ON duplicate.id = shipment_tag.tag_id
+        ON CONFLICT DO NOTHING
+        """
+    )
+    op.execute(
+        f"DELETE FROM shipment_tag WHERE tag_id IN (SELECT id FROM ({_DUPLICATES}) d)"
+    )
+    op.execute(f"DELETE FROM tag WHERE id IN (SELECT id FROM ({_DUPLICATES}) d)")
+
+    op.create_index("ix_tag_name", "tag", ["name"], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_tag_name", table_name="tag")
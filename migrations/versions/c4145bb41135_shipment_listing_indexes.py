@@ -0,0 +1,49 @@
+"""shipment listing indexes
+
+Revision ID: c4145bb41135
+Revises:
+Create Date: 2026-10-18 22:19:48.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "c4145bb41135"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # tables may already exist from create_db_tables() -> only add what is missing
+    op.create_index(
+        "ix_shipment_seller_id_created_at",
+        "shipment",
+        ["seller_id", "created_at", "id"],
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_shipment_event_shipment_id_created_at",
+        "shipment_event",
+        ["shipment_id", "created_at"],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_shipment_event_shipment_id_created_at",
+        table_name="shipment_event",
+        if_exists=True,
+    )
+    op.drop_index(
+        "ix_shipment_seller_id_created_at",
+        table_name="shipment",
+        if_exists=True,
+    )
@@ -0,0 +1,45 @@
+"""shipment created_at not null
+
+Revision ID: d8a3f6b2c514
+Revises: b5d2f8e1c937
+Create Date: 2026-10-20 14:02:37.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "d8a3f6b2c514"
+down_revision: Union[str, Sequence[str], None] = "b5d2f8e1c937"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # event lookups filter on created_at >= shipment.created_at -> a missing
+    # value takes the first event's time so the timeline stays visible
+    op.execute(
+        """
+        UPDATE shipment
+        SET created_at = COALESCE(
+            (SELECT min(created_at) FROM shipment_event
+             WHERE shipment_event.shipment_id = shipment.id),
+            now()
+        )
+        WHERE created_at IS NULL
+        """
+    )
+    op.alter_column(
+        "shipment", "created_at", existing_type=sa.TIMESTAMP(), nullable=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column(
+        "shipment", "created_at", existing_type=sa.TIMESTAMP(), nullable=True
+    )
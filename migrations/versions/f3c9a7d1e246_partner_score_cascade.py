@@ -0,0 +1,46 @@
+"""partner score cascade
+
+Revision ID: f3c9a7d1e246
+Revises: d8a3f6b2c514
+Create Date: 2026-10-20 15:18:52.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "f3c9a7d1e246"
+down_revision: Union[str, Sequence[str], None] = "d8a3f6b2c514"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# postgres' name for the unnamed foreign key of 2f6a8d3c5b19
+_FOREIGN_KEY = "partner_score_delivery_partner_id_fkey"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_constraint(_FOREIGN_KEY, "partner_score", type_="foreignkey")
+    op.create_foreign_key(
+        _FOREIGN_KEY,
+        "partner_score",
+        "delivery_partner",
+        ["delivery_partner_id"],
+        ["id"],
+        ondelete="CASCADE",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint(_FOREIGN_KEY, "partner_score", type_="foreignkey")
+    op.create_foreign_key(
+        _FOREIGN_KEY,
+        "partner_score",
+        "delivery_partner",
+        ["delivery_partner_id"],
+        ["id"],
+    )
@@ -1,21 +1,31 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import csv
+import io
+
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
 
 from api.dependencies import (
     get_partner_access_token,
+    verify_admin_key,
+    BulkImportServiceDep,
     DeliveryPartnerDep,
     DeliveryPartnerServiceDep,
+    RoutePlannerServiceDep,
 )
+from api.schemas.bulk_import import ImportReport
 from api.schemas.delivery_partner import (
     DeliveryPartnerCreate,
     DeliveryPartnerRead,
     DeliveryPartnerUpdate,
+    RoutePlan,
 )
 
 from database.models import DeliveryPartner
 from database.redis import add_jti_to_blacklist
+from utils.streaming import ndjson_lines
 
 router = APIRouter(
     prefix="/partner",
@@ -30,6 +40,17 @@ async def register_delivery_partner(
     return await service.add(seller)
 
 
+# bulk register partners from a csv upload, zip codes are ";" separated
+@router.post(
+    "/import",
+    response_model=ImportReport,
+    dependencies=[Depends(verify_admin_key)],
+)
+async def import_delivery_partners(file: UploadFile, service: BulkImportServiceDep):
+    rows = csv.DictReader(io.TextIOWrapper(file.file, encoding="utf-8"))
+    return await service.import_partners(rows)
+
+
 # login delivery partner -> returns token
 @router.post("/login")
 async def login_delivery_partner(
@@ -75,6 +96,29 @@ async def update_delivery_partner(
     return await service.update(partner_from_service_session)
 
 
+# active shipments of logged in partner -> one ndjson line per destination zip
+@router.get("/manifest", response_class=StreamingResponse)
+async def get_partner_manifest(
+    partner: DeliveryPartnerDep,
+    service: DeliveryPartnerServiceDep,
+):
+    return StreamingResponse(
+        ndjson_lines(service.stream_manifest(partner.id)),
+        media_type="application/x-ndjson",
+    )
+
+
+# visiting order of the out for delivery shipments, start defaults to the
+# zip most of them were scanned at
+@router.get("/route", response_model=RoutePlan)
+async def get_partner_route(
+    partner: DeliveryPartnerDep,
+    service: RoutePlannerServiceDep,
+    start: int | None = None,
+):
+    return await service.plan(partner.id, start)
+
+
 # verify delivery partner email
 @router.get("/verify")
 async def verify_partner_email(token: str, service: DeliveryPartnerServiceDep):
@@ -0,0 +1,58 @@
+from datetime import datetime
+from uuid import UUID
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+
+from api.dependencies import ExportServiceDep, verify_admin_key
+from core.exceptions import InvalidCursor
+from services.export import ExportEntity, ExportFormat, export_fieldnames
+from utils.pagination import decode_cursor
+from utils.streaming import csv_lines, ndjson_lines
+
+router = APIRouter(
+    prefix="/export",
+    tags=["export"],
+    dependencies=[Depends(verify_admin_key)],
+)
+
+
+# stream shipments, events or reviews -> resume with the last row's cursor
+@router.get("/{entity}", response_class=StreamingResponse)
+async def export_entity(
+    entity: ExportEntity,
+    service: ExportServiceDep,
+    format: ExportFormat = ExportFormat.csv,
+    seller_id: UUID | None = None,
+    partner_id: UUID | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    cursor: str | None = None,
+):
+    # before the response starts -> a bad cursor is a 400, not a broken stream
+    after = None
+    if cursor:
+        after = decode_cursor(cursor)
+        if after is None:
+            raise InvalidCursor()
+
+    rows = service.rows(
+        entity,
+        seller_id=seller_id,
+        partner_id=partner_id,
+        start=start,
+        end=end,
+        after=after,
+    )
+
+    if format == ExportFormat.csv:
+        return StreamingResponse(
+            csv_lines(export_fieldnames(entity), rows),
+            media_type="text/csv",
+            headers={"Content-Disposition": f"attachment; filename={entity.value}.csv"},
+        )
+
+    return StreamingResponse(
+        ndjson_lines(rows),
+        media_type="application/x-ndjson",
+    )
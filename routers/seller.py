@@ -1,16 +1,26 @@
+from datetime import date
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Request, Form
+from fastapi import APIRouter, Depends, Request, Form, Query
 from fastapi.security import OAuth2PasswordRequestForm
 from pydantic import EmailStr
 from starlette.templating import Jinja2Templates
 
-from api.dependencies import SellerServiceDep, get_seller_access_token
-from api.schemas.seller_schema import SellerCreate, SellerRead
+from api.dependencies import (
+    SellerServiceDep,
+    get_seller_access_token,
+    SellerDep,
+    SellerStatsServiceDep,
+    ShipmentServiceDep,
+)
+from api.schemas.schema import ShipmentPage
+from api.schemas.seller_schema import SellerCreate, SellerRead, SellerStats
 from config import app_settings
 
+from database.models import ShipmentStatus, TagName
 from database.redis import add_jti_to_blacklist
 from utils.libs import TEMPLATE_DIR
+from utils.pagination import split_csv
 
 router = APIRouter(
     prefix="/seller",
@@ -99,6 +109,48 @@ async def logout_seller(token_data: Annotated[dict, Depends(get_seller_access_to
     }
 
 
+# list logged in seller shipments -> keyset paginated on (created_at, id)
+@router.get(
+    "/shipments", response_model=ShipmentPage, response_model_exclude_unset=True
+)
+async def list_seller_shipments(
+    seller: SellerDep,
+    service: ShipmentServiceDep,
+    cursor: str | None = None,
+    limit: int = Query(default=50, ge=1, le=200),
+    status: ShipmentStatus | None = None,
+    tag_name: TagName | None = None,
+    destination: int | None = None,
+    fields: str | None = Query(
+        default=None, description="comma separated fields, e.g. id,status"
+    ),
+    embed: str | None = Query(
+        default=None, description="comma separated: timeline,tags,seller"
+    ),
+):
+    return await service.list_for_seller(
+        seller.id,
+        limit=limit,
+        cursor=cursor,
+        shipment_status=status,
+        tag_name=tag_name,
+        destination=destination,
+        fields=split_csv(fields),
+        embed=split_csv(embed),
+    )
+
+
+# dashboard aggregates of the logged in seller -> read from the daily rollup
+@router.get("/stats", response_model=SellerStats)
+async def seller_stats(
+    seller: SellerDep,
+    service: SellerStatsServiceDep,
+    start: date | None = None,
+    end: date | None = None,
+):
+    return await service.get(seller.id, start, end)
+
+
 # @router.get("/dashboard", response_model=SellerRead)
 # async def dashboard(token: Annotated[str, Depends(oauth_scheme)], session: sessionDep):
 #
@@ -1,26 +1,44 @@
+import csv
+import io
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, status, Form, Query
-from fastapi.responses import HTMLResponse
+from fastapi import APIRouter, HTTPException, status, Form, Header, Query, UploadFile
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from jinja2 import Environment, FileSystemLoader
-from sqlalchemy import select
 from starlette.templating import Jinja2Templates
 
 from api.dependencies import (
+    BulkImportServiceDep,
+    IdempotencyServiceDep,
     ShipmentServiceDep,
     SellerDep,
     DeliveryPartnerDep,
-    sessionDep,
+    get_shipment_service,
 )
+from api.schemas.bulk_import import ImportReport
+from api.serializers import shipment_payload, shipment_response
 from api.schemas.schema import (
     ShipmentRead,
     ShipmentCreate,
+    ShipmentCancelBatch,
+    ShipmentCancelBatchResult,
+    ShipmentDeleteBatch,
+    ShipmentDeleteBatchResult,
+    ShipmentTagBatch,
+    ShipmentTagBatchResult,
     ShipmentUpdate,
 )
 from config import app_settings
 from core.exceptions import EntityNotFound
-from database.models import TagName, Tag, Shipment, ShipmentTag
+from core.instrumentation import query_budget
+from database.models import TagName
+from database.session import async_session
+from services.shipment import EMBEDS, READ_FIELDS, ShipmentService
 from utils.libs import TEMPLATE_DIR
+from utils.pagination import split_csv
+from utils.single_flight import SingleFlight
 
 router = APIRouter(
     prefix="/shipment",
@@ -32,42 +50,99 @@ jinja_env = Environment(loader=FileSystemLoader("templates"))
 
 templates = Jinja2Templates(TEMPLATE_DIR)
 
+# concurrent reads of the same shipment share one load and serialization
+shipment_reads = SingleFlight(
+    use_redis=app_settings.SINGLE_FLIGHT_REDIS,
+    lock_timeout=app_settings.SINGLE_FLIGHT_LOCK_TIMEOUT,
+)
+
+
+# a shared load keeps running when the request that started it is gone ->
+# own session instead of the request's one
+@asynccontextmanager
+async def flight_service() -> AsyncIterator[ShipmentService]:
+    async with async_session() as session:
+        yield get_shipment_service(session)
+
 
 @router.get("/", response_model=ShipmentRead)
-async def get_shipment(id: UUID, service: ShipmentServiceDep):
-    shipment = await service.get(id)
+async def get_shipment(
+    id: UUID,
+    fields: str | None = Query(
+        default=None,
+        description="comma separated fields, e.g. status,estimated_delivery",
+    ),
+    embed: str | None = Query(
+        default=None, description="comma separated: timeline,tags,seller"
+    ),
+):
+    async def load_shipment() -> dict | None:
+        async with flight_service() as service:
+            shipment = await service.get(id, include_archived=True)
+            if shipment is None:
+                return None
+            return shipment_payload(shipment)
+
+    # sparse read -> skips the queries of what isn't requested
+    async def load_sparse_shipment() -> dict | None:
+        async with flight_service() as service:
+            return await service.get_sparse(
+                id, split_csv(fields), split_csv(embed), include_archived=True
+            )
+
+    if fields is None and embed is None:
+        content = await shipment_reads.do(f"shipment:{id}", load_shipment)
+    else:
+        content = await shipment_reads.do(
+            f"shipment:{id}:{fields}:{embed}", load_sparse_shipment
+        )
 
-    if shipment is None:
+    if content is None:
         raise EntityNotFound()
 
-    return shipment
+    return ORJSONResponse(content)
 
 
 # tracking for a shipment
 # response class is used to parse data to the response we want
 # include_in_schema prevent the route fro showing in the docs
 @router.get("/track", response_class=HTMLResponse, include_in_schema=False)
-async def track_shipment(id: UUID, service: ShipmentServiceDep):
-    template = jinja_env.get_template("track.html")
-
-    # check for shipment with given id
-    shipment = await service.get(id)
-
-    if shipment is None:
+async def track_shipment(id: UUID):
+    async def render_tracking_page() -> str | None:
+        template = jinja_env.get_template("track.html")
+
+        # check for shipment with given id
+        async with flight_service() as service:
+            shipment = await service.get(id, include_archived=True)
+
+            if shipment is None:
+                return None
+
+            # Compute status from timeline (latest event)
+            current_status = (
+                shipment.timeline[-1].status.value if shipment.timeline else "unknown"
+            )
+            # only what the template shows -> no model_dump of the whole shipment
+            context = {
+                "id": shipment.id,
+                "content": shipment.content,
+                "created_at": shipment.created_at,
+                "estimated_delivery": shipment.estimated_delivery,
+                "current_status": current_status,
+                "partner": shipment.delivery_partner.name,
+                "timeline": shipment.timeline,
+            }
+
+            return template.render(context)
+
+    content = await shipment_reads.do(f"track:{id}", render_tracking_page)
+
+    if content is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Given id does not exist"
         )
 
-    # Compute status from timeline (latest event)
-    current_status = (
-        shipment.timeline[-1].status.value if shipment.timeline else "unknown"
-    )
-    context = shipment.model_dump()
-    context["current_status"] = current_status
-    context["partner"] = shipment.delivery_partner.name
-    context["timeline"] = shipment.timeline
-
-    return HTMLResponse(content=template.render(context))
+    return HTMLResponse(content=content)
 
 
 @router.post(
@@ -80,8 +155,43 @@ async def submit_shipment(
     seller: SellerDep,
     body: ShipmentCreate,
     service: ShipmentServiceDep,
+    idempotency: IdempotencyServiceDep,
+    idempotency_key: str | None = Header(
+        default=None,
+        max_length=255,
+        description="retries with the same key return the first response",
+    ),
+):
+    if idempotency_key is None:
+        return shipment_response(
+            await service.add(body, seller), status_code=status.HTTP_201_CREATED
+        )
+
+    async def create_shipment() -> dict:
+        return shipment_payload(await service.add(body, seller))
+
+    content, replayed = await idempotency.run(
+        f"{seller.id}:{idempotency_key}",
+        body.model_dump(mode="json"),
+        create_shipment,
+    )
+
+    return ORJSONResponse(
+        content,
+        status_code=status.HTTP_201_CREATED,
+        headers={"Idempotent-Replayed": "true"} if replayed else None,
+    )
+
+
+# bulk create shipments from a csv upload with ShipmentCreate columns
+@router.post("/import", response_model=ImportReport)
+async def import_shipments(
+    seller: SellerDep,
+    file: UploadFile,
+    service: BulkImportServiceDep,
 ):
-    return await service.add(body, seller)
+    rows = csv.DictReader(io.TextIOWrapper(file.file, encoding="utf-8"))
+    return await service.import_shipments(rows, seller)
 
 
 @router.patch("/", response_model=ShipmentRead)
@@ -115,47 +225,66 @@ async def update_shipment(
 
     shipment = await service.update(update, id, partner)
 
-    return shipment
+    return shipment_response(shipment)
 
 
 ## get all shipment by a tag
 @router.get("/tagged", response_model=list[ShipmentRead])
+@query_budget(5)
 async def get_tagged_shipments(
-    tag_name: TagName, session: sessionDep, service: ShipmentServiceDep
+    tag_name: TagName,
+    service: ShipmentServiceDep,
+    fields: str | None = Query(
+        default=None, description="comma separated fields, e.g. id,status"
+    ),
+    embed: str | None = Query(
+        default=None, description="comma separated: timeline,tags,seller"
+    ),
 ):
-    # First check if tag exists
-    tag = await session.scalar(select(Tag).where(Tag.name == tag_name.value))
-
-    if tag is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Tag '{tag_name.value}' not found in database",
+    # full ShipmentRead items unless fields/embed narrow them down
+    # -> one shipment_tag index scan plus one query per embed
+    if fields is None and embed is None:
+        shipments = await service.list_tagged(tag_name, READ_FIELDS, list(EMBEDS))
+    else:
+        shipments = await service.list_tagged(
+            tag_name, split_csv(fields), split_csv(embed)
         )
 
-    # Query shipment IDs with this tag via the linking table
-    result = await session.execute(
-        select(Shipment.id)
-        .join(ShipmentTag, Shipment.id == ShipmentTag.shipment_id)
-        .join(Tag, Tag.id == ShipmentTag.tag_id)
-        .where(Tag.name == tag_name.value)
+    return ORJSONResponse(shipments)
+
+
+## add or remove tags on many shipments at once
+@router.post("/tags:batch", response_model=ShipmentTagBatchResult)
+async def batch_tag_shipments(
+    body: ShipmentTagBatch, seller: SellerDep, service: ShipmentServiceDep
+):
+    affected = await service.batch_tags(
+        seller, body.shipment_ids, body.tags, body.action
     )
+    return {"affected": affected}
 
-    shipment_ids = result.scalars().all()
 
-    # Load each shipment with all relationships properly loaded using the service layer
-    shipments = []
-    for shipment_id in shipment_ids:
-        shipment = await service.get(shipment_id)
-        if shipment:
-            shipments.append(shipment)
+## cancel many shipments of the seller
+@router.post("/cancel:batch", response_model=ShipmentCancelBatchResult)
+async def batch_cancel_shipments(
+    body: ShipmentCancelBatch, seller: SellerDep, service: ShipmentServiceDep
+):
+    cancelled, skipped = await service.cancel_many(body.shipment_ids, seller)
+    return {"cancelled": cancelled, "skipped": skipped}
+
 
-    return shipments
+## delete many shipments of the seller with their events, tags and reviews
+@router.post("/delete:batch", response_model=ShipmentDeleteBatchResult)
+async def batch_delete_shipments(
+    body: ShipmentDeleteBatch, seller: SellerDep, service: ShipmentServiceDep
+):
+    return {"deleted": await service.delete_many(body.shipment_ids, seller)}
 
 
 ## Add a tag to shipment
 @router.get("/tag", response_model=ShipmentRead)
 async def add_tag_to_shipment(id: UUID, tag_name: TagName, service: ShipmentServiceDep):
-    return await service.add_tag(id, tag_name)
+    return shipment_response(await service.add_tag(id, tag_name))
 
 
 ## remove a tag to shipment
@@ -163,7 +292,7 @@ async def add_tag_to_shipment(id: UUID, tag_name: TagName, service: ShipmentServ
 async def remove_tag_from_shipment(
     id: UUID, tag_name: TagName, service: ShipmentServiceDep
 ):
-    return await service.remove_tag(id, tag_name)
+    return shipment_response(await service.remove_tag(id, tag_name))
 
 
 @router.delete("/")
@@ -175,7 +304,7 @@ async def delete_shipment(id: UUID, service: ShipmentServiceDep) -> dict[str, st
 # cancel shipment
 @router.get("/cancel", response_model=ShipmentRead)
 async def cancel_shipment(id: UUID, service: ShipmentServiceDep, seller: SellerDep):
-    return await service.cancel(id, seller)
+    return shipment_response(await service.cancel(id, seller))
 
 
 ### display review form html page
@@ -0,0 +1,331 @@
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timedelta
+from enum import Enum
+from pathlib import Path
+from uuid import UUID, uuid4
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from sqlalchemy import delete, insert, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from config import app_settings
+from database.models import (
+    CLOSED_STATUSES,
+    ArchivedShipment,
+    Review,
+    Shipment,
+    ShipmentEvent,
+    ShipmentTag,
+    ShipmentStatus,
+    Tag,
+)
+from services.seller_stats import SellerStatsService, StatusChange
+
+# archived tables -> stored under <ARCHIVE_DIR>/<table>/year=YYYY/month=MM/
+# fixed schemas so all-null columns keep the same type in every file
+ARCHIVE_SCHEMAS = {
+    "shipment": pa.schema(
+        [
+            ("id", pa.string()),
+            ("content", pa.string()),
+            ("weight", pa.float64()),
+            ("destination", pa.int64()),
+            ("estimated_delivery", pa.timestamp("us")),
+            ("client_contact_email", pa.string()),
+            ("client_contact_phone", pa.int64()),
+            ("created_at", pa.timestamp("us")),
+            ("seller_id", pa.string()),
+            ("delivery_partner_id", pa.string()),
+        ]
+    ),
+    "shipment_event": pa.schema(
+        [
+            ("id", pa.string()),
+            ("created_at", pa.timestamp("us")),
+            ("location", pa.int64()),
+            ("status", pa.string()),
+            ("description", pa.string()),
+            ("shipment_id", pa.string()),
+        ]
+    ),
+    "shipment_tag": pa.schema(
+        [
+            ("shipment_id", pa.string()),
+            ("name", pa.string()),
+            ("instruction", pa.string()),
+        ]
+    ),
+    "review": pa.schema(
+        [
+            ("id", pa.string()),
+            ("created_at", pa.timestamp("us")),
+            ("rating", pa.int64()),
+            ("comment", pa.string()),
+            ("shipment_id", pa.string()),
+        ]
+    ),
+}
+
+PARTITION_SCHEMA = pa.schema([("year", pa.int32()), ("month", pa.int32())])
+
+
+def _plain(value):
+    # uuids and enums are stored as strings
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+class ArchiveReader:
+    """
+    Reads archived shipments back from the parquet files. Blocking -> call
+    it from a thread in async code.
+    """
+
+    def __init__(self, root: Path | str = app_settings.ARCHIVE_DIR):
+        self.root = Path(root)
+
+    def _read(
+        self, table: str, filter, partition: tuple[int, int] | None = None
+    ) -> list[dict]:
+        path = self.root / table
+        if partition is None:
+            # whole table -> year / month come from the directory names
+            schema = pa.unify_schemas([ARCHIVE_SCHEMAS[table], PARTITION_SCHEMA])
+            partitioning = ds.partitioning(PARTITION_SCHEMA, flavor="hive")
+        else:
+            # one partition -> only its directory is listed
+            year, month = partition
+            path = path / f"year={year}" / f"month={month}"
+            schema, partitioning = ARCHIVE_SCHEMAS[table], None
+
+        if not path.exists():
+            return []
+
+        dataset = ds.dataset(
+            path, schema=schema, format="parquet", partitioning=partitioning
+        )
+        return dataset.to_table(filter=filter).to_pylist()
+
+    def get(self, id: UUID, year: int, month: int) -> dict | None:
+        """
+        Shipment in the year / month partition from archived_shipment, only
+        that partition is scanned
+        """
+        partition = (year, month)
+
+        shipments = self._read("shipment", ds.field("id") == str(id), partition)
+        if not shipments:
+            return None
+
+        shipment = shipments[0]
+
+        # children live in the shipment's partition
+        filter = ds.field("shipment_id") == str(id)
+
+        shipment["timeline"] = sorted(
+            self._read("shipment_event", filter, partition),
+            key=lambda event: event["created_at"],
+        )
+        shipment["tags"] = self._read("shipment_tag", filter, partition)
+        reviews = self._read("review", filter, partition)
+        shipment["review"] = reviews[0] if reviews else None
+
+        return shipment
+
+    def partitions(self) -> list[dict]:
+        """
+        (id, year, month) of every archived shipment -> rebuilds
+        archived_shipment
+        """
+        return [
+            {"id": UUID(row["id"]), "year": row["year"], "month": row["month"]}
+            for row in self._read("shipment", None)
+        ]
+
+
+class ArchiveService:
+    """
+    Moves closed shipments with their events, tags and reviews to parquet
+    files and deletes them from postgres, one batch per transaction.
+    """
+
+    BATCH_SIZE = 500
+
+    def __init__(self, session: AsyncSession, root: Path | str | None = None):
+        self.session = session
+        self.root = Path(root or app_settings.ARCHIVE_DIR)
+        self.stats = SellerStatsService(session)
+
+    async def _closed_shipment_ids(
+        self, cutoff: datetime, after: UUID | None, limit: int
+    ) -> list[UUID]:
+        # closed from current_status -> the latest event only dates the closing
+        latest_event = (
+            select(ShipmentEvent.created_at)
+            .where(
+                ShipmentEvent.shipment_id == Shipment.id,
+                ShipmentEvent.created_at >= Shipment.created_at,
+            )
+            .order_by(ShipmentEvent.created_at.desc())
+            .limit(1)
+            .lateral("latest_event")
+        )
+
+        stmt = (
+            select(Shipment.id)
+            .join(latest_event, true())
+            .where(
+                Shipment.current_status.in_(CLOSED_STATUSES),
+                latest_event.c.created_at < cutoff,
+            )
+            .order_by(Shipment.id)
+            .limit(limit)
+        )
+        if after is not None:
+            stmt = stmt.where(Shipment.id > after)
+
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def _rows(self, stmt) -> list[dict]:
+        result = await self.session.execute(stmt)
+        return [
+            {key: _plain(value) for key, value in row.items()}
+            for row in result.mappings().all()
+        ]
+
+    def _write(self, table: str, rows: list[dict], partitions: dict[str, tuple]):
+        """
+        Write rows grouped by their shipment's (year, month).
+        Returns the written files.
+        """
+        grouped: dict[tuple, list[dict]] = defaultdict(list)
+        for row in rows:
+            shipment_id = row["id"] if table == "shipment" else row["shipment_id"]
+            grouped[partitions[shipment_id]].append(row)
+
+        files = []
+        for (year, month), group in grouped.items():
+            directory = self.root / table / f"year={year}" / f"month={month}"
+            directory.mkdir(parents=True, exist_ok=True)
+
+            # sorted ids -> row group statistics prune id lookups
+            key = "id" if table == "shipment" else "shipment_id"
+            group.sort(key=lambda row: row[key])
+
+            file = directory / f"{uuid4().hex}.parquet"
+            pq.write_table(
+                pa.Table.from_pylist(group, schema=ARCHIVE_SCHEMAS[table]), file
+            )
+            files.append(file)
+
+        return files
+
+    async def _archive_batch(self, ids: list[UUID]) -> int:
+        shipments = await self._rows(
+            select(*Shipment.__table__.c).where(Shipment.id.in_(ids))
+        )
+        if not shipments:
+            return 0
+
+        # events never predate their shipment -> prunes the older partitions
+        oldest = min(shipment["created_at"] for shipment in shipments)
+        in_batch = (
+            ShipmentEvent.shipment_id.in_(ids),
+            ShipmentEvent.created_at >= oldest,
+        )
+
+        events = await self._rows(select(*ShipmentEvent.__table__.c).where(*in_batch))
+        tags = await self._rows(
+            select(ShipmentTag.shipment_id, Tag.name, Tag.instruction)
+            .join(Tag, Tag.id == ShipmentTag.tag_id)
+            .where(ShipmentTag.shipment_id.in_(ids))
+        )
+        reviews = await self._rows(
+            select(*Review.__table__.c).where(Review.shipment_id.in_(ids))
+        )
+
+        partitions = {
+            shipment["id"]: (shipment["created_at"].year, shipment["created_at"].month)
+            for shipment in shipments
+        }
+
+        files = []
+        try:
+            for table, rows in zip(ARCHIVE_SCHEMAS, (shipments, events, tags, reviews)):
+                if rows:
+                    files += self._write(table, rows, partitions)
+
+            # children first -> foreign keys
+            await self.session.execute(
+                delete(Review).where(Review.shipment_id.in_(ids))
+            )
+            await self.session.execute(
+                delete(ShipmentTag).where(ShipmentTag.shipment_id.in_(ids))
+            )
+            await self.session.execute(delete(ShipmentEvent).where(*in_batch))
+            await self.session.execute(delete(Shipment).where(Shipment.id.in_(ids)))
+            await self.session.execute(
+                insert(ArchivedShipment),
+                [
+                    {"id": UUID(id), "year": year, "month": month}
+                    for id, (year, month) in partitions.items()
+                ],
+            )
+            # archived shipments leave the seller's current counts
+            await self.stats.transitions(
+                [
+                    StatusChange(
+                        UUID(shipment["seller_id"]),
+                        ShipmentStatus(shipment["current_status"]),
+                        None,
+                    )
+                    for shipment in shipments
+                ]
+            )
+            await self.session.commit()
+
+        except Exception:
+            # nothing deleted -> drop the files so a rerun doesn't duplicate them
+            await self.session.rollback()
+            for file in files:
+                file.unlink(missing_ok=True)
+            raise
+
+        return len(shipments)
+
+    async def reindex(self) -> int:
+        """
+        Refill archived_shipment from the parquet files, e.g. for archives
+        written before the table existed
+        """
+        rows = await asyncio.to_thread(ArchiveReader(self.root).partitions)
+
+        await self.session.execute(delete(ArchivedShipment))
+        for start in range(0, len(rows), self.BATCH_SIZE):
+            await self.session.execute(
+                insert(ArchivedShipment), rows[start : start + self.BATCH_SIZE]
+            )
+        await self.session.commit()
+
+        return len(rows)
+
+    async def archive(
+        self, older_than_days: int = app_settings.ARCHIVE_AFTER_DAYS
+    ) -> int:
+        cutoff = datetime.now() - timedelta(days=older_than_days)
+        archived = 0
+        after = None
+
+        while ids := await self._closed_shipment_ids(cutoff, after, self.BATCH_SIZE):
+            archived += await self._archive_batch(ids)
+            after = ids[-1]
+
+        return archived
@@ -0,0 +1,366 @@
+import asyncio
+from collections import defaultdict
+from datetime import datetime
+from itertools import islice
+from typing import Iterable, Iterator
+from uuid import UUID, uuid4
+
+from pydantic import ValidationError
+from sqlalchemy import func, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from api.schemas.bulk_import import ImportReport, ImportRowError
+from api.schemas.delivery_partner import DeliveryPartnerCreate
+from api.schemas.schema import ShipmentCreate
+from database.models import (
+    CLOSED_STATUSES,
+    DeliveryPartner,
+    Seller,
+    Shipment,
+    ShipmentStatus,
+)
+from services.eta import eta_engine
+from services.seller_stats import SellerStatsService, StatusChange
+from services.user import verification_email
+from utils.hashing import hash_password
+from worker.tasks import queue_template_emails
+
+
+def _batched(items: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+# csv cells are strings -> empty cells are treated as missing values
+def _clean(row: dict) -> dict:
+    return {key: value for key, value in row.items() if value not in ("", None)}
+
+
+def _error_detail(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in item['loc'])}: {item['msg']}"
+        for item in error.errors()
+    )
+
+
+class BulkImportService:
+    """
+    Csv imports: rows are validated with the api schemas in batches, copied
+    into a temp staging table and merged into the real tables in one go.
+    Emails are only queued after the merge is committed.
+    """
+
+    BATCH_SIZE = 1000
+
+    SHIPMENT_COLUMNS = [
+        "id",
+        "content",
+        "weight",
+        "destination",
+        "estimated_delivery",
+        "client_contact_email",
+        "client_contact_phone",
+        "created_at",
+        "seller_id",
+        "delivery_partner_id",
+    ]
+    PARTNER_COLUMNS = [
+        "id",
+        "name",
+        "email",
+        "email_verified",
+        "password_hash",
+        "serviceable_zip_codes",
+        "max_handling_capacity",
+        "created_at",
+    ]
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.stats = SellerStatsService(session)
+
+    async def _create_staging_table(self, table: str):
+        await self.session.execute(
+            text(
+                f"CREATE TEMP TABLE staging_{table} "
+                f"(LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP"
+            )
+        )
+
+    # COPY records through the session's asyncpg connection
+    async def _copy(self, table: str, columns: list[str], records: list[tuple]):
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            table, records=records, columns=columns
+        )
+
+    # partners serving any of the destinations and their remaining capacity
+    # the partner rows stay locked until the merge is committed -> concurrent
+    # imports can't hand out the same capacity. Locked in id order, a lock
+    # order conflict across batches of two imports aborts one of them.
+    async def _load_partners(
+        self,
+        destinations: set[int],
+        zip_partners: dict[int, list[UUID]],
+        capacity: dict[UUID, int],
+    ):
+        result = await self.session.execute(
+            select(
+                DeliveryPartner.id,
+                DeliveryPartner.serviceable_zip_codes,
+                DeliveryPartner.max_handling_capacity,
+            )
+            .where(
+                DeliveryPartner.serviceable_zip_codes.op("&&")(
+                    postgresql.array(list(destinations))
+                )
+            )
+            .order_by(DeliveryPartner.id)
+            .with_for_update()
+        )
+
+        new_partners = []
+        for partner_id, zip_codes, max_capacity in result.all():
+            for zip_code in destinations.intersection(zip_codes):
+                zip_partners[zip_code].append(partner_id)
+            if partner_id not in capacity:
+                capacity[partner_id] = max_capacity
+                new_partners.append(partner_id)
+
+        if not new_partners:
+            return
+
+        active = await self.session.execute(
+            select(Shipment.delivery_partner_id, func.count())
+            .where(
+                Shipment.delivery_partner_id.in_(new_partners),
+                Shipment.current_status.notin_(CLOSED_STATUSES),
+            )
+            .group_by(Shipment.delivery_partner_id)
+        )
+        for partner_id, count in active.all():
+            capacity[partner_id] -= count
+
+    async def import_shipments(
+        self, rows: Iterable[dict], seller: Seller, notify: bool = True
+    ) -> ImportReport:
+        report = ImportReport()
+        zip_partners: dict[int, list[UUID]] = defaultdict(list)
+        capacity: dict[UUID, int] = {}
+        loaded_destinations: set[int] = set()
+
+        await self._create_staging_table("shipment")
+
+        # line 1 is the csv header
+        for batch in _batched(enumerate(rows, start=2), self.BATCH_SIZE):
+            valid: list[tuple[int, ShipmentCreate]] = []
+            for line, row in batch:
+                try:
+                    valid.append((line, ShipmentCreate.model_validate(_clean(row))))
+                except ValidationError as error:
+                    report.errors.append(
+                        ImportRowError(line=line, detail=_error_detail(error))
+                    )
+
+            destinations = {shipment.destination for _, shipment in valid}
+            destinations -= loaded_destinations
+            if destinations:
+                await self._load_partners(destinations, zip_partners, capacity)
+                loaded_destinations |= destinations
+
+            # same rule as assign_shipment -> first partner with capacity left
+            now = datetime.now()
+            records = []
+            for line, shipment in valid:
+                partner_id = next(
+                    (
+                        partner_id
+                        for partner_id in zip_partners[shipment.destination]
+                        if capacity[partner_id] > 0
+                    ),
+                    None,
+                )
+                if partner_id is None:
+                    report.errors.append(
+                        ImportRowError(line=line, detail="No delivery partner found")
+                    )
+                    continue
+
+                capacity[partner_id] -= 1
+                records.append(
+                    (
+                        uuid4(),
+                        shipment.content,
+                        shipment.weight,
+                        shipment.destination,
+                        # origin is the placed event's location
+                        await eta_engine.estimate(
+                            self.session,
+                            seller.zip_code or shipment.destination,
+                            shipment.destination,
+                            partner_id,
+                            start=now,
+                        ),
+                        shipment.client_contact_email,
+                        shipment.client_contact_phone,
+                        now,
+                        seller.id,
+                        partner_id,
+                    )
+                )
+
+            if records:
+                await self._copy("staging_shipment", self.SHIPMENT_COLUMNS, records)
+                report.imported += len(records)
+
+        columns = ", ".join(self.SHIPMENT_COLUMNS)
+        await self.session.execute(
+            text(
+                f"INSERT INTO shipment ({columns}) SELECT {columns} FROM staging_shipment"
+            )
+        )
+        # placed event for every shipment -> location falls back to destination
+        await self.session.execute(
+            text(
+                """
+                INSERT INTO shipment_event
+                    (id, created_at, location, status, description, shipment_id)
+                SELECT gen_random_uuid(), st.created_at,
+                       COALESCE(:seller_zip_code, st.destination),
+                       'placed', 'assigned to ' || p.name, st.id
+                FROM staging_shipment st
+                JOIN delivery_partner p ON p.id = st.delivery_partner_id
+                """
+            ),
+            {"seller_zip_code": seller.zip_code},
+        )
+        await self.stats.transitions(
+            [StatusChange(seller.id, None, ShipmentStatus.placed)] * report.imported
+        )
+
+        placed = []
+        if notify:
+            result = await self.session.execute(
+                text(
+                    """
+                    SELECT st.id, st.client_contact_email, p.name
+                    FROM staging_shipment st
+                    JOIN delivery_partner p ON p.id = st.delivery_partner_id
+                    """
+                )
+            )
+            placed = result.all()
+
+        await self.session.commit()
+
+        report.errors.sort(key=lambda error: error.line)
+        queue_template_emails(
+            [
+                {
+                    "recipients": [client_contact_email],
+                    "subject": "Your Order is Shipped 🚛",
+                    "context": {
+                        "seller": seller.name,
+                        "id": str(id),
+                        "partner": partner_name,
+                    },
+                    "template_name": "mail_placed.html",
+                }
+                for id, client_contact_email, partner_name in placed
+            ]
+        )
+
+        return report
+
+    async def import_partners(
+        self, rows: Iterable[dict], notify: bool = True
+    ) -> ImportReport:
+        report = ImportReport()
+        staged = 0
+
+        await self._create_staging_table("delivery_partner")
+
+        for batch in _batched(enumerate(rows, start=2), self.BATCH_SIZE):
+            valid: list[DeliveryPartnerCreate] = []
+            for line, row in batch:
+                row = _clean(row)
+                # zip codes are a single ";" separated csv cell
+                if isinstance(row.get("serviceable_zip_codes"), str):
+                    row["serviceable_zip_codes"] = [
+                        zip_code
+                        for zip_code in row["serviceable_zip_codes"].split(";")
+                        if zip_code.strip()
+                    ]
+                try:
+                    valid.append(DeliveryPartnerCreate.model_validate(row))
+                except ValidationError as error:
+                    report.errors.append(
+                        ImportRowError(line=line, detail=_error_detail(error))
+                    )
+
+            # bcrypt releases the GIL -> hash the batch on the thread pool
+            password_hashes = await asyncio.gather(
+                *(
+                    asyncio.to_thread(hash_password, partner.password)
+                    for partner in valid
+                )
+            )
+
+            now = datetime.now()
+            records = [
+                (
+                    uuid4(),
+                    partner.name,
+                    partner.email,
+                    False,
+                    password_hash,
+                    partner.serviceable_zip_codes,
+                    partner.max_handling_capacity,
+                    now,
+                )
+                for partner, password_hash in zip(valid, password_hashes)
+            ]
+
+            if records:
+                await self._copy(
+                    "staging_delivery_partner", self.PARTNER_COLUMNS, records
+                )
+                staged += len(records)
+
+        # existing emails and duplicates within the file are skipped
+        columns = ", ".join(self.PARTNER_COLUMNS)
+        staged_columns = ", ".join(f"st.{column}" for column in self.PARTNER_COLUMNS)
+        result = await self.session.execute(
+            text(
+                f"""
+                INSERT INTO delivery_partner ({columns})
+                SELECT DISTINCT ON (st.email) {staged_columns}
+                FROM staging_delivery_partner st
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM delivery_partner d WHERE d.email = st.email
+                )
+                ORDER BY st.email, st.created_at
+                RETURNING id, name, email
+                """
+            )
+        )
+        created = result.all()
+
+        await self.session.commit()
+
+        report.imported = len(created)
+        report.skipped = staged - len(created)
+
+        if notify:
+            queue_template_emails(
+                [
+                    verification_email(id, name, email, "partner")
+                    for id, name, email in created
+                ]
+            )
+
+        return report
@@ -1,11 +1,21 @@
+from typing import AsyncIterator
+from uuid import UUID
+
 from fastapi import HTTPException, status, BackgroundTasks
-from sqlalchemy import Sequence, func, and_, text
+from sqlalchemy import Sequence, func, and_, true
 from sqlalchemy.orm import selectinload
-from sqlalchemy.sql.expression import any_
 from sqlmodel import select
 
 from api.schemas.delivery_partner import DeliveryPartnerCreate, DeliveryPartnerUpdate
-from database.models import DeliveryPartner, Shipment, ShipmentStatus, ShipmentEvent
+from core.metrics import ASSIGNMENT_ATTEMPTS, ASSIGNMENT_FAILURES
+from database.models import (
+    CLOSED_STATUSES,
+    DeliveryPartner,
+    PartnerScore,
+    Shipment,
+    ShipmentEvent,
+)
+from services.partner_scoring import UNSCORED
 from services.user import UserService
 
 
@@ -18,43 +28,36 @@ class DeliveryPartnerService(UserService):
 
     async def get_partners_by_zipcode(self, zipcode: int) -> Sequence[DeliveryPartner]:
         result = await self.session.execute(
-            select(DeliveryPartner).where(
-                zipcode == any_(DeliveryPartner.serviceable_zip_codes)
+            # containment instead of = ANY() -> can use the gin index
+            select(DeliveryPartner)
+            .outerjoin(
+                PartnerScore,
+                and_(
+                    PartnerScore.delivery_partner_id == DeliveryPartner.id,
+                    PartnerScore.zip_code == zipcode,
+                ),
             )
+            .where(DeliveryPartner.serviceable_zip_codes.contains([zipcode]))
+            # best scored partners first
+            .order_by(func.coalesce(PartnerScore.score, UNSCORED).desc())
         )
         return result.scalars().all()
 
     async def assign_shipment(self, destination: int):
+        ASSIGNMENT_ATTEMPTS.inc()
         eligible_delivery_partners = await self.get_partners_by_zipcode(destination)
 
         # Find partner with available capacity
         for partner in eligible_delivery_partners:
-            # Count active shipments using a raw SQL approach with window functions
-            # This gets the latest event for each shipment and counts non-delivered ones
-            query = """
-                WITH latest_events AS (
-                    SELECT DISTINCT ON (se.shipment_id)
-                        se.shipment_id,
-                        se.status
-                    FROM shipment_event se
-                    WHERE se.shipment_id IN (
-                        SELECT s.id
-                        FROM shipment s
-                        WHERE s.delivery_partner_id = :partner_id
-                    )
-                    ORDER BY se.shipment_id, se.created_at DESC
-                )
-                SELECT COUNT(*)
-                FROM latest_events
-                WHERE status != :delivered_status
-            """
-
+            # open shipments of the partner from the maintained current_status
+            # -> delivered and cancelled shipments release their capacity
             result = await self.session.execute(
-                text(query),
-                {
-                    "partner_id": partner.id,
-                    "delivered_status": ShipmentStatus.delivered.value,
-                },
+                select(func.count())
+                .select_from(Shipment)
+                .where(
+                    Shipment.delivery_partner_id == partner.id,
+                    Shipment.current_status.notin_(CLOSED_STATUSES),
+                )
             )
             active_shipments_count = result.scalar() or 0
 
@@ -63,11 +66,71 @@ class DeliveryPartnerService(UserService):
             if current_capacity > 0:
                 return partner
 
+        ASSIGNMENT_FAILURES.inc()
         raise HTTPException(
             status_code=status.HTTP_406_NOT_ACCEPTABLE,
             detail="No delivery partner found",
         )
 
+    # active shipments of a partner grouped by destination zip
+    # one query over the (delivery_partner_id, destination) index, streamed
+    # open ones from current_status -> only their latest location is looked up
+    async def stream_manifest(self, partner_id: UUID) -> AsyncIterator[dict]:
+        latest_event = (
+            select(ShipmentEvent.location)
+            .where(
+                ShipmentEvent.shipment_id == Shipment.id,
+                ShipmentEvent.created_at >= Shipment.created_at,
+            )
+            .order_by(ShipmentEvent.created_at.desc())
+            .limit(1)
+            .lateral("latest_event")
+        )
+
+        stmt = (
+            select(
+                Shipment.id,
+                Shipment.destination,
+                Shipment.content,
+                Shipment.weight,
+                Shipment.estimated_delivery,
+                Shipment.client_contact_phone,
+                Shipment.current_status.label("status"),
+                latest_event.c.location,
+            )
+            .join(latest_event, true())
+            .where(
+                Shipment.delivery_partner_id == partner_id,
+                Shipment.current_status.notin_(CLOSED_STATUSES),
+            )
+            .order_by(Shipment.destination, Shipment.estimated_delivery, Shipment.id)
+        )
+
+        result = await self.session.stream(stmt)
+
+        # rows arrive ordered by zip -> flush a group when the zip changes
+        group: dict | None = None
+        async for row in result:
+            if group is None or group["destination"] != row.destination:
+                if group is not None:
+                    yield group
+                group = {"destination": row.destination, "shipments": []}
+
+            group["shipments"].append(
+                {
+                    "id": row.id,
+                    "content": row.content,
+                    "weight": row.weight,
+                    "estimated_delivery": row.estimated_delivery,
+                    "client_contact_phone": row.client_contact_phone,
+                    "status": row.status,
+                    "location": row.location,
+                }
+            )
+
+        if group is not None:
+            yield group
+
     async def update(self, delivery_partner: DeliveryPartner):
         return await self._update(delivery_partner)
 
@@ -0,0 +1,241 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Iterable
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import app_settings
+from database.invalidation import invalidation_bus
+from database.models import TagName
+from database.session import async_session
+from database.tags import tag_registry
+
+logger = logging.getLogger(__name__)
+
+# tags that change transit times, first one present wins
+ETA_TAGS = (TagName.EXPRESS, TagName.STANDARD)
+
+# GROUPING(origin, delivery_partner_id, tag_id) -> key of the lookup table
+_KEYS = {
+    0: lambda row: (row.origin, row.delivery_partner_id, row.tag_id),
+    1: lambda row: (row.origin, row.delivery_partner_id),
+    5: lambda row: (row.delivery_partner_id,),
+    7: lambda row: (),
+}
+
+# hours from an event at a location until delivery, per destination
+_QUANTILES_QUERY = """
+    WITH delivered AS (
+        SELECT s.id, s.created_at, s.destination, s.delivery_partner_id,
+               se.created_at AS delivered_at,
+               (
+                   SELECT st.tag_id
+                   FROM shipment_tag st
+                   WHERE st.shipment_id = s.id
+                     AND st.tag_id = ANY(CAST(:tag_ids AS uuid[]))
+                   ORDER BY array_position(CAST(:tag_ids AS uuid[]), st.tag_id)
+                   LIMIT 1
+               ) AS tag_id
+        FROM shipment s
+        JOIN shipment_event se
+            ON se.shipment_id = s.id
+            AND se.created_at >= s.created_at
+            AND se.status = 'delivered'
+        WHERE s.created_at >= :since {destination_filter}
+    ),
+    scans AS (
+        SELECT se.location AS origin, d.destination, d.delivery_partner_id,
+               d.tag_id,
+               extract(epoch FROM d.delivered_at - se.created_at)::float8
+                   / 3600 AS hours
+        FROM delivered d
+        JOIN shipment_event se
+            ON se.shipment_id = d.id
+            AND se.created_at >= d.created_at
+            AND se.created_at < d.delivered_at
+    )
+    SELECT origin, destination, delivery_partner_id, tag_id,
+           GROUPING(origin, delivery_partner_id, tag_id) AS grouped,
+           percentile_cont(CAST(:quantile AS float8))
+               WITHIN GROUP (ORDER BY hours) AS hours
+    FROM scans
+    GROUP BY GROUPING SETS (
+        (origin, destination, delivery_partner_id, tag_id),
+        (origin, destination, delivery_partner_id),
+        (destination, delivery_partner_id),
+        (destination)
+    )
+    HAVING count(*) >= :min_samples
+"""
+
+# only destinations with deliveries since the last refresh
+_CHANGED_DESTINATIONS = """
+    AND s.destination IN (
+        SELECT changed.destination
+        FROM shipment changed
+        JOIN shipment_event changed_event
+            ON changed_event.shipment_id = changed.id
+            AND changed_event.created_at >= :changed_since
+            AND changed_event.status = 'delivered'
+        WHERE changed.created_at >= :since
+    )
+"""
+
+
+class EtaEngine:
+    """
+    Transit time quantiles from an event location until delivery, per
+    destination and (origin, partner, tag), narrower keys falling back to
+    wider ones. Loaded once, then destinations with new deliveries are
+    recomputed every ETA_REFRESH_INTERVAL by a background task on its own
+    session. Lookups are a few dict gets and never wait for a refresh.
+    """
+
+    def __init__(
+        self,
+        quantile: float = app_settings.ETA_QUANTILE,
+        window_days: int = app_settings.ETA_WINDOW_DAYS,
+        min_samples: int = app_settings.ETA_MIN_SAMPLES,
+        refresh_interval: int = app_settings.ETA_REFRESH_INTERVAL,
+    ):
+        self.quantile = quantile
+        self.window_days = window_days
+        self.min_samples = min_samples
+        self.refresh_interval = refresh_interval
+        # destination -> key -> hours
+        self._hours: dict[int, dict[tuple, float]] = {}
+        self._refreshed_at: datetime | None = None
+        # bumped by invalidate() -> refreshes started before it are dropped
+        # and the next one reloads every destination
+        self._generation = 0
+        self._loaded_generation = 0
+        self._lock = asyncio.Lock()
+        self._refresh_task: asyncio.Task | None = None
+
+    async def _tag_ids(self) -> list[UUID]:
+        return [(await tag_registry.get(name)).id for name in ETA_TAGS]
+
+    async def _refresh(self, session: AsyncSession):
+        generation = self._generation
+        full = self._refreshed_at is None or self._loaded_generation != generation
+        started = datetime.now()
+        since = started - timedelta(days=self.window_days)
+        params = {
+            "tag_ids": await self._tag_ids(),
+            "since": since,
+            "quantile": self.quantile,
+            "min_samples": self.min_samples,
+        }
+
+        destination_filter = ""
+        if not full:
+            destination_filter = _CHANGED_DESTINATIONS
+            # deliveries committed late with an earlier timestamp
+            params["changed_since"] = self._refreshed_at - timedelta(minutes=1)
+
+        result = await session.execute(
+            text(_QUANTILES_QUERY.format(destination_filter=destination_filter)),
+            params,
+        )
+
+        hours: dict[int, dict[tuple, float]] = {}
+        for row in result:
+            hours.setdefault(row.destination, {})[_KEYS[row.grouped](row)] = row.hours
+
+        # invalidated while querying
+        if generation != self._generation:
+            return
+
+        if full:
+            self._hours = hours
+            self._loaded_generation = generation
+        else:
+            self._hours.update(hours)
+        self._refreshed_at = started
+
+    async def load(self, session: AsyncSession):
+        async with self._lock:
+            await self._refresh(session)
+
+    async def _ensure(self, session: AsyncSession):
+        if self._refreshed_at is None:
+            async with self._lock:
+                # loaded while waiting for the lock
+                if self._refreshed_at is None:
+                    await self._refresh(session)
+            return
+
+        stale = self._loaded_generation != self._generation or (
+            datetime.now() - self._refreshed_at
+            > timedelta(seconds=self.refresh_interval)
+        )
+        # the current table keeps serving until the refresh swapped it
+        if stale and (self._refresh_task is None or self._refresh_task.done()):
+            self._refresh_task = asyncio.create_task(self._refresh_in_background())
+
+    async def _refresh_in_background(self):
+        try:
+            async with async_session() as session:
+                async with self._lock:
+                    await self._refresh(session)
+        except Exception:
+            # stays stale -> retried by the next estimate
+            logger.exception("eta refresh failed")
+
+    def invalidate(self):
+        # the current table keeps serving until the full reload replaced it
+        self._generation += 1
+
+    def lookup(
+        self,
+        origin: int,
+        destination: int,
+        partner_id: UUID,
+        tag_id: UUID | None = None,
+    ) -> float | None:
+        table = self._hours.get(destination)
+        if table is None:
+            return None
+
+        for key in (
+            (origin, partner_id, tag_id),
+            (origin, partner_id),
+            (partner_id,),
+            (),
+        ):
+            if (hours := table.get(key)) is not None:
+                return hours
+        return None
+
+    async def estimate(
+        self,
+        session: AsyncSession,
+        origin: int,
+        destination: int,
+        partner_id: UUID,
+        tag_names: Iterable[TagName] = (),
+        start: datetime | None = None,
+    ) -> datetime:
+        """
+        Estimated delivery of a shipment at origin at start (default now)
+        """
+        await self._ensure(session)
+
+        tag_names, tag_id = set(tag_names), None
+        for name in ETA_TAGS:
+            if name in tag_names:
+                tag_id = (await tag_registry.get(name)).id
+                break
+
+        hours = self.lookup(origin, destination, partner_id, tag_id)
+        if hours is None:
+            hours = app_settings.ETA_DEFAULT_HOURS
+
+        return (start or datetime.now()) + timedelta(hours=hours)
+
+
+eta_engine = EtaEngine()
+invalidation_bus.subscribe("eta", lambda key: eta_engine.invalidate())
@@ -0,0 +1,122 @@
+from datetime import datetime
+from enum import Enum
+from typing import AsyncIterator
+from uuid import UUID
+
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from database.models import Review, Shipment, ShipmentEvent
+from utils.pagination import encode_cursor
+
+
+class ExportEntity(str, Enum):
+    shipments = "shipments"
+    events = "events"
+    reviews = "reviews"
+
+
+class ExportFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+
+# exported columns per entity -> order is the csv header order
+EXPORT_COLUMNS = {
+    ExportEntity.shipments: (
+        Shipment,
+        [
+            Shipment.id,
+            Shipment.created_at,
+            Shipment.content,
+            Shipment.weight,
+            Shipment.destination,
+            Shipment.estimated_delivery,
+            Shipment.client_contact_email,
+            Shipment.client_contact_phone,
+            Shipment.seller_id,
+            Shipment.delivery_partner_id,
+        ],
+    ),
+    ExportEntity.events: (
+        ShipmentEvent,
+        [
+            ShipmentEvent.id,
+            ShipmentEvent.created_at,
+            ShipmentEvent.shipment_id,
+            ShipmentEvent.location,
+            ShipmentEvent.status,
+            ShipmentEvent.description,
+        ],
+    ),
+    ExportEntity.reviews: (
+        Review,
+        [
+            Review.id,
+            Review.created_at,
+            Review.shipment_id,
+            Review.rating,
+            Review.comment,
+        ],
+    ),
+}
+
+
+def export_fieldnames(entity: ExportEntity) -> list[str]:
+    _, columns = EXPORT_COLUMNS[entity]
+    return [column.key for column in columns] + ["cursor"]
+
+
+class ExportService:
+    # rows fetched per round trip from the server side cursor
+    BATCH_SIZE = 1000
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def rows(
+        self,
+        entity: ExportEntity,
+        seller_id: UUID | None = None,
+        partner_id: UUID | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        after: tuple[datetime, UUID] | None = None,
+    ) -> AsyncIterator[dict]:
+        """
+        Stream rows ordered by (created_at, id) starting after the decoded
+        cursor position. Every row carries the cursor to resume the export
+        right after it.
+        """
+        model, columns = EXPORT_COLUMNS[entity]
+
+        stmt = (
+            select(*columns)
+            .order_by(model.created_at, model.id)
+            .execution_options(yield_per=self.BATCH_SIZE)
+        )
+
+        # child tables are filtered through their shipment
+        if model is not Shipment and (seller_id or partner_id):
+            stmt = stmt.join(Shipment, Shipment.id == model.shipment_id)
+
+        if seller_id:
+            stmt = stmt.where(Shipment.seller_id == seller_id)
+        if partner_id:
+            stmt = stmt.where(Shipment.delivery_partner_id == partner_id)
+        if start:
+            stmt = stmt.where(model.created_at >= start)
+        if end:
+            stmt = stmt.where(model.created_at < end)
+
+        if after:
+            stmt = stmt.where(tuple_(model.created_at, model.id) > tuple_(*after))
+
+        result = await self.session.stream(stmt)
+
+        async for partition in result.partitions():
+            for row in partition:
+                data = dict(row._mapping)
+                data["cursor"] = encode_cursor(data["created_at"], data["id"])
+                yield data
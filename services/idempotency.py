@@ -0,0 +1,95 @@
+import asyncio
+import hashlib
+import json
+import time
+from typing import Awaitable, Callable
+
+from config import app_settings
+from core.exceptions import IdempotencyKeyInProgress, IdempotencyKeyReused
+from database.redis import (
+    acquire_idempotency_lock,
+    extend_idempotency_lock,
+    get_idempotency_record,
+    release_idempotency_lock,
+    set_idempotency_record,
+)
+
+
+def fingerprint(payload: dict) -> str:
+    return hashlib.sha256(
+        json.dumps(payload, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+class IdempotencyService:
+    """
+    Runs a request once per Idempotency-Key and replays the stored response
+    for retries. Concurrent duplicates wait for the first one to finish.
+    Failed requests are not stored -> they can be retried with the same key.
+    The lock is extended while the handler runs, so a slow request is not
+    duplicated once lock_timeout passed.
+    """
+
+    # while waiting on a concurrent duplicate
+    POLL_INTERVAL = 0.05  # seconds
+
+    def __init__(
+        self,
+        ttl: int = app_settings.IDEMPOTENCY_TTL,
+        lock_timeout: int = app_settings.IDEMPOTENCY_LOCK_TIMEOUT,
+    ):
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+
+    def _replay(self, record: dict, request_fingerprint: str) -> dict:
+        if record["fingerprint"] != request_fingerprint:
+            raise IdempotencyKeyReused()
+        return record["response"]
+
+    async def _keep_lock(self, key: str, token: str):
+        while True:
+            await asyncio.sleep(self.lock_timeout / 3)
+            if not await extend_idempotency_lock(key, token, self.lock_timeout):
+                return
+
+    async def run(
+        self, key: str, payload: dict, handler: Callable[[], Awaitable[dict]]
+    ) -> tuple[dict, bool]:
+        """
+        Response of handler() for the key and whether it was replayed
+        """
+        request_fingerprint = fingerprint(payload)
+        deadline = time.monotonic() + self.lock_timeout
+
+        while True:
+            record = await get_idempotency_record(key)
+            if record is not None:
+                return self._replay(record, request_fingerprint), True
+
+            token = await acquire_idempotency_lock(key, self.lock_timeout)
+            if token is not None:
+                break
+
+            # a duplicate is in flight -> wait for its response
+            if time.monotonic() > deadline:
+                raise IdempotencyKeyInProgress()
+            await asyncio.sleep(self.POLL_INTERVAL)
+
+        keepalive = asyncio.create_task(self._keep_lock(key, token))
+        try:
+            # the previous holder may have stored it before releasing the lock
+            record = await get_idempotency_record(key)
+            if record is not None:
+                return self._replay(record, request_fingerprint), True
+
+            response = await handler()
+            await set_idempotency_record(
+                key,
+                {"fingerprint": request_fingerprint, "response": response},
+                self.ttl,
+            )
+        finally:
+            keepalive.cancel()
+            await release_idempotency_lock(key, token)
+
+        return response, False
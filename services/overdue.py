@@ -0,0 +1,118 @@
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from config import app_settings, db_settings
+from database.models import CLOSED_STATUSES, OVERDUE_CANDIDATE, ShipmentStatus
+from worker.tasks import queue_template_emails
+
+OPEN_STATUSES = [status for status in ShipmentStatus if status not in CLOSED_STATUSES]
+
+# claims a chunk of overdue shipments of one status -> marked as notified in
+# the same statement, concurrent runs skip each other's rows
+_CLAIM_QUERY = """
+    UPDATE shipment
+    SET overdue_notified_at = :notified_at
+    WHERE id IN (
+        SELECT id
+        FROM shipment
+        WHERE current_status = '{status}'
+          AND {candidate}
+          AND estimated_delivery < :cutoff
+          {after}
+        ORDER BY estimated_delivery, id
+        LIMIT :chunk_size
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, estimated_delivery, client_contact_email
+"""
+_AFTER = "AND (estimated_delivery, id) > (:after_estimated_delivery, :after_id)"
+
+
+class OverdueService:
+    """
+    Sends delay emails for open shipments past their estimated_delivery.
+    Walks the partial overdue index per status in keyset chunks, each chunk
+    is its own short transaction committed once its emails are queued.
+    Notified shipments leave the index -> reruns only see new overdue ones,
+    a new estimate makes them eligible again.
+    """
+
+    def __init__(
+        self, session: AsyncSession, chunk_size: int = app_settings.OVERDUE_CHUNK_SIZE
+    ):
+        self.session = session
+        self.chunk_size = chunk_size
+
+    async def _claim(
+        self,
+        status: ShipmentStatus,
+        now: datetime,
+        after: tuple[datetime, UUID] | None,
+    ) -> list:
+        params = {"notified_at": now, "cutoff": now, "chunk_size": self.chunk_size}
+        if after is not None:
+            params["after_estimated_delivery"], params["after_id"] = after
+
+        result = await self.session.execute(
+            text(
+                _CLAIM_QUERY.format(
+                    status=status.value,
+                    candidate=OVERDUE_CANDIDATE,
+                    after=_AFTER if after is not None else "",
+                )
+            ),
+            params,
+        )
+        # not committed -> the caller commits once the emails are queued
+        return result.all()
+
+    def _enqueue_emails(self, rows: list):
+        messages = [
+            {
+                "recipients": [row.client_contact_email],
+                "subject": "Your Shipment is Delayed ⏳",
+                "context": {
+                    "id": str(row.id),
+                    "estimated_delivery": row.estimated_delivery.strftime(
+                        "%d %b %Y %H:%M"
+                    ),
+                    "track_url": f"http://{app_settings.APP_DOMAIN}/shipment/track?id={row.id}",
+                },
+                "template_name": "mail_delayed.html",
+            }
+            for row in rows
+        ]
+        queue_template_emails(messages)
+
+    async def notify_overdue(self) -> int:
+        now = datetime.now()
+        notified = 0
+
+        for status in OPEN_STATUSES:
+            after = None
+            while rows := await self._claim(status, now, after):
+                # a broker error rolls the claim back -> retried next run
+                try:
+                    self._enqueue_emails(rows)
+                except Exception:
+                    await self.session.rollback()
+                    raise
+                await self.session.commit()
+                notified += len(rows)
+                after = max((row.estimated_delivery, row.id) for row in rows)
+
+        return notified
+
+
+async def notify_overdue() -> int:
+    # own engine per run -> celery runs every task in a new event loop
+    engine = create_async_engine(db_settings.POSTGRES_URL, poolclass=NullPool)
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            return await OverdueService(session).notify_overdue()
+    finally:
+        await engine.dispose()
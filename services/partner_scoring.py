@@ -0,0 +1,171 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import delete, insert, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import app_settings
+from database.models import PartnerScore
+
+# score = weighted on-time rate, rating and speed, each in 0..1
+ON_TIME_WEIGHT = 0.5
+RATING_WEIGHT = 0.3
+SPEED_WEIGHT = 0.2
+# few deliveries / reviews are pulled towards the overall average
+PRIOR_DELIVERIES = 20
+PRIOR_REVIEWS = 5
+# partners without deliveries to a zip yet
+UNSCORED = 0.5
+
+
+def score_deliveries(
+    partner_ids: np.ndarray,
+    zip_codes: np.ndarray,
+    transit_hours: np.ndarray,
+    on_time: np.ndarray,
+    ratings: np.ndarray,
+) -> list[dict]:
+    """
+    One score per (partner, zip) from one entry per delivered shipment,
+    ratings are nan for shipments without a review
+    """
+    if not len(partner_ids):
+        return []
+
+    partners, partner_codes = np.unique(partner_ids, return_inverse=True)
+    # grouped by partner and zip, transit hours ascending within a group
+    order = np.lexsort((transit_hours, zip_codes, partner_codes))
+    partner_codes, zip_codes, transit_hours, on_time, ratings = (
+        column[order]
+        for column in (partner_codes, zip_codes, transit_hours, on_time, ratings)
+    )
+
+    starts = np.flatnonzero(
+        np.r_[True, (np.diff(partner_codes) != 0) | (np.diff(zip_codes) != 0)]
+    )
+    deliveries = np.diff(np.r_[starts, len(order)])
+
+    # sorted groups -> medians by position
+    medians = (
+        transit_hours[starts + (deliveries - 1) // 2]
+        + transit_hours[starts + deliveries // 2]
+    ) / 2
+
+    on_time_counts = np.add.reduceat(on_time.astype(float), starts)
+    on_time_rates = on_time_counts / deliveries
+    smoothed_on_time = (on_time_counts + PRIOR_DELIVERIES * on_time.mean()) / (
+        deliveries + PRIOR_DELIVERIES
+    )
+
+    rated = ~np.isnan(ratings)
+    review_counts = np.add.reduceat(rated.astype(float), starts)
+    rating_sums = np.add.reduceat(np.where(rated, ratings, 0.0), starts)
+    with np.errstate(invalid="ignore"):
+        mean_ratings = rating_sums / review_counts
+    overall_rating = ratings[rated].mean() if rated.any() else 3.0
+    smoothed_ratings = (rating_sums + PRIOR_REVIEWS * overall_rating) / (
+        review_counts + PRIOR_REVIEWS
+    )
+
+    # 1 for same day, 0.5 for a day in transit
+    speed = 1 / (1 + np.maximum(medians, 0) / 24)
+
+    scores = (
+        ON_TIME_WEIGHT * smoothed_on_time
+        + RATING_WEIGHT * (smoothed_ratings - 1) / 4
+        + SPEED_WEIGHT * speed
+    )
+
+    return [
+        {
+            "delivery_partner_id": partner_id,
+            "zip_code": int(zip_code),
+            "deliveries": int(count),
+            "on_time_rate": float(on_time_rate),
+            "median_transit_hours": float(median),
+            "rating": None if np.isnan(rating) else float(rating),
+            "score": float(score),
+        }
+        for partner_id, zip_code, count, on_time_rate, median, rating, score in zip(
+            partners[partner_codes[starts]],
+            zip_codes[starts],
+            deliveries,
+            on_time_rates,
+            medians,
+            mean_ratings,
+            scores,
+        )
+    ]
+
+
+class PartnerScoringService:
+    """
+    Recomputes partner_score from the delivered shipments of the last
+    PARTNER_SCORE_WINDOW_DAYS. assign_shipment tries the best scored
+    partners of a zip first.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def _deliveries(self, since: datetime) -> list[np.ndarray]:
+        result = await self.session.execute(
+            text(
+                """
+                SELECT s.delivery_partner_id,
+                       s.destination,
+                       extract(epoch FROM se.created_at - s.created_at)::float8
+                           / 3600,
+                       se.created_at <= s.estimated_delivery,
+                       r.rating
+                FROM shipment s
+                -- first delivered event -> one entry per shipment even if
+                -- the delivery was scanned twice
+                JOIN LATERAL (
+                    SELECT created_at
+                    FROM shipment_event
+                    WHERE shipment_event.shipment_id = s.id
+                        AND shipment_event.created_at >= s.created_at
+                        AND shipment_event.status = 'delivered'
+                    ORDER BY created_at
+                    LIMIT 1
+                ) se ON true
+                LEFT JOIN LATERAL (
+                    SELECT avg(rating)::float8 AS rating
+                    FROM review
+                    WHERE review.shipment_id = s.id
+                ) r ON true
+                WHERE s.created_at >= :since
+                """
+            ),
+            {"since": since},
+        )
+        rows = result.all()
+        if not rows:
+            return [np.array([])] * 5
+
+        partner_ids, zip_codes, transit_hours, on_time, ratings = zip(*rows)
+        return [
+            np.array(partner_ids, dtype=object),
+            np.array(zip_codes, dtype=np.int64),
+            np.array(transit_hours, dtype=np.float64),
+            np.array(on_time, dtype=bool),
+            # None -> nan
+            np.array(ratings, dtype=np.float64),
+        ]
+
+    async def rescore(
+        self, window_days: int = app_settings.PARTNER_SCORE_WINDOW_DAYS
+    ) -> int:
+        deliveries = await self._deliveries(
+            datetime.now() - timedelta(days=window_days)
+        )
+        scores = score_deliveries(*deliveries)
+
+        # replaced in one transaction -> assignment never sees a partial table
+        await self.session.execute(delete(PartnerScore))
+        if scores:
+            await self.session.execute(insert(PartnerScore), scores)
+        await self.session.commit()
+
+        return len(scores)
@@ -0,0 +1,109 @@
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from fastapi import HTTPException, status
+
+from config import app_settings
+from database.models import ShipmentStatus
+from services.delivery_partner import DeliveryPartnerService
+from utils.routing import (
+    ZipCoordinates,
+    haversine_matrix,
+    nearest_neighbor,
+    path_distances,
+    two_opt,
+)
+
+logger = logging.getLogger(__name__)
+
+zip_coordinates = ZipCoordinates(app_settings.ZIP_COORDINATES_FILE)
+
+
+class RoutePlannerService:
+    """
+    Visiting order of a partner's out for delivery shipments, one stop per
+    destination zip: nearest neighbour tour from the start zip improved with
+    2-opt, ETAs from ROUTE_SPEED_KMH and ROUTE_STOP_MINUTES per stop.
+    """
+
+    def __init__(
+        self,
+        partner_service: DeliveryPartnerService,
+        coordinates: ZipCoordinates = zip_coordinates,
+    ):
+        self.partner_service = partner_service
+        self.coordinates = coordinates
+
+    async def plan(self, partner_id: UUID, start: int | None = None) -> dict:
+        stops = []
+        async for group in self.partner_service.stream_manifest(partner_id):
+            shipments = [
+                shipment
+                for shipment in group["shipments"]
+                if shipment["status"] == ShipmentStatus.out_for_delivery
+            ]
+            if shipments:
+                stops.append(
+                    {"destination": group["destination"], "shipments": shipments}
+                )
+
+        if start is None and stops:
+            # where most of the batch was scanned out for delivery
+            start = Counter(
+                shipment["location"] for stop in stops for shipment in stop["shipments"]
+            ).most_common(1)[0][0]
+
+        if not stops:
+            return {"start": start, "distance_km": 0.0, "stops": []}
+
+        if not self.coordinates.available:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Zip code coordinates are not configured",
+            )
+
+        # node 0 is the start, node i the stop i - 1
+        nodes = [start] + [stop["destination"] for stop in stops]
+        distances = haversine_matrix(self.coordinates.lookup(nodes))
+        # not in the file -> placed at the closest listed zip code
+        exact = self.coordinates.exact(nodes)
+        if not exact.all():
+            logger.warning(
+                "zip codes without coordinates, using the closest listed: %s",
+                sorted(
+                    {zip_code for zip_code, known in zip(nodes, exact) if not known}
+                ),
+            )
+        order = two_opt(distances, nearest_neighbor(distances))
+        cumulative = path_distances(distances, order)
+
+        departure = datetime.now()
+        planned = []
+        for position, (node, distance) in enumerate(
+            zip(order[1:], cumulative[1:]), start=1
+        ):
+            stop = stops[node - 1]
+            planned.append(
+                {
+                    "sequence": position,
+                    "destination": stop["destination"],
+                    "distance_km": round(float(distance), 2),
+                    "approximate": not exact[node],
+                    # driving plus the time spent at the stops before
+                    "eta": departure
+                    + timedelta(
+                        hours=float(distance) / app_settings.ROUTE_SPEED_KMH,
+                        minutes=(position - 1) * app_settings.ROUTE_STOP_MINUTES,
+                    ),
+                    "shipments": stop["shipments"],
+                }
+            )
+
+        return {
+            "start": start,
+            "approximate_start": not exact[0],
+            "distance_km": round(float(cumulative[-1]), 2),
+            "stops": planned,
+        }
@@ -0,0 +1,201 @@
+from collections import Counter, defaultdict
+from datetime import date, datetime
+from typing import NamedTuple
+from uuid import UUID
+
+from sqlalchemy import and_, delete, func, text, true
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from database.models import SellerDailyStats, ShipmentStatus
+from services.base import BaseService
+
+# summed on conflict
+COUNTERS = ("entered", "exited", "delivery_seconds", "rating_sum", "rating_count")
+
+
+class StatusChange(NamedTuple):
+    seller_id: UUID
+    # None for a new shipment
+    previous: ShipmentStatus | None
+    # None for a deleted or archived shipment
+    status: ShipmentStatus | None
+    # created -> delivered, delivered changes only
+    delivery_seconds: float = 0.0
+
+
+class SellerStatsService(BaseService):
+    """
+    Per seller, day and status counters for the seller dashboard -> reads are
+    O(days). Writers add their deltas in their own transaction, rebuild()
+    recomputes the rows from the events and reviews still in postgres.
+    Deleted and archived shipments exit their last status -> the current
+    counts only cover shipments still in postgres, like after a rebuild.
+    """
+
+    def __init__(self, session: AsyncSession):
+        super().__init__(SellerDailyStats, session)
+
+    async def _increment(self, deltas: dict[tuple, Counter]):
+        # one row per key -> ON CONFLICT can't update a row twice
+        if not deltas:
+            return
+
+        stmt = insert(SellerDailyStats).values(
+            [
+                {
+                    "seller_id": seller_id,
+                    "day": day,
+                    "status": status,
+                    **{counter: counters[counter] for counter in COUNTERS},
+                }
+                for (seller_id, day, status), counters in deltas.items()
+            ]
+        )
+        await self.session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["seller_id", "day", "status"],
+                set_={
+                    counter: getattr(SellerDailyStats, counter)
+                    + getattr(stmt.excluded, counter)
+                    for counter in COUNTERS
+                },
+            )
+        )
+
+    # not committed -> part of the caller's transaction
+    async def transitions(self, changes: list[StatusChange]):
+        day = datetime.now().date()
+        deltas = defaultdict(Counter)
+
+        for change in changes:
+            # repeated scans in the same status
+            if change.previous == change.status:
+                continue
+
+            if change.status is not None:
+                entered = deltas[(change.seller_id, day, change.status)]
+                entered["entered"] += 1
+                entered["delivery_seconds"] += change.delivery_seconds
+            if change.previous is not None:
+                deltas[(change.seller_id, day, change.previous)]["exited"] += 1
+
+        await self._increment(deltas)
+
+    # reviews count on the delivered row of the day they were written
+    async def review(self, seller_id: UUID, rating: int):
+        await self._increment(
+            {
+                (seller_id, datetime.now().date(), ShipmentStatus.delivered): Counter(
+                    rating_sum=rating, rating_count=1
+                )
+            }
+        )
+
+    async def get(
+        self, seller_id: UUID, start: date | None = None, end: date | None = None
+    ) -> dict:
+        in_period = and_(
+            SellerDailyStats.day >= start if start else true(),
+            SellerDailyStats.day <= end if end else true(),
+        )
+        result = await self.session.execute(
+            select(
+                SellerDailyStats.status,
+                func.sum(SellerDailyStats.entered - SellerDailyStats.exited),
+                func.sum(SellerDailyStats.entered).filter(in_period),
+                func.sum(SellerDailyStats.delivery_seconds).filter(in_period),
+                func.sum(SellerDailyStats.rating_sum).filter(in_period),
+                func.sum(SellerDailyStats.rating_count).filter(in_period),
+            )
+            .where(SellerDailyStats.seller_id == seller_id)
+            .group_by(SellerDailyStats.status)
+        )
+
+        current, reached = {}, {}
+        delivery_seconds = rating_sum = reviews = 0
+        for status, in_status, entered, seconds, ratings, rating_count in result:
+            current[status] = in_status or 0
+            reached[status] = entered or 0
+            delivery_seconds += seconds or 0
+            rating_sum += ratings or 0
+            reviews += rating_count or 0
+
+        delivered = reached.get(ShipmentStatus.delivered, 0)
+        return {
+            "start": start,
+            "end": end,
+            "current": current,
+            "reached": reached,
+            "average_delivery_hours": (
+                delivery_seconds / delivered / 3600 if delivered else None
+            ),
+            "average_rating": rating_sum / reviews if reviews else None,
+            "reviews": reviews,
+        }
+
+    async def rebuild(self, seller_id: UUID | None = None) -> int:
+        """
+        Recompute the rows of one or all sellers, returns the rows written.
+        Archived shipments are no longer in postgres -> their history is lost.
+        """
+        # concurrent writers wait -> their deltas apply on top of the rebuild
+        await self.session.execute(
+            text("LOCK TABLE seller_daily_stats IN EXCLUSIVE MODE")
+        )
+        await self.session.execute(
+            delete(SellerDailyStats).where(
+                SellerDailyStats.seller_id == seller_id if seller_id else true()
+            )
+        )
+
+        seller_filter = "s.seller_id = :seller_id" if seller_id else "true"
+        result = await self.session.execute(
+            text(
+                f"""
+                INSERT INTO seller_daily_stats
+                    (seller_id, day, status, entered, exited,
+                     delivery_seconds, rating_sum, rating_count)
+                WITH changes AS (
+                    SELECT s.seller_id, se.created_at::date AS day, se.status,
+                           lag(se.status) OVER (
+                               PARTITION BY se.shipment_id ORDER BY se.created_at
+                           ) AS previous,
+                           extract(epoch FROM se.created_at - s.created_at)
+                               AS seconds
+                    FROM shipment s
+                    JOIN shipment_event se
+                        ON se.shipment_id = s.id
+                        AND se.created_at >= s.created_at
+                    WHERE {seller_filter}
+                ),
+                deltas AS (
+                    SELECT seller_id, day, status, 1 AS entered, 0 AS exited,
+                           CASE WHEN status = 'delivered' THEN seconds ELSE 0 END
+                               AS delivery_seconds,
+                           0 AS rating_sum, 0 AS rating_count
+                    FROM changes
+                    WHERE previous IS DISTINCT FROM status
+                    UNION ALL
+                    SELECT seller_id, day, previous, 0, 1, 0, 0, 0
+                    FROM changes
+                    WHERE previous IS NOT NULL AND previous <> status
+                    UNION ALL
+                    SELECT s.seller_id, r.created_at::date,
+                           'delivered'::shipmentstatus, 0, 0, 0, r.rating, 1
+                    FROM review r
+                    JOIN shipment s ON s.id = r.shipment_id
+                    WHERE {seller_filter}
+                )
+                SELECT seller_id, day, status, sum(entered), sum(exited),
+                       sum(delivery_seconds), sum(rating_sum), sum(rating_count)
+                FROM deltas
+                GROUP BY seller_id, day, status
+                """
+            ),
+            {"seller_id": seller_id} if seller_id else {},
+        )
+        await self.session.commit()
+
+        return result.rowcount
@@ -1,17 +1,35 @@
-from datetime import datetime, timedelta
-from uuid import UUID
+import asyncio
+from collections import defaultdict
+from datetime import datetime
+from uuid import UUID, uuid4
 
 from fastapi import HTTPException, status
+from sqlalchemy import (
+    Select,
+    column,
+    delete,
+    exists,
+    func,
+    true,
+    tuple_,
+    update,
+    values,
+)
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from sqlmodel import select
 
-from api.schemas.schema import ShipmentCreate
-from core.exceptions import ClientNotAuthorized
+from api.schemas.schema import ShipmentCreate, TagAction
+from core.exceptions import ClientNotAuthorized, EntityNotFound, InvalidCursor
 from database.models import (
+    ArchivedShipment,
+    CLOSED_STATUSES,
     Shipment,
     ShipmentStatus,
     Seller,
+    SellerDailyStats,
     DeliveryPartner,
     ShipmentEvent,
     Review,
@@ -19,10 +37,40 @@ from database.models import (
     Tag,
     ShipmentTag,
 )
+from database.tags import tag_registry
+from services.archive import ArchiveReader
 from services.base import BaseService
 from services.delivery_partner import DeliveryPartnerService
-from services.shipment_event import ShipmentEventService
+from services.eta import eta_engine
+from services.seller_stats import StatusChange
+from services.shipment_event import CANCELLED_EMAIL, ShipmentEventService
 from utils.jwt_auth import decode_url_safe_token
+from utils.pagination import decode_cursor, encode_cursor
+from worker.tasks import queue_template_emails
+
+
+# related data sparse reads can embed -> embed=timeline,tags,seller
+EMBEDS = ("timeline", "tags", "seller")
+
+
+# sparse read with the same keys as ShipmentRead
+READ_FIELDS = ["content", "weight", "destination", "id", "estimated_delivery", "status"]
+
+
+# columns sparse reads can select -> fields=
+def summary_columns() -> dict:
+    return {
+        "id": Shipment.id,
+        "content": Shipment.content,
+        "weight": Shipment.weight,
+        "destination": Shipment.destination,
+        "status": Shipment.current_status,
+        "estimated_delivery": Shipment.estimated_delivery,
+        "created_at": Shipment.created_at,
+        "client_contact_email": Shipment.client_contact_email,
+        "client_contact_phone": Shipment.client_contact_phone,
+        "delivery_partner_id": Shipment.delivery_partner_id,
+    }
 
 
 class ShipmentService(BaseService):
@@ -31,12 +79,14 @@ class ShipmentService(BaseService):
         session: AsyncSession,
         partner_service: DeliveryPartnerService,
         event_service: ShipmentEventService,
+        archive_reader: ArchiveReader | None = None,
     ):
         super().__init__(Shipment, session)
         self.partner_service = partner_service
         self.event_service = event_service
+        self.archive_reader = archive_reader or ArchiveReader()
 
-    async def get(self, id: UUID) -> Shipment | None:
+    async def get(self, id: UUID, include_archived: bool = False) -> Shipment | None:
         # Load seller, delivery partner, and timeline separately
         # Then construct the response manually to avoid SQLModel Relationship issues
 
@@ -46,7 +96,8 @@ class ShipmentService(BaseService):
         shipment = shipment_result.unique().scalar_one_or_none()
 
         if not shipment:
-            return None
+            # archived shipments are read only -> only for read endpoints
+            return await self._get_archived(id) if include_archived else None
 
         # Get seller_id and delivery_partner_id from the shipment
         seller_id = shipment.seller_id
@@ -61,20 +112,21 @@ class ShipmentService(BaseService):
         # Load timeline events
         timeline_stmt = (
             select(ShipmentEvent)
-            .where(ShipmentEvent.shipment_id == id)
+            .where(
+                ShipmentEvent.shipment_id == id,
+                # lower bound -> only partitions since the shipment was created
+                ShipmentEvent.created_at >= shipment.created_at,
+            )
             .order_by(ShipmentEvent.created_at)
         )
         timeline_result = await self.session.execute(timeline_stmt)
         timeline = list(timeline_result.scalars().all())
 
-        # Load tags via the many-to-many relationship
-        tags_stmt = (
-            select(Tag)
-            .join(ShipmentTag, ShipmentTag.tag_id == Tag.id)
-            .where(ShipmentTag.shipment_id == id)
+        # Load tags -> only the link rows, tags come from the registry
+        tag_ids = await self.session.scalars(
+            select(ShipmentTag.tag_id).where(ShipmentTag.shipment_id == id)
         )
-        tags_result = await self.session.execute(tags_stmt)
-        tags = list(tags_result.scalars().all())
+        tags = [await tag_registry.by_id(tag_id) for tag_id in tag_ids]
 
         # Manually set the loaded relationships on the shipment object
         # Use object.__setattr__ to bypass the Relationship descriptor
@@ -85,6 +137,271 @@ class ShipmentService(BaseService):
 
         return shipment
 
+    # rebuild a detached shipment from the parquet archive
+    async def _get_archived(self, id: UUID) -> Shipment | None:
+        # unknown ids never touch the parquet files
+        partition = (
+            await self.session.execute(
+                select(ArchivedShipment.year, ArchivedShipment.month).where(
+                    ArchivedShipment.id == id
+                )
+            )
+        ).first()
+        if partition is None:
+            return None
+
+        data = await asyncio.to_thread(self.archive_reader.get, id, *partition)
+        if data is None:
+            return None
+
+        shipment = Shipment(
+            id=UUID(data["id"]),
+            content=data["content"],
+            weight=data["weight"],
+            destination=data["destination"],
+            estimated_delivery=data["estimated_delivery"],
+            client_contact_email=data["client_contact_email"],
+            client_contact_phone=data["client_contact_phone"],
+            created_at=data["created_at"],
+            seller_id=UUID(data["seller_id"]),
+            delivery_partner_id=UUID(data["delivery_partner_id"]),
+        )
+
+        timeline = [
+            ShipmentEvent(
+                id=UUID(event["id"]),
+                created_at=event["created_at"],
+                location=event["location"],
+                status=ShipmentStatus(event["status"]),
+                description=event["description"],
+                shipment_id=shipment.id,
+            )
+            for event in data["timeline"]
+        ]
+        tags = [
+            Tag(name=TagName(tag["name"]), instruction=tag["instruction"])
+            for tag in data["tags"]
+        ]
+
+        object.__setattr__(
+            shipment, "seller", await self.session.get(Seller, shipment.seller_id)
+        )
+        object.__setattr__(
+            shipment,
+            "delivery_partner",
+            await self.session.get(DeliveryPartner, shipment.delivery_partner_id),
+        )
+        object.__setattr__(shipment, "timeline", timeline)
+        object.__setattr__(shipment, "tags", tags)
+
+        return shipment
+
+    # columns + batched embeds -> only the queries the fields/embeds need
+    def _sparse_select(
+        self, fields: list[str] | None, embed: list[str]
+    ) -> tuple[Select, list[str]]:
+        columns = summary_columns()
+
+        fields = fields or list(columns)
+        unknown = [name for name in fields if name not in columns]
+        unknown += [name for name in embed if name not in EMBEDS]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown)}",
+            )
+
+        stmt = select(
+            Shipment.created_at.label("_created_at"),
+            Shipment.id.label("_id"),
+            Shipment.seller_id.label("_seller_id"),
+            *[columns[name].label(name) for name in fields],
+        )
+        return stmt, fields
+
+    async def _sparse_items(
+        self, rows: list, fields: list[str], embed: list[str]
+    ) -> list[dict]:
+        items = [{name: row._mapping[name] for name in fields} for row in rows]
+        if not rows or not embed:
+            return items
+
+        ids = [row._id for row in rows]
+        embedded: dict[str, dict] = {}
+
+        if "timeline" in embed:
+            result = await self.session.execute(
+                select(
+                    ShipmentEvent.shipment_id,
+                    ShipmentEvent.id,
+                    ShipmentEvent.created_at,
+                    ShipmentEvent.location,
+                    ShipmentEvent.status,
+                    ShipmentEvent.description,
+                )
+                .where(
+                    ShipmentEvent.shipment_id.in_(ids),
+                    ShipmentEvent.created_at >= min(row._created_at for row in rows),
+                )
+                .order_by(ShipmentEvent.shipment_id, ShipmentEvent.created_at)
+            )
+            embedded["timeline"] = defaultdict(list)
+            for event in result.mappings():
+                event = dict(event)
+                embedded["timeline"][event.pop("shipment_id")].append(event)
+
+        if "tags" in embed:
+            result = await self.session.execute(
+                select(ShipmentTag.shipment_id, ShipmentTag.tag_id).where(
+                    ShipmentTag.shipment_id.in_(ids)
+                )
+            )
+            embedded["tags"] = defaultdict(list)
+            for shipment_id, tag_id in result.all():
+                tag = await tag_registry.by_id(tag_id)
+                embedded["tags"][shipment_id].append(
+                    {"name": tag.name, "instruction": tag.instruction}
+                )
+
+        if "seller" in embed:
+            result = await self.session.execute(
+                select(Seller.id, Seller.name, Seller.email).where(
+                    Seller.id.in_({row._seller_id for row in rows})
+                )
+            )
+            sellers = {seller["id"]: dict(seller) for seller in result.mappings()}
+            embedded["seller"] = {row._id: sellers.get(row._seller_id) for row in rows}
+
+        for item, row in zip(items, rows):
+            for name, values in embedded.items():
+                item[name] = values[row._id]
+
+        return items
+
+    # sparse read of an archived shipment -> same keys as _sparse_items
+    def _sparse_archived(
+        self, shipment: Shipment, fields: list[str], embed: list[str]
+    ) -> dict:
+        item = {name: getattr(shipment, name) for name in fields if name != "status"}
+        if "status" in fields:
+            item["status"] = shipment.timeline[-1].status if shipment.timeline else None
+        if "timeline" in embed:
+            item["timeline"] = [
+                event.model_dump(exclude={"shipment_id"}) for event in shipment.timeline
+            ]
+        if "tags" in embed:
+            item["tags"] = [
+                {"name": tag.name, "instruction": tag.instruction}
+                for tag in shipment.tags
+            ]
+        if "seller" in embed:
+            item["seller"] = {
+                "id": shipment.seller.id,
+                "name": shipment.seller.name,
+                "email": shipment.seller.email,
+            }
+        return {name: item[name] for name in [*fields, *embed]}
+
+    # only the requested columns and embeds of a shipment
+    # no embeds -> one indexed row read
+    async def get_sparse(
+        self,
+        id: UUID,
+        fields: list[str] | None = None,
+        embed: list[str] | None = None,
+        include_archived: bool = False,
+    ) -> dict | None:
+        embed = embed or []
+        stmt, fields = self._sparse_select(fields, embed)
+        rows = (await self.session.execute(stmt.where(Shipment.id == id))).all()
+
+        if rows:
+            return (await self._sparse_items(rows, fields, embed))[0]
+
+        if include_archived:
+            shipment = await self._get_archived(id)
+            if shipment is not None:
+                return self._sparse_archived(shipment, fields, embed)
+
+        return None
+
+    # sparse reads of the shipments with a tag
+    async def list_tagged(
+        self,
+        tag_name: TagName,
+        fields: list[str] | None = None,
+        embed: list[str] | None = None,
+    ) -> list[dict]:
+        embed = embed or []
+        stmt, fields = self._sparse_select(fields, embed)
+        tag = await tag_registry.get(tag_name)
+        # (tag_id, shipment_id) index -> no join back to tag
+        stmt = stmt.where(
+            Shipment.id.in_(
+                select(ShipmentTag.shipment_id).where(ShipmentTag.tag_id == tag.id)
+            )
+        )
+
+        rows = (await self.session.execute(stmt)).all()
+        return await self._sparse_items(rows, fields, embed)
+
+    # keyset paginated shipments of a seller, newest first
+    # reads only the requested columns -> no relationship loading
+    async def list_for_seller(
+        self,
+        seller_id: UUID,
+        limit: int = 50,
+        cursor: str | None = None,
+        shipment_status: ShipmentStatus | None = None,
+        tag_name: TagName | None = None,
+        destination: int | None = None,
+        fields: list[str] | None = None,
+        embed: list[str] | None = None,
+    ) -> dict:
+        embed = embed or []
+        stmt, fields = self._sparse_select(fields, embed)
+        stmt = (
+            stmt.where(Shipment.seller_id == seller_id)
+            .order_by(Shipment.created_at.desc(), Shipment.id.desc())
+            .limit(limit + 1)
+        )
+
+        if cursor:
+            position = decode_cursor(cursor)
+            if position is None:
+                raise InvalidCursor()
+            stmt = stmt.where(
+                tuple_(Shipment.created_at, Shipment.id) < tuple_(*position)
+            )
+
+        if shipment_status is not None:
+            stmt = stmt.where(Shipment.current_status == shipment_status)
+
+        if destination is not None:
+            stmt = stmt.where(Shipment.destination == destination)
+
+        if tag_name is not None:
+            tag = await tag_registry.get(tag_name)
+            stmt = stmt.where(
+                exists().where(
+                    ShipmentTag.shipment_id == Shipment.id,
+                    ShipmentTag.tag_id == tag.id,
+                )
+            )
+
+        rows = (await self.session.execute(stmt)).all()
+
+        # the extra row only tells whether another page exists
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]._created_at, rows[-1]._id)
+
+        return {
+            "items": await self._sparse_items(rows, fields, embed),
+            "next_cursor": next_cursor,
+        }
+
     async def add(self, shipment_create: ShipmentCreate, seller: Seller) -> Shipment:
         # Find delivery partner first based on destination
         partner = await self.partner_service.assign_shipment(
@@ -94,7 +411,13 @@ class ShipmentService(BaseService):
         # Create shipment with all required fields including delivery_partner_id
         new_shipment = Shipment(
             **shipment_create.model_dump(),
-            estimated_delivery=datetime.now() + timedelta(days=3),
+            # origin is the placed event's location
+            estimated_delivery=await eta_engine.estimate(
+                self.session,
+                seller.zip_code or shipment_create.destination,
+                shipment_create.destination,
+                partner.id,
+            ),
             seller_id=seller.id,
             delivery_partner_id=partner.id,
         )
@@ -131,11 +454,28 @@ class ShipmentService(BaseService):
 
         # shipment_update is already a dict with only non-None values
         update = shipment_update
+        estimated_delivery = shipment.estimated_delivery
 
         # Update estimated_delivery if provided
         if "estimated_delivery" in update:
             shipment.estimated_delivery = update["estimated_delivery"]
 
+        # otherwise re-estimate open shipments from the scan location
+        else:
+            latest = max(shipment.timeline, key=lambda event: event.created_at)
+            if (update.get("status") or latest.status) not in CLOSED_STATUSES:
+                shipment.estimated_delivery = await eta_engine.estimate(
+                    self.session,
+                    update.get("location") or latest.location,
+                    shipment.destination,
+                    shipment.delivery_partner_id,
+                    [tag.name for tag in shipment.tags],
+                )
+
+        # a new estimate can be overdue again -> delay email again
+        if shipment.estimated_delivery != estimated_delivery:
+            shipment.overdue_notified_at = None
+
         # Create event if there are other fields besides estimated_delivery
         if len(update) > 1 or "estimated_delivery" not in update:
             await self.event_service.add(shipment=shipment, **update)
@@ -164,6 +504,7 @@ class ShipmentService(BaseService):
         )
 
         self.session.add(new_review)
+        await self.event_service.stats.review(shipment.seller_id, rating)
         await self.session.commit()
 
     ### adding a tag
@@ -175,13 +516,7 @@ class ShipmentService(BaseService):
                 detail=f"Shipment with id {id} not found",
             )
 
-        # Get the tag from the database
-        tag = await tag_name.tag(self.session)
-        if tag is None:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Tag {tag_name.value} not found in database",
-            )
+        tag = await tag_registry.get(tag_name)
 
         # Check if the tag is already associated with this shipment
         existing_link = await self.session.execute(
@@ -212,13 +547,7 @@ class ShipmentService(BaseService):
                 detail=f"Shipment with id {id} not found",
             )
 
-        # Get the tag from the database
-        tag = await tag_name.tag(self.session)
-        if tag is None:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Tag {tag_name.value} not found in database",
-            )
+        tag = await tag_registry.get(tag_name)
 
         # Find the link in the ShipmentTag table
         existing_link_result = await self.session.execute(
@@ -241,6 +570,55 @@ class ShipmentService(BaseService):
         # Reload and return the shipment with updated tags
         return await self.get(id)
 
+    # add or remove tags on many shipments of a seller in one transaction
+    # returns the shipments that actually changed
+    async def batch_tags(
+        self,
+        seller: Seller,
+        shipment_ids: list[UUID],
+        tag_names: list[TagName],
+        action: TagAction,
+    ) -> list[UUID]:
+        tag_ids = [(await tag_registry.get(name)).id for name in set(tag_names)]
+        # other sellers' and unknown ids are ignored
+        if action == TagAction.add:
+            tags = values(
+                column("tag_id", postgresql.UUID(as_uuid=True)), name="tags"
+            ).data([(tag_id,) for tag_id in tag_ids])
+            stmt = (
+                insert(ShipmentTag)
+                .from_select(
+                    ["shipment_id", "tag_id"],
+                    select(Shipment.id, tags.c.tag_id)
+                    .join(tags, true())
+                    .where(
+                        Shipment.id.in_(shipment_ids), Shipment.seller_id == seller.id
+                    ),
+                )
+                .on_conflict_do_nothing()
+                .returning(ShipmentTag.shipment_id)
+            )
+        else:
+            stmt = (
+                delete(ShipmentTag)
+                .where(
+                    ShipmentTag.shipment_id.in_(
+                        select(Shipment.id).where(
+                            Shipment.id.in_(shipment_ids),
+                            Shipment.seller_id == seller.id,
+                        )
+                    ),
+                    ShipmentTag.tag_id.in_(tag_ids),
+                )
+                .returning(ShipmentTag.shipment_id)
+            )
+
+        result = await self.session.execute(stmt)
+        affected = set(result.scalars().all())
+        await self.session.commit()
+
+        return sorted(affected)
+
     # cancel shipment
     async def cancel(self, id: UUID, seller: Seller) -> Shipment:
         # validate seller
@@ -251,6 +629,12 @@ class ShipmentService(BaseService):
                 status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authorized"
             )
 
+        if shipment.timeline and shipment.timeline[-1].status in CLOSED_STATUSES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Shipment is already {shipment.timeline[-1].status.value}",
+            )
+
         event = await self.event_service.add(
             shipment=shipment, status=ShipmentStatus.cancelled
         )
@@ -258,11 +642,148 @@ class ShipmentService(BaseService):
         shipment.timeline.append(event)
         return shipment
 
+    # cancel many shipments of a seller: one ownership query, one insert of
+    # cancelled events, emails queued in batches. Closed shipments are skipped.
+    # The shipment rows are locked -> a concurrent scan either commits first
+    # and its status is seen here, or waits for the cancel.
+    async def cancel_many(
+        self, shipment_ids: list[UUID], seller: Seller
+    ) -> tuple[list[UUID], list[UUID]]:
+        latest_event = (
+            select(ShipmentEvent.location)
+            .where(
+                ShipmentEvent.shipment_id == Shipment.id,
+                ShipmentEvent.created_at >= Shipment.created_at,
+            )
+            .order_by(ShipmentEvent.created_at.desc())
+            .limit(1)
+            .lateral("latest_event")
+        )
+        result = await self.session.execute(
+            select(
+                Shipment.id,
+                Shipment.seller_id,
+                Shipment.destination,
+                Shipment.client_contact_email,
+                # re-read once the lock is granted, unlike the lateral join
+                Shipment.current_status.label("status"),
+                latest_event.c.location,
+            )
+            .outerjoin(latest_event, true())
+            .where(Shipment.id.in_(shipment_ids))
+            # same lock order for every caller -> no deadlocks between batches
+            .order_by(Shipment.id)
+            .with_for_update(of=Shipment)
+        )
+        shipments = {row.id: row for row in result.all()}
+
+        if len(shipments) < len(set(shipment_ids)):
+            raise EntityNotFound()
+        if any(row.seller_id != seller.id for row in shipments.values()):
+            raise ClientNotAuthorized()
+
+        open_shipments = [
+            row for row in shipments.values() if row.status not in CLOSED_STATUSES
+        ]
+        skipped = sorted(
+            id for id, row in shipments.items() if row.status in CLOSED_STATUSES
+        )
+        if not open_shipments:
+            return [], skipped
+
+        await self.event_service.stats.transitions(
+            [
+                StatusChange(seller.id, row.status, ShipmentStatus.cancelled)
+                for row in open_shipments
+            ]
+        )
+        now = datetime.now()
+        await self.session.execute(
+            insert(ShipmentEvent),
+            [
+                {
+                    "id": uuid4(),
+                    "created_at": now,
+                    "location": row.location or row.destination,
+                    "status": ShipmentStatus.cancelled,
+                    "description": "shipment cancelled by the seller",
+                    "shipment_id": row.id,
+                }
+                for row in open_shipments
+            ],
+        )
+        await self.session.execute(
+            update(Shipment)
+            .where(Shipment.id.in_([row.id for row in open_shipments]))
+            .values(current_status=ShipmentStatus.cancelled)
+        )
+        await self.session.commit()
+
+        # emails only once the events are committed
+        messages = [
+            {
+                "recipients": [row.client_contact_email],
+                "context": {},
+                **CANCELLED_EMAIL,
+            }
+            for row in open_shipments
+        ]
+        queue_template_emails(messages)
+
+        return sorted(row.id for row in open_shipments), skipped
+
+    # delete the shipments matching the filters with their reviews, tags and
+    # events -> set based in dependency order, one transaction, nothing loaded
+    async def _purge(self, *filters, record_stats: bool = True) -> list[UUID]:
+        shipment_ids = select(Shipment.id).where(*filters)
+        # events never predate their shipment -> prunes the older partitions
+        oldest = select(func.min(Shipment.created_at)).where(*filters).scalar_subquery()
+
+        await self.session.execute(
+            delete(Review).where(Review.shipment_id.in_(shipment_ids))
+        )
+        await self.session.execute(
+            delete(ShipmentTag).where(ShipmentTag.shipment_id.in_(shipment_ids))
+        )
+        await self.session.execute(
+            delete(ShipmentEvent).where(
+                ShipmentEvent.shipment_id.in_(shipment_ids),
+                ShipmentEvent.created_at >= oldest,
+            )
+        )
+        result = await self.session.execute(
+            delete(Shipment)
+            .where(*filters)
+            .returning(Shipment.id, Shipment.seller_id, Shipment.current_status)
+        )
+        rows = result.all()
+        # they leave the seller's current counts
+        if record_stats:
+            await self.event_service.stats.transitions(
+                [StatusChange(row.seller_id, row.current_status, None) for row in rows]
+            )
+        await self.session.commit()
+
+        return sorted(row.id for row in rows)
+
     async def delete(self, id: UUID) -> None:
-        shipment = await self.get(id)
-        if shipment is None:
+        if not await self._purge(Shipment.id == id):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Shipment with id {id} not found",
             )
-        await self._delete(shipment)
+
+    # delete many shipments of a seller, ids of other sellers are left alone
+    async def delete_many(self, shipment_ids: list[UUID], seller: Seller) -> list[UUID]:
+        return await self._purge(
+            Shipment.id.in_(shipment_ids), Shipment.seller_id == seller.id
+        )
+
+    # every shipment of a seller and its dashboard rollup -> GDPR purge
+    async def delete_for_seller(self, seller_id: UUID) -> int:
+        await self.session.execute(
+            delete(SellerDailyStats).where(SellerDailyStats.seller_id == seller_id)
+        )
+        return len(
+            await self._purge(Shipment.seller_id == seller_id, record_stats=False)
+        )
@@ -1,3 +1,8 @@
+from datetime import datetime
+
+from sqlalchemy import inspect
+from sqlmodel import select
+
 from config import app_settings
 from database.models import (
     ShipmentEvent,
@@ -7,13 +12,22 @@ from database.models import (
     DeliveryPartner,
 )
 from services.base import BaseService
+from services.seller_stats import SellerStatsService, StatusChange
 from utils.jwt_auth import generate_url_safe_token
 from worker.tasks import send_template_email
 
 
+# cancellation email -> also sent in batches by ShipmentService.cancel_many
+CANCELLED_EMAIL = {
+    "subject": "Your Order is Cancelled ❌",
+    "template_name": "mail_cancelled.html",
+}
+
+
 class ShipmentEventService(BaseService):
     def __init__(self, session):
         super().__init__(ShipmentEvent, session)
+        self.stats = SellerStatsService(session)
 
     async def add(
         self,
@@ -48,8 +62,41 @@ class ShipmentEventService(BaseService):
 
         await self._notify(shipment, seller, delivery_partner, status)
 
+        await self.stats.transitions(
+            [
+                StatusChange(
+                    shipment.seller_id,
+                    await self._current_status(shipment),
+                    status,
+                    (
+                        (datetime.now() - shipment.created_at).total_seconds()
+                        if status == ShipmentStatus.delivered
+                        else 0.0
+                    ),
+                )
+            ]
+        )
+
+        shipment.current_status = status
         return await self._add(new_event)
 
+    # status before the new event, None for a new shipment
+    async def _current_status(self, shipment: Shipment) -> ShipmentStatus | None:
+        if "timeline" in inspect(shipment).unloaded:
+            return await self.session.scalar(
+                select(ShipmentEvent.status)
+                .where(
+                    ShipmentEvent.shipment_id == shipment.id,
+                    ShipmentEvent.created_at >= shipment.created_at,
+                )
+                .order_by(ShipmentEvent.created_at.desc())
+                .limit(1)
+            )
+
+        if not shipment.timeline:
+            return None
+        return max(shipment.timeline, key=lambda event: event.created_at).status
+
     async def get_latest_event(self, shipment: Shipment):
         timeline = shipment.timeline
         timeline.sort(key=lambda event: event.created_at, reverse=True)
@@ -104,8 +151,8 @@ class ShipmentEventService(BaseService):
                 template_name = "mail_delivered.html"
 
             case ShipmentStatus.cancelled:
-                subject = "Your Order is Cancelled ❌"
-                template_name = "mail_cancelled.html"
+                subject = CANCELLED_EMAIL["subject"]
+                template_name = CANCELLED_EMAIL["template_name"]
 
         send_template_email.delay(
             recipients=[shipment.client_contact_email],
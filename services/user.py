@@ -13,6 +13,21 @@ from utils.jwt_auth import create_token, generate_url_safe_token, decode_url_saf
 from worker.tasks import send_template_email
 
 
+# verification email task arguments for a new user
+def verification_email(id: UUID, name: str, email: str, router_prefix: str) -> dict:
+    token = generate_url_safe_token({"email": email, "id": str(id)})
+
+    return {
+        "recipients": [email],
+        "subject": "Verify Your Account with Fastship",
+        "context": {
+            "username": name,
+            "verification_url": f"http://{app_settings.APP_DOMAIN}/{router_prefix}/verify?token={token}",
+        },
+        "template_name": "mail_email_verify.html",
+    }
+
+
 class UserService(BaseService):
     def __init__(self, model: User, session: AsyncSession):
         self.model = model
@@ -27,16 +42,11 @@ class UserService(BaseService):
         user = self.model(**data, password_hash=hash_password(data["password"]))
 
         new_user = await self._add(user)
-        token = generate_url_safe_token({"email": user.email, "id": str(user.id)})
 
         send_template_email.delay(
-            recipients=[new_user.email],
-            subject="Verify Your Account with Fastship",
-            context={
-                "username": new_user.name,
-                "verification_url": f"http://{app_settings.APP_DOMAIN}/{router_prefix}/verify?token={token}",
-            },
-            template_name="mail_email_verify.html",
+            **verification_email(
+                new_user.id, new_user.name, new_user.email, router_prefix
+            )
         )
 
         return new_user
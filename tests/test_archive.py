@@ -0,0 +1,54 @@
+from datetime import datetime
+from uuid import uuid4
+
+from services.archive import ArchiveReader, ArchiveService
+
+
+def test_archive_round_trip(tmp_path):
+    id, created_at = uuid4(), datetime(2025, 3, 4, 5, 6, 7)
+    partitions = {str(id): (created_at.year, created_at.month)}
+    service = ArchiveService(session=None, root=tmp_path)
+
+    service._write(
+        "shipment",
+        [
+            {
+                "id": str(id),
+                "content": "books",
+                "weight": 1.5,
+                "destination": 11001,
+                "estimated_delivery": created_at,
+                "client_contact_email": "client@example.com",
+                "client_contact_phone": None,
+                "created_at": created_at,
+                "seller_id": str(uuid4()),
+                "delivery_partner_id": str(uuid4()),
+            }
+        ],
+        partitions,
+    )
+    service._write(
+        "shipment_event",
+        [
+            {
+                "id": str(uuid4()),
+                "created_at": created_at,
+                "location": 11001,
+                "status": "delivered",
+                "description": None,
+                "shipment_id": str(id),
+            }
+        ],
+        partitions,
+    )
+
+    reader = ArchiveReader(tmp_path)
+    shipment = reader.get(id, 2025, 3)
+
+    assert shipment["content"] == "books"
+    assert [event["status"] for event in shipment["timeline"]] == ["delivered"]
+    assert shipment["tags"] == [] and shipment["review"] is None
+    assert reader.get(uuid4(), 2025, 3) is None
+    # other partitions are not scanned
+    assert reader.get(id, 2025, 4) is None
+    assert reader.partitions() == [{"id": id, "year": 2025, "month": 3}]
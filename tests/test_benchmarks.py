@@ -0,0 +1,29 @@
+from benchmarks.report import compare, summarize
+
+
+def test_summarize_percentiles():
+    summary = summarize([float(ms) for ms in range(1, 101)], errors=0, elapsed=2)
+
+    assert summary["requests"] == 100
+    assert summary["throughput"] == 50
+    assert summary["p50"] == 50.5
+    assert summary["p99"] == 99.01
+
+
+def test_compare_flags_regressions():
+    baseline = {"get_shipment": {"p95": 10, "p99": 20, "throughput": 100}}
+    results = {
+        "get_shipment": {
+            "requests": 100,
+            "errors": 0,
+            "p95": 11,
+            "p99": 30,
+            "throughput": 70,
+        }
+    }
+
+    regressions = compare(results, baseline, tolerance=0.2)
+
+    assert len(regressions) == 2
+    assert regressions[0].startswith("get_shipment: p99")
+    assert "throughput" in regressions[1]
@@ -0,0 +1,266 @@
+import asyncio
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import delete, func
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import SQLModel, select
+
+from config import db_settings
+from database.models import (
+    DeliveryPartner,
+    Seller,
+    SellerDailyStats,
+    Shipment,
+    ShipmentEvent,
+    ShipmentStatus,
+)
+from database.partitions import ensure_event_partitions
+from services.bulk_import import BulkImportService
+from services.eta import eta_engine
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("QUERY_PLAN_TESTS"),
+    reason="set QUERY_PLAN_TESTS=1 with a throwaway postgres",
+)
+
+
+@pytest.fixture
+async def engine():
+    engine = create_async_engine(db_settings.POSTGRES_URL, poolclass=NullPool)
+    # empty database -> same schema as on startup
+    async with engine.begin() as connection:
+        await connection.run_sync(SQLModel.metadata.create_all)
+        await ensure_event_partitions(connection)
+    yield engine
+    await engine.dispose()
+
+
+def shipment_row(content: str, destination: int = 1, weight: str = "1.5") -> dict:
+    return {
+        "content": content,
+        "weight": weight,
+        "destination": str(destination),
+        "client_contact_email": "client@example.com",
+        "client_contact_phone": "",
+    }
+
+
+async def test_shipment_merge(engine, monkeypatch):
+    estimated = datetime.now() + timedelta(days=2)
+
+    async def estimate(*args, **kwargs):
+        return estimated
+
+    monkeypatch.setattr(eta_engine, "estimate", estimate)
+
+    suffix = uuid4().hex
+    seller = Seller(
+        name="import", email=f"seller-{suffix}@example.com", password_hash="x"
+    )
+    partner = DeliveryPartner(
+        name="import",
+        email=f"partner-{suffix}@example.com",
+        password_hash="x",
+        # no other partner serves zip 1 -> every shipment lands here
+        serviceable_zip_codes=[1],
+        max_handling_capacity=100,
+    )
+    rows = [
+        shipment_row("books"),
+        # identical parcels are separate shipments
+        shipment_row("books"),
+        shipment_row("lamp"),
+        shipment_row("chair", weight="heavy"),
+        # nobody serves zip 2
+        shipment_row("desk", destination=2),
+    ]
+
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            session.add_all([seller, partner])
+            await session.commit()
+
+            report = await BulkImportService(session).import_shipments(
+                rows, seller, notify=False
+            )
+
+        assert report.imported == 3
+        assert report.skipped == 0
+        # line 1 is the csv header
+        assert [error.line for error in report.errors] == [5, 6]
+        assert report.errors[1].detail == "No delivery partner found"
+
+        async with AsyncSession(engine) as session:
+            shipments = (
+                await session.execute(
+                    select(
+                        Shipment.content,
+                        Shipment.delivery_partner_id,
+                        Shipment.estimated_delivery,
+                    ).where(Shipment.seller_id == seller.id)
+                )
+            ).all()
+            placed = await session.scalar(
+                select(func.count())
+                .select_from(ShipmentEvent)
+                .join(Shipment, Shipment.id == ShipmentEvent.shipment_id)
+                .where(
+                    Shipment.seller_id == seller.id,
+                    ShipmentEvent.status == ShipmentStatus.placed,
+                )
+            )
+
+        assert sorted(shipments) == [
+            ("books", partner.id, estimated),
+            ("books", partner.id, estimated),
+            ("lamp", partner.id, estimated),
+        ]
+        assert placed == 3
+    finally:
+        async with AsyncSession(engine) as session:
+            shipment_ids = select(Shipment.id).where(Shipment.seller_id == seller.id)
+            await session.execute(
+                delete(ShipmentEvent).where(ShipmentEvent.shipment_id.in_(shipment_ids))
+            )
+            await session.execute(
+                delete(Shipment).where(Shipment.seller_id == seller.id)
+            )
+            await session.execute(
+                delete(SellerDailyStats).where(SellerDailyStats.seller_id == seller.id)
+            )
+            await session.execute(delete(Seller).where(Seller.id == seller.id))
+            await session.execute(
+                delete(DeliveryPartner).where(DeliveryPartner.id == partner.id)
+            )
+            await session.commit()
+
+
+async def test_partner_merge(engine):
+    suffix = uuid4().hex
+    existing = DeliveryPartner(
+        name="existing",
+        email=f"existing-{suffix}@example.com",
+        password_hash="x",
+        serviceable_zip_codes=[1],
+        max_handling_capacity=5,
+    )
+
+    def partner_row(email: str, capacity: str = "5") -> dict:
+        return {
+            "name": "imported",
+            "email": email,
+            "password": "secret",
+            "serviceable_zip_codes": "1;2",
+            "max_handling_capacity": capacity,
+        }
+
+    rows = [
+        partner_row(f"new-{suffix}@example.com"),
+        # duplicate within the file and an existing email -> skipped
+        partner_row(f"new-{suffix}@example.com"),
+        partner_row(existing.email),
+        partner_row(f"invalid-{suffix}@example.com", capacity="many"),
+    ]
+
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            session.add(existing)
+            await session.commit()
+
+            report = await BulkImportService(session).import_partners(
+                rows, notify=False
+            )
+
+        assert report.imported == 1
+        assert report.skipped == 2
+        assert [error.line for error in report.errors] == [5]
+
+        async with AsyncSession(engine) as session:
+            imported = (
+                await session.execute(
+                    select(
+                        DeliveryPartner.email, DeliveryPartner.serviceable_zip_codes
+                    ).where(DeliveryPartner.email.contains(suffix))
+                )
+            ).all()
+
+        assert sorted(imported) == [
+            (existing.email, [1]),
+            (f"new-{suffix}@example.com", [1, 2]),
+        ]
+    finally:
+        async with AsyncSession(engine) as session:
+            await session.execute(
+                delete(DeliveryPartner).where(DeliveryPartner.email.contains(suffix))
+            )
+            await session.commit()
+
+
+async def test_partner_capacity_is_locked_until_the_merge(engine):
+    suffix = uuid4().hex
+    seller = Seller(
+        name="import", email=f"seller-{suffix}@example.com", password_hash="x"
+    )
+    partner = DeliveryPartner(
+        name="import",
+        email=f"partner-{suffix}@example.com",
+        password_hash="x",
+        serviceable_zip_codes=[3],
+        max_handling_capacity=2,
+    )
+
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            session.add_all([seller, partner])
+            await session.commit()
+
+        async with (
+            AsyncSession(engine, expire_on_commit=False) as first,
+            AsyncSession(engine, expire_on_commit=False) as second,
+        ):
+            capacity = {}
+            await BulkImportService(first)._load_partners(
+                {3}, defaultdict(list), capacity
+            )
+            assert capacity == {partner.id: 2}
+
+            # a second import of the same zip waits for the first merge
+            waiting = {}
+            load = asyncio.create_task(
+                BulkImportService(second)._load_partners(
+                    {3}, defaultdict(list), waiting
+                )
+            )
+            await asyncio.sleep(0.5)
+            assert not load.done()
+
+            first.add(
+                Shipment(
+                    content="books",
+                    weight=1.0,
+                    destination=3,
+                    estimated_delivery=datetime.now(),
+                    client_contact_email="client@example.com",
+                    seller_id=seller.id,
+                    delivery_partner_id=partner.id,
+                )
+            )
+            await first.commit()
+            await load
+
+            assert waiting == {partner.id: 1}
+    finally:
+        async with AsyncSession(engine) as session:
+            await session.execute(
+                delete(Shipment).where(Shipment.seller_id == seller.id)
+            )
+            await session.execute(delete(Seller).where(Seller.id == seller.id))
+            await session.execute(
+                delete(DeliveryPartner).where(DeliveryPartner.id == partner.id)
+            )
+            await session.commit()
@@ -0,0 +1,143 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import delete, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import SQLModel, select
+
+from api.dependencies import get_shipment_service
+from config import db_settings
+from database.models import (
+    DeliveryPartner,
+    Seller,
+    SellerDailyStats,
+    Shipment,
+    ShipmentEvent,
+    ShipmentStatus,
+)
+from database.partitions import ensure_event_partitions
+from worker.tasks import send_template_emails
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("QUERY_PLAN_TESTS"),
+    reason="set QUERY_PLAN_TESTS=1 with a throwaway postgres",
+)
+
+
+async def test_cancel_waits_for_a_concurrent_scan(monkeypatch):
+    engine = create_async_engine(db_settings.POSTGRES_URL, poolclass=NullPool)
+    queued = []
+    monkeypatch.setattr(send_template_emails, "delay", queued.extend)
+
+    suffix = uuid4().hex
+    seller = Seller(
+        name="cancel", email=f"seller-{suffix}@example.com", password_hash="x"
+    )
+    partner = DeliveryPartner(
+        name="cancel",
+        email=f"partner-{suffix}@example.com",
+        password_hash="x",
+        serviceable_zip_codes=[11001],
+        max_handling_capacity=100,
+    )
+    now = datetime.now()
+    delivered, still_open = [
+        Shipment(
+            content="books",
+            destination=11001,
+            estimated_delivery=now + timedelta(days=1),
+            created_at=now,
+            current_status=ShipmentStatus.out_for_delivery,
+            client_contact_email=f"client-{name}@example.com",
+            seller_id=seller.id,
+            delivery_partner_id=partner.id,
+        )
+        for name in ("delivered", "open")
+    ]
+
+    try:
+        # empty database -> same schema as on startup
+        async with engine.begin() as connection:
+            await connection.run_sync(SQLModel.metadata.create_all)
+            await ensure_event_partitions(connection)
+
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            session.add_all([seller, partner])
+            await session.flush()
+            session.add_all([delivered, still_open])
+            await session.commit()
+
+        async with (
+            AsyncSession(engine, expire_on_commit=False) as scan,
+            AsyncSession(engine, expire_on_commit=False) as session,
+        ):
+            # delivered scan written but not committed yet
+            scan.add(
+                ShipmentEvent(
+                    location=11001,
+                    status=ShipmentStatus.delivered,
+                    description="delivered",
+                    shipment_id=delivered.id,
+                )
+            )
+            await scan.execute(
+                update(Shipment)
+                .where(Shipment.id == delivered.id)
+                .values(current_status=ShipmentStatus.delivered)
+            )
+            await scan.flush()
+
+            cancel = asyncio.create_task(
+                get_shipment_service(session).cancel_many(
+                    [delivered.id, still_open.id], seller
+                )
+            )
+            await asyncio.sleep(0.5)
+            # blocked on the scan's row lock
+            assert not cancel.done()
+
+            await scan.commit()
+            cancelled, skipped = await cancel
+
+        assert cancelled == [still_open.id]
+        assert skipped == [delivered.id]
+        assert [message["recipients"] for message in queued] == [
+            [still_open.client_contact_email]
+        ]
+
+        async with AsyncSession(engine) as session:
+            statuses = dict(
+                (
+                    await session.execute(
+                        select(Shipment.id, Shipment.current_status).where(
+                            Shipment.seller_id == seller.id
+                        )
+                    )
+                ).all()
+            )
+        assert statuses == {
+            delivered.id: ShipmentStatus.delivered,
+            still_open.id: ShipmentStatus.cancelled,
+        }
+    finally:
+        async with AsyncSession(engine) as session:
+            shipment_ids = select(Shipment.id).where(Shipment.seller_id == seller.id)
+            await session.execute(
+                delete(ShipmentEvent).where(ShipmentEvent.shipment_id.in_(shipment_ids))
+            )
+            await session.execute(
+                delete(Shipment).where(Shipment.seller_id == seller.id)
+            )
+            await session.execute(
+                delete(SellerDailyStats).where(SellerDailyStats.seller_id == seller.id)
+            )
+            await session.execute(delete(Seller).where(Seller.id == seller.id))
+            await session.execute(
+                delete(DeliveryPartner).where(DeliveryPartner.id == partner.id)
+            )
+            await session.commit()
+        await engine.dispose()
@@ -0,0 +1,98 @@
+import asyncio
+import contextlib
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from config import app_settings
+from services import eta
+from services.eta import EtaEngine
+
+
+def engine_with(hours: dict) -> EtaEngine:
+    engine = EtaEngine()
+    engine._hours = hours
+    engine._refreshed_at = datetime.now()
+    return engine
+
+
+def test_lookup_falls_back_to_wider_keys():
+    partner, other_partner, express = uuid4(), uuid4(), uuid4()
+    engine = engine_with(
+        {
+            11001: {
+                (10001, partner, express): 12.0,
+                (10001, partner): 30.0,
+                (partner,): 40.0,
+                (): 60.0,
+            }
+        }
+    )
+
+    assert engine.lookup(10001, 11001, partner, express) == 12.0
+    # no express history from another origin
+    assert engine.lookup(10002, 11001, partner, express) == 40.0
+    assert engine.lookup(10001, 11001, partner) == 30.0
+    assert engine.lookup(10001, 11001, other_partner) == 60.0
+    assert engine.lookup(10001, 11002, partner) is None
+
+
+async def test_estimate_defaults_without_history():
+    start = datetime(2026, 10, 19, 9, 0)
+    partner = uuid4()
+    engine = engine_with({11001: {(10001, partner): 30.0}})
+
+    assert await engine.estimate(
+        None, 10001, 11001, partner, start=start
+    ) == start + timedelta(hours=30)
+    assert await engine.estimate(
+        None, 10001, 11002, partner, start=start
+    ) == start + timedelta(hours=app_settings.ETA_DEFAULT_HOURS)
+
+
+async def test_refresh_started_before_invalidate_is_dropped():
+    partner = uuid4()
+    engine = engine_with({11001: {(partner,): 30.0}})
+
+    class Session:
+        async def execute(self, *args):
+            # another worker publishes an invalidation meanwhile
+            engine.invalidate()
+            return []
+
+    async def no_tags():
+        return []
+
+    engine._tag_ids = no_tags
+    await engine._refresh(Session())
+
+    # the old table keeps serving, the next refresh reloads everything
+    assert engine.lookup(10001, 11001, partner) == 30.0
+    assert engine._loaded_generation != engine._generation
+
+
+async def test_stale_table_is_refreshed_in_the_background(monkeypatch):
+    partner = uuid4()
+    engine = engine_with({11001: {(partner,): 30.0}})
+    engine._refreshed_at -= timedelta(seconds=engine.refresh_interval + 1)
+    refreshed = asyncio.Event()
+    refreshes = 0
+
+    async def refresh(session):
+        nonlocal refreshes
+        refreshes += 1
+        await refreshed.wait()
+
+    monkeypatch.setattr(eta, "async_session", lambda: contextlib.nullcontext())
+    engine._refresh = refresh
+
+    # both estimates answer from the current table while it refreshes
+    for _ in range(2):
+        estimate = await engine.estimate(
+            None, 10001, 11001, partner, start=datetime(2026, 10, 19)
+        )
+        assert estimate == datetime(2026, 10, 19) + timedelta(hours=30)
+
+    await asyncio.sleep(0)
+    assert refreshes == 1
+    refreshed.set()
+    await engine._refresh_task
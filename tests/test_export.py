@@ -0,0 +1,68 @@
+import csv
+import io
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from httpx import AsyncClient
+
+from api.dependencies import get_export_service, verify_admin_key
+from main import app
+from utils.pagination import encode_cursor
+
+START = datetime(2026, 10, 1, 8, 0)
+REVIEWS = [
+    {
+        "id": uuid4(),
+        "created_at": START + timedelta(minutes=minute),
+        "shipment_id": uuid4(),
+        "rating": 5,
+        "comment": None,
+    }
+    for minute in (0, 1, 1, 2, 3)
+]
+
+
+class FakeExportService:
+    """
+    Rows ordered by (created_at, id) like the keyset query
+    """
+
+    def __init__(self):
+        self.afters = []
+
+    async def rows(self, entity, after=None, **filters):
+        self.afters.append(after)
+        for row in sorted(REVIEWS, key=lambda row: (row["created_at"], row["id"])):
+            if after is None or (row["created_at"], row["id"]) > after:
+                yield {**row, "cursor": encode_cursor(row["created_at"], row["id"])}
+
+
+@pytest.fixture
+def service():
+    service = FakeExportService()
+    app.dependency_overrides[verify_admin_key] = lambda: None
+    app.dependency_overrides[get_export_service] = lambda: service
+    yield service
+    app.dependency_overrides.clear()
+
+
+async def test_invalid_cursor_is_rejected_before_streaming(
+    client: AsyncClient, service
+):
+    response = await client.get("/export/reviews", params={"cursor": "not-a-cursor"})
+
+    assert response.status_code == 400
+    assert service.afters == []
+
+
+async def test_resumed_export_continues_after_the_cursor(client: AsyncClient, service):
+    response = await client.get("/export/reviews")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+
+    # stopped after the second row, same created_at as the third
+    resumed = await client.get("/export/reviews", params={"cursor": rows[1]["cursor"]})
+    rest = list(csv.DictReader(io.StringIO(resumed.text)))
+
+    assert [row["id"] for row in rows[:2] + rest] == [row["id"] for row in rows]
+    assert len(rows) == len(REVIEWS)
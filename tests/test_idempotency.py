@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from core.exceptions import IdempotencyKeyInProgress, IdempotencyKeyReused
+from services import idempotency
+from services.idempotency import IdempotencyService
+
+
+@pytest.fixture
+def store(monkeypatch) -> dict:
+    # in memory replacement of the redis helpers
+    records, locks = {}, {}
+
+    async def get_record(key):
+        return records.get(key)
+
+    async def set_record(key, record, ttl):
+        records[key] = record
+
+    async def acquire_lock(key, ttl):
+        if key in locks:
+            return None
+        locks[key] = token = f"token-{len(records)}-{key}"
+        return token
+
+    async def extend_lock(key, token, ttl):
+        return locks.get(key) == token
+
+    async def release_lock(key, token):
+        if locks.get(key) == token:
+            del locks[key]
+
+    monkeypatch.setattr(idempotency, "get_idempotency_record", get_record)
+    monkeypatch.setattr(idempotency, "set_idempotency_record", set_record)
+    monkeypatch.setattr(idempotency, "acquire_idempotency_lock", acquire_lock)
+    monkeypatch.setattr(idempotency, "extend_idempotency_lock", extend_lock)
+    monkeypatch.setattr(idempotency, "release_idempotency_lock", release_lock)
+    return records
+
+
+async def test_concurrent_duplicates_run_once(store):
+    calls = 0
+
+    async def handler():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.1)
+        return {"id": "shipment"}
+
+    service = IdempotencyService()
+    results = await asyncio.gather(
+        *(service.run("seller:key", {"weight": 1}, handler) for _ in range(3))
+    )
+
+    assert calls == 1
+    assert sorted(replayed for _, replayed in results) == [False, True, True]
+    assert all(response == {"id": "shipment"} for response, _ in results)
+
+
+async def test_key_reused_with_different_payload(store):
+    async def handler():
+        return {"id": "shipment"}
+
+    service = IdempotencyService()
+    await service.run("seller:key", {"weight": 1}, handler)
+
+    with pytest.raises(IdempotencyKeyReused):
+        await service.run("seller:key", {"weight": 2}, handler)
+
+
+async def test_slow_handler_keeps_its_lock(store):
+    calls = 0
+
+    async def handler():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.3)
+        return {"id": "shipment"}
+
+    # the duplicate would give up after lock_timeout -> still in progress
+    service = IdempotencyService(lock_timeout=0.1)
+    first = asyncio.ensure_future(service.run("seller:key", {"weight": 1}, handler))
+    await asyncio.sleep(0.05)
+
+    with pytest.raises(IdempotencyKeyInProgress):
+        await service.run("seller:key", {"weight": 1}, handler)
+
+    assert await first == ({"id": "shipment"}, False)
+    assert calls == 1
@@ -0,0 +1,82 @@
+import logging
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import create_engine
+
+from core.instrumentation import (
+    QueryBudgetExceeded,
+    QueryStatsMiddleware,
+    instrument_engine,
+    query_budget,
+)
+
+
+@pytest.mark.asyncio
+async def test_server_timing_header(client: AsyncClient):
+    response = await client.get("/")
+
+    assert response.status_code == 200
+    assert 'desc="0 queries"' in response.headers["server-timing"]
+
+
+def budgeted_client(strict: bool = False) -> AsyncClient:
+    # sqlite in memory -> real cursor events without a postgres
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+
+    def insert_parcels():
+        with engine.begin() as connection:
+            connection.exec_driver_sql("create temp table parcel (id integer)")
+            connection.exec_driver_sql("insert into parcel values (1), (2), (3)")
+
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware, default_budget=5, strict=strict)
+
+    @app.get("/budgeted")
+    @query_budget(1)
+    async def budgeted():
+        insert_parcels()
+        return {"message": "ok"}
+
+    @app.get("/unbudgeted")
+    async def unbudgeted():
+        insert_parcels()
+        return {"message": "ok"}
+
+    return AsyncClient(transport=ASGITransport(app), base_url="http://testserver")
+
+
+@pytest.mark.asyncio
+async def test_query_stats_are_sent_and_logged(caplog):
+    caplog.set_level(logging.INFO, logger="fastship.db")
+    async with budgeted_client() as client:
+        response = await client.get("/unbudgeted")
+
+    assert 'desc="2 queries"' in response.headers["server-timing"]
+    # under the default budget of 5 -> only the stats line
+    [record] = caplog.records
+    assert record.route == "/unbudgeted"
+    assert record.db_statements == 2
+    assert record.db_rows == 3
+
+
+@pytest.mark.asyncio
+async def test_route_budget_warns(caplog):
+    caplog.set_level(logging.INFO, logger="fastship.db")
+    async with budgeted_client() as client:
+        response = await client.get("/budgeted")
+
+    assert response.status_code == 200
+    assert caplog.records[-1].levelno == logging.WARNING
+    assert caplog.records[-1].getMessage() == (
+        "GET /budgeted issued 2 queries, budget is 1"
+    )
+
+
+@pytest.mark.asyncio
+async def test_route_budget_raises_when_strict():
+    async with budgeted_client(strict=True) as client:
+        with pytest.raises(QueryBudgetExceeded, match="budget is 1"):
+            await client.get("/budgeted")
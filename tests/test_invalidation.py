@@ -0,0 +1,88 @@
+import asyncio
+
+import orjson
+
+from database.invalidation import InvalidationBus
+from database.pool import worker_pool_size
+
+
+class FakeRedis:
+    """
+    One channel, every publish reaches every listening pubsub
+    """
+
+    def __init__(self):
+        self.queues: list[asyncio.Queue] = []
+
+    async def publish(self, channel: str, data: bytes):
+        for queue in self.queues:
+            queue.put_nowait({"type": "message", "data": data})
+
+    def pubsub(self):
+        return FakePubSub(self)
+
+
+class FakePubSub:
+    def __init__(self, redis: FakeRedis):
+        self.redis = redis
+        self.queue = asyncio.Queue()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.redis.queues.remove(self.queue)
+
+    async def subscribe(self, channel: str):
+        self.redis.queues.append(self.queue)
+
+    async def listen(self):
+        while True:
+            yield await self.queue.get()
+
+
+async def test_invalidations_reach_every_worker():
+    redis = FakeRedis()
+    workers = [InvalidationBus(redis), InvalidationBus(redis)]
+    seen = [[], []]
+    for bus, keys in zip(workers, seen):
+        bus.subscribe("tokens", keys.append)
+        await bus.start()
+    # caches loaded before the first subscribe are kept
+    assert seen == [[], []]
+
+    await workers[0].publish("tokens", "jti-1")
+    await workers[1].publish("tags")
+    await asyncio.sleep(0)
+
+    # own messages applied once, unknown caches ignored
+    assert seen == [["jti-1"], ["jti-1"]]
+
+    for bus in workers:
+        await bus.stop()
+
+
+async def test_messages_of_other_processes_are_applied():
+    redis = FakeRedis()
+    bus = InvalidationBus(redis)
+    keys = []
+    bus.subscribe("eta", keys.append)
+    await bus.start()
+
+    await redis.publish(
+        "", orjson.dumps({"origin": "other", "cache": "eta", "key": None})
+    )
+    await asyncio.sleep(0)
+
+    assert keys == [None]
+    await bus.stop()
+
+
+def test_worker_pools_stay_within_max_connections():
+    pool_size, max_overflow = worker_pool_size(100, 8, hosts=2, reserved=20)
+
+    assert (pool_size, max_overflow) == (3, 2)
+    assert (pool_size + max_overflow) * 8 * 2 <= 100 - 20
+
+    # never below one connection
+    assert worker_pool_size(10, 16, reserved=20) == (1, 0)
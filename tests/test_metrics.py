@@ -0,0 +1,50 @@
+import subprocess
+import sys
+
+from prometheus_client import generate_latest
+
+from core import metrics
+from core.metrics import metrics_registry, reset_multiprocess_dir
+
+
+def test_collector_sees_child_samples(tmp_path, monkeypatch):
+    directory = tmp_path / "prometheus"
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(directory))
+    reset_multiprocess_dir()
+
+    # a celery prefork child -> records into the shared directory
+    subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "from core.metrics import EMAIL_SEND_DURATION;"
+            "EMAIL_SEND_DURATION.observe(0.2)",
+        ],
+        check=True,
+    )
+
+    output = generate_latest(metrics_registry()).decode()
+    assert "celery_send_template_email_duration_seconds_count 1.0" in output
+
+
+def test_reset_multiprocess_dir_drops_old_files(tmp_path, monkeypatch):
+    directory = tmp_path / "prometheus"
+    directory.mkdir()
+    (directory / "histogram_1.db").write_bytes(b"stale")
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(directory))
+
+    reset_multiprocess_dir()
+
+    assert list(directory.iterdir()) == []
+
+
+def test_failed_publish_does_not_leak(monkeypatch):
+    monkeypatch.setattr(metrics, "_publish_started", {})
+    # publish failed -> no after_task_publish for this id
+    metrics._before_task_publish(sender="t", headers={"id": "failed"})
+    metrics._publish_started["failed"] -= metrics.PUBLISH_STALE_AFTER
+
+    metrics._before_task_publish(sender="t", headers={"id": "next"})
+    metrics._after_task_publish(sender="t", headers={"id": "next"})
+
+    assert metrics._publish_started == {}
@@ -0,0 +1,172 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import SQLModel
+
+from config import db_settings
+from database.models import DeliveryPartner, Seller, Shipment, ShipmentStatus
+from database.partitions import ensure_event_partitions
+from services.overdue import OverdueService
+from worker.tasks import send_template_emails
+
+
+class FakeSession:
+    def __init__(self):
+        self.commits = self.rollbacks = 0
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+
+async def test_chunks_are_walked_per_status_with_a_keyset_cursor(monkeypatch):
+    due = datetime(2026, 10, 1, 12, 0)
+    shipments = [
+        SimpleNamespace(
+            id=uuid4(),
+            estimated_delivery=due + timedelta(hours=hour),
+            client_contact_email=f"client{hour}@example.com",
+        )
+        for hour in range(3)
+    ]
+    # two chunks of in_transit shipments, nothing else overdue
+    chunks = {ShipmentStatus.in_transit: [shipments[:2], shipments[2:]]}
+    cursors = []
+
+    async def claim(self, status, now, after):
+        cursors.append((status, after))
+        pending = chunks.get(status, [])
+        return pending.pop(0) if pending else []
+
+    batches = []
+    monkeypatch.setattr(OverdueService, "_claim", claim)
+    monkeypatch.setattr(send_template_emails, "delay", batches.append)
+
+    session = FakeSession()
+    assert await OverdueService(session, chunk_size=2).notify_overdue() == 3
+    # one transaction per chunk
+    assert session.commits == 2
+
+    in_transit = [after for status, after in cursors if status == "in_transit"]
+    assert in_transit == [
+        None,
+        (shipments[1].estimated_delivery, shipments[1].id),
+        (shipments[2].estimated_delivery, shipments[2].id),
+    ]
+    assert [message["recipients"] for batch in batches for message in batch] == [
+        [shipment.client_contact_email] for shipment in shipments
+    ]
+    assert batches[0][0]["template_name"] == "mail_delayed.html"
+
+
+async def test_claims_are_rolled_back_when_emails_are_not_queued(monkeypatch):
+    shipment = SimpleNamespace(
+        id=uuid4(),
+        estimated_delivery=datetime(2026, 10, 1, 12, 0),
+        client_contact_email="client@example.com",
+    )
+
+    async def claim(self, status, now, after):
+        return [shipment] if after is None else []
+
+    def broker_down(messages):
+        raise ConnectionError("broker unreachable")
+
+    monkeypatch.setattr(OverdueService, "_claim", claim)
+    monkeypatch.setattr(send_template_emails, "delay", broker_down)
+
+    session = FakeSession()
+    with pytest.raises(ConnectionError):
+        await OverdueService(session).notify_overdue()
+
+    assert (session.commits, session.rollbacks) == (0, 1)
+
+
+@pytest.mark.skipif(
+    not os.environ.get("QUERY_PLAN_TESTS"),
+    reason="set QUERY_PLAN_TESTS=1 with a throwaway postgres",
+)
+async def test_concurrent_runs_claim_each_overdue_shipment_once(monkeypatch):
+    engine = create_async_engine(db_settings.POSTGRES_URL, poolclass=NullPool)
+    now = datetime.now()
+    seller = Seller(name="overdue", email="overdue@example.com", password_hash="x")
+    partner = DeliveryPartner(
+        name="overdue",
+        email="overdue-partner@example.com",
+        password_hash="x",
+        serviceable_zip_codes=[11001],
+        max_handling_capacity=100,
+    )
+
+    def shipment(hours: int, status: ShipmentStatus, notified: bool = False):
+        return Shipment(
+            content="books",
+            destination=11001,
+            estimated_delivery=now + timedelta(hours=hours),
+            current_status=status,
+            overdue_notified_at=now if notified else None,
+            client_contact_email="client@example.com",
+            client_contact_phone=None,
+            seller_id=seller.id,
+            delivery_partner_id=partner.id,
+        )
+
+    overdue_shipments = [
+        shipment(-hours, ShipmentStatus.in_transit) for hours in range(1, 6)
+    ] + [shipment(-1, ShipmentStatus.placed)]
+    others = [
+        shipment(1, ShipmentStatus.in_transit),
+        shipment(-1, ShipmentStatus.delivered),
+        shipment(-1, ShipmentStatus.in_transit, notified=True),
+    ]
+
+    queued = []
+    monkeypatch.setattr(
+        OverdueService,
+        "_enqueue_emails",
+        lambda self, rows: queued.extend(row.id for row in rows),
+    )
+
+    async def run() -> int:
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            return await OverdueService(session, chunk_size=2).notify_overdue()
+
+    try:
+        # empty database -> same schema as on startup
+        async with engine.begin() as connection:
+            await connection.run_sync(SQLModel.metadata.create_all)
+            await ensure_event_partitions(connection)
+
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            session.add_all([seller, partner])
+            await session.flush()
+            session.add_all(overdue_shipments + others)
+            await session.commit()
+
+        # partial index, SKIP LOCKED and the keyset cursor together
+        # the database may hold other overdue shipments as well
+        assert sum(await asyncio.gather(run(), run(), run())) == len(queued)
+        assert len(set(queued)) == len(queued)
+        assert {s.id for s in overdue_shipments} <= set(queued)
+        assert not {s.id for s in others} & set(queued)
+        assert await run() == 0
+    finally:
+        async with AsyncSession(engine) as session:
+            await session.execute(
+                delete(Shipment).where(Shipment.seller_id == seller.id)
+            )
+            await session.execute(delete(Seller).where(Seller.id == seller.id))
+            await session.execute(
+                delete(DeliveryPartner).where(DeliveryPartner.id == partner.id)
+            )
+            await session.commit()
+        await engine.dispose()
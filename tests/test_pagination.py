@@ -0,0 +1,19 @@
+from datetime import datetime
+from uuid import uuid4
+
+from utils.pagination import decode_cursor, encode_cursor, split_csv
+
+
+def test_cursor_round_trip():
+    created_at, id = datetime(2026, 1, 2, 3, 4, 5, 6), uuid4()
+
+    assert decode_cursor(encode_cursor(created_at, id)) == (created_at, id)
+
+
+def test_invalid_cursor():
+    assert decode_cursor("not-a-cursor") is None
+
+
+def test_split_csv():
+    assert split_csv("id, status,,") == ["id", "status"]
+    assert split_csv(None) == []
@@ -0,0 +1,164 @@
+import os
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import numpy as np
+import pytest
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import SQLModel, select
+
+from config import db_settings
+from database.models import (
+    DeliveryPartner,
+    PartnerScore,
+    Seller,
+    SellerDailyStats,
+    Shipment,
+    ShipmentEvent,
+    ShipmentStatus,
+)
+from database.partitions import ensure_event_partitions
+from services.partner_scoring import PartnerScoringService, score_deliveries
+
+
+def test_scores_per_partner_and_zip():
+    fast, slow = "partner-fast", "partner-slow"
+    scores = score_deliveries(
+        np.array([slow, fast, fast, fast, slow, fast], dtype=object),
+        np.array([1000, 1000, 1000, 1000, 1000, 2000]),
+        np.array([72.0, 10.0, 30.0, 20.0, 90.0, 5.0]),
+        np.array([False, True, True, False, False, True]),
+        np.array([2.0, 5.0, np.nan, 4.0, np.nan, np.nan]),
+    )
+
+    by_key = {(s["delivery_partner_id"], s["zip_code"]): s for s in scores}
+    assert set(by_key) == {(fast, 1000), (fast, 2000), (slow, 1000)}
+
+    assert by_key[(fast, 1000)]["deliveries"] == 3
+    assert by_key[(fast, 1000)]["median_transit_hours"] == 20.0
+    assert by_key[(fast, 1000)]["on_time_rate"] == pytest.approx(2 / 3)
+    assert by_key[(fast, 1000)]["rating"] == 4.5
+    # even group -> mean of the middle two
+    assert by_key[(slow, 1000)]["median_transit_hours"] == 81.0
+    assert by_key[(fast, 2000)]["rating"] is None
+
+    assert by_key[(fast, 1000)]["score"] > by_key[(slow, 1000)]["score"]
+
+
+def test_no_deliveries():
+    assert score_deliveries(*[np.array([])] * 5) == []
+
+
+@pytest.mark.skipif(
+    not os.environ.get("QUERY_PLAN_TESTS"),
+    reason="set QUERY_PLAN_TESTS=1 with a throwaway postgres",
+)
+async def test_deliveries_count_every_shipment_once():
+    engine = create_async_engine(db_settings.POSTGRES_URL, poolclass=NullPool)
+    now = datetime.now()
+    suffix = uuid4().hex
+    seller = Seller(
+        name="score", email=f"seller-{suffix}@example.com", password_hash="x"
+    )
+    partner = DeliveryPartner(
+        name="score",
+        email=f"partner-{suffix}@example.com",
+        password_hash="x",
+        serviceable_zip_codes=[11001],
+        max_handling_capacity=10,
+    )
+    shipment = Shipment(
+        content="books",
+        destination=11001,
+        estimated_delivery=now + timedelta(hours=10),
+        created_at=now,
+        current_status=ShipmentStatus.delivered,
+        client_contact_email="client@example.com",
+        seller_id=seller.id,
+        delivery_partner_id=partner.id,
+    )
+    # delivery scanned twice -> the first scan counts
+    events = [
+        ShipmentEvent(
+            created_at=now + timedelta(hours=hours),
+            location=11001,
+            status=ShipmentStatus.delivered,
+            description="delivered",
+            shipment_id=shipment.id,
+        )
+        for hours in (6, 12)
+    ]
+
+    try:
+        # empty database -> same schema as on startup
+        async with engine.begin() as connection:
+            await connection.run_sync(SQLModel.metadata.create_all)
+            await ensure_event_partitions(connection)
+
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            session.add_all([seller, partner])
+            await session.flush()
+            session.add(shipment)
+            await session.flush()
+            session.add_all(events)
+            await session.commit()
+
+            partner_ids, _, transit_hours, on_time, _ = await PartnerScoringService(
+                session
+            )._deliveries(now - timedelta(hours=1))
+
+            mine = partner_ids == partner.id
+            assert transit_hours[mine].tolist() == pytest.approx([6.0])
+            assert on_time[mine].tolist() == [True]
+
+            # scores go with a deleted partner
+            session.add(
+                PartnerScore(
+                    delivery_partner_id=partner.id,
+                    zip_code=11001,
+                    deliveries=1,
+                    on_time_rate=1.0,
+                    median_transit_hours=6.0,
+                    score=0.9,
+                )
+            )
+            await session.commit()
+            await session.execute(
+                delete(ShipmentEvent).where(ShipmentEvent.shipment_id == shipment.id)
+            )
+            await session.execute(delete(Shipment).where(Shipment.id == shipment.id))
+            await session.execute(
+                delete(DeliveryPartner).where(DeliveryPartner.id == partner.id)
+            )
+            await session.commit()
+
+            assert (
+                await session.scalar(
+                    select(PartnerScore).where(
+                        PartnerScore.delivery_partner_id == partner.id
+                    )
+                )
+                is None
+            )
+    finally:
+        async with AsyncSession(engine) as session:
+            await session.execute(
+                delete(ShipmentEvent).where(ShipmentEvent.shipment_id == shipment.id)
+            )
+            await session.execute(delete(Shipment).where(Shipment.id == shipment.id))
+            await session.execute(
+                delete(SellerDailyStats).where(SellerDailyStats.seller_id == seller.id)
+            )
+            await session.execute(delete(Seller).where(Seller.id == seller.id))
+            await session.execute(
+                delete(PartnerScore).where(
+                    PartnerScore.delivery_partner_id == partner.id
+                )
+            )
+            await session.execute(
+                delete(DeliveryPartner).where(DeliveryPartner.id == partner.id)
+            )
+            await session.commit()
+        await engine.dispose()
@@ -0,0 +1,39 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from core.profiling import ProfilerMiddleware
+
+
+def profiled_client(directory) -> AsyncClient:
+    app = FastAPI()
+    app.add_middleware(ProfilerMiddleware, admin_key="secret", directory=directory)
+
+    @app.get("/")
+    async def root():
+        return {"message": "ok"}
+
+    return AsyncClient(transport=ASGITransport(app), base_url="http://testserver")
+
+
+@pytest.mark.asyncio
+async def test_profile_requires_admin_key(tmp_path):
+    async with profiled_client(tmp_path) as client:
+        response = await client.get("/", params={"profile": 1})
+
+    assert "x-profile" not in response.headers
+    assert not list(tmp_path.iterdir())
+
+
+@pytest.mark.asyncio
+async def test_profile_writes_speedscope_file(tmp_path):
+    async with profiled_client(tmp_path) as client:
+        response = await client.get(
+            "/", headers={"X-Profile": "1", "X-Admin-Key": "secret"}
+        )
+
+    assert response.json() == {"message": "ok"}
+    profile = json.loads((tmp_path / response.headers["x-profile"]).read_text())
+    assert profile["$schema"].startswith("https://www.speedscope.app")
@@ -0,0 +1,205 @@
+"""
+Query plan regression tests for the hot queries.
+
+Each hot query is a real service call; the statements it executes are
+captured and EXPLAINed with their parameters. Fails on sequential scans of
+tables above SEQ_SCAN_MAX_ROWS and on plans differing from the snapshots in
+tests/plan_snapshots (UPDATE_PLAN_SNAPSHOTS=1 rewrites them -> review the diff
+and commit them; a missing snapshot fails).
+
+Needs a throwaway postgres: QUERY_PLAN_TESTS=1 with the POSTGRES_* settings.
+A representative dataset is seeded with benchmarks.seed when it is empty.
+"""
+
+import asyncio
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from uuid import UUID
+
+import pytest
+from sqlalchemy import event, func, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import select
+
+from benchmarks import STATE_FILE
+from config import db_settings
+from database.models import Shipment, TagName
+from routers.shipment import get_tagged_shipments
+from services.delivery_partner import DeliveryPartnerService
+from services.shipment import ShipmentService
+from services.shipment_event import ShipmentEventService
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("QUERY_PLAN_TESTS"),
+    reason="set QUERY_PLAN_TESTS=1 with a throwaway postgres",
+)
+
+SNAPSHOT_DIR = Path(__file__).parent / "plan_snapshots"
+SEQ_SCAN_MAX_ROWS = int(os.environ.get("SEQ_SCAN_MAX_ROWS", 1000))
+SEED_SHIPMENTS = 50_000
+
+_PARTITION = re.compile(r"^(shipment_event)_(y\d{4}m\d{2}|default)$")
+
+
+@pytest.fixture(scope="module")
+def dataset() -> dict:
+    async def shipment_count() -> int:
+        engine = create_async_engine(db_settings.POSTGRES_URL, poolclass=NullPool)
+        try:
+            async with engine.connect() as connection:
+                return await connection.scalar(select(func.count(Shipment.id)))
+        finally:
+            await engine.dispose()
+
+    async def vacuum():
+        engine = create_async_engine(
+            db_settings.POSTGRES_URL, poolclass=NullPool, isolation_level="AUTOCOMMIT"
+        )
+        try:
+            async with engine.connect() as connection:
+                await connection.execute(text("VACUUM (ANALYZE)"))
+        finally:
+            await engine.dispose()
+
+    if not STATE_FILE.exists() or asyncio.run(shipment_count()) < SEED_SHIPMENTS:
+        subprocess.run(
+            [
+                sys.executable,
+                *("-m", "benchmarks.seed"),
+                *("--sellers", "10", "--partners", "100"),
+                *("--shipments", str(SEED_SHIPMENTS)),
+            ],
+            check=True,
+        )
+
+    # fresh statistics and visibility map -> plans don't depend on whether
+    # autovacuum ran since the last writes
+    asyncio.run(vacuum())
+
+    return json.loads(STATE_FILE.read_text())
+
+
+@pytest.fixture
+async def session():
+    # fresh engine per test -> pooled asyncpg connections are tied to a loop
+    engine = create_async_engine(db_settings.POSTGRES_URL, poolclass=NullPool)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        yield session
+    await engine.dispose()
+
+
+def _capture(session: AsyncSession) -> list[tuple[str, tuple]]:
+    statements = []
+
+    @event.listens_for(session.bind.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        if not statement.lstrip().upper().startswith("EXPLAIN"):
+            statements.append((statement, tuple(parameters or ())))
+
+    return statements
+
+
+def _shape(plan: dict) -> dict:
+    # node types and relations only -> costs and row estimates vary per run
+    shape = {"node": plan["Node Type"]}
+    if relation := plan.get("Relation Name"):
+        shape["relation"] = _PARTITION.sub(r"\1_*", relation)
+    if index := plan.get("Index Name"):
+        shape["index"] = _PARTITION.sub(r"\1_*", index)
+
+    children = []
+    for child in plan.get("Plans", []):
+        # one entry per distinct partition plan
+        if (child_shape := _shape(child)) not in children:
+            children.append(child_shape)
+    if children:
+        shape["children"] = children
+    return shape
+
+
+def _seq_scans(plan: dict):
+    if plan["Node Type"] == "Seq Scan":
+        yield plan["Relation Name"]
+    for child in plan.get("Plans", []):
+        yield from _seq_scans(child)
+
+
+async def _explain(session: AsyncSession, statements) -> list[dict]:
+    connection = await session.connection()
+    driver = (await connection.get_raw_connection()).driver_connection
+
+    plans, seen = [], set()
+    # copied -> the reltuples lookups below are captured as well
+    for statement, parameters in list(statements):
+        if statement in seen:
+            continue
+        seen.add(statement)
+
+        # the dialect's json codec already decodes the plan
+        result = await driver.fetchval(
+            f"EXPLAIN (FORMAT JSON) {statement}", *parameters
+        )
+        plan = result[0]["Plan"]
+
+        for relation in _seq_scans(plan):
+            rows = await session.scalar(
+                text("SELECT reltuples FROM pg_class WHERE relname = :relation"),
+                {"relation": relation},
+            )
+            assert (
+                rows <= SEQ_SCAN_MAX_ROWS
+            ), f"Seq Scan on {relation} (~{rows:.0f} rows) in:\n{statement}"
+
+        plans.append(_shape(plan))
+
+    return plans
+
+
+def _check_snapshot(name: str, plans: list[dict]):
+    file = SNAPSHOT_DIR / f"{name}.json"
+    if os.environ.get("UPDATE_PLAN_SNAPSHOTS"):
+        SNAPSHOT_DIR.mkdir(exist_ok=True)
+        file.write_text(json.dumps(plans, indent=2) + "\n")
+        pytest.skip(f"plan snapshot written to {file}")
+
+    # new hot queries need a reviewed snapshot committed with them
+    if not file.exists():
+        pytest.fail(f"no plan snapshot {file} -> run with UPDATE_PLAN_SNAPSHOTS=1")
+
+    assert plans == json.loads(
+        file.read_text()
+    ), f"plans of {name} changed -> rerun with UPDATE_PLAN_SNAPSHOTS=1 and review"
+
+
+def shipment_service(session: AsyncSession) -> ShipmentService:
+    return ShipmentService(
+        session, DeliveryPartnerService(session), ShipmentEventService(session)
+    )
+
+
+async def test_assign_shipment_plans(dataset, session):
+    statements = _capture(session)
+    await DeliveryPartnerService(session).assign_shipment(dataset["destinations"][0])
+
+    _check_snapshot("assign_shipment", await _explain(session, statements))
+
+
+async def test_shipment_get_plans(dataset, session):
+    statements = _capture(session)
+    await shipment_service(session).get(UUID(dataset["shipments"][0]))
+
+    _check_snapshot("shipment_get", await _explain(session, statements))
+
+
+async def test_tagged_shipments_plans(dataset, session):
+    statements = _capture(session)
+    await get_tagged_shipments(
+        TagName(dataset["tagged"]), shipment_service(session), fields=None, embed=None
+    )
+
+    _check_snapshot("tagged_shipments", await _explain(session, statements))
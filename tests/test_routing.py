@@ -0,0 +1,133 @@
+import itertools
+import time
+from uuid import uuid4
+
+import numpy as np
+
+from database.models import ShipmentStatus
+from services.route_planner import RoutePlannerService
+from utils.routing import (
+    ZipCoordinates,
+    gazetteer_coordinates,
+    haversine_matrix,
+    nearest_neighbor,
+    path_distances,
+    two_opt,
+)
+
+
+def test_two_opt_matches_the_best_open_path():
+    rng = np.random.default_rng(7)
+    distances = haversine_matrix(
+        np.c_[rng.uniform(40, 41, 8), rng.uniform(-74, -73, 8)]
+    )
+
+    order = two_opt(distances, nearest_neighbor(distances))
+    best = min(
+        path_distances(distances, np.array((0, *rest)))[-1]
+        for rest in itertools.permutations(range(1, 8))
+    )
+
+    assert order[0] == 0 and sorted(order) == list(range(8))
+    # 2-opt is a local search -> close to, not always at, the optimum
+    assert path_distances(distances, order)[-1] <= best * 1.1
+
+
+def test_a_few_hundred_stops_in_well_under_a_second():
+    rng = np.random.default_rng(1)
+    coordinates = np.c_[rng.uniform(40, 41, 300), rng.uniform(-74, -73, 300)]
+
+    started = time.perf_counter()
+    distances = haversine_matrix(coordinates)
+    order = two_opt(distances, nearest_neighbor(distances))
+
+    assert time.perf_counter() - started < 1
+    assert sorted(order) == list(range(300))
+
+
+def test_missing_zip_codes_use_the_closest_one(tmp_path):
+    file = tmp_path / "zip_coordinates.csv"
+    file.write_text(
+        "zip_code,latitude,longitude\n10001,40.75,-73.99\n10301,40.63,-74.09\n"
+    )
+
+    coordinates = ZipCoordinates(file)
+    assert coordinates.lookup([10001, 10002, 10300]).tolist() == [
+        [40.75, -73.99],
+        [40.75, -73.99],
+        [40.63, -74.09],
+    ]
+    assert coordinates.exact([10001, 10002, 10300]).tolist() == [True, False, False]
+
+
+def test_gazetteer_coordinates():
+    # tab separated, the last header name padded with spaces
+    lines = [
+        "GEOID\tALAND\tAWATER\tALAND_SQMI\tAWATER_SQMI\tINTPTLAT\tINTPTLONG      \n",
+        "00601\t166847909\t799292\t64.42\t0.309\t18.180555\t-66.749961       \n",
+        "10001\t1643318\t0\t0.634\t0\t40.750650\t-73.997298\n",
+    ]
+
+    assert list(gazetteer_coordinates(lines)) == [
+        (601, 18.180555, -66.749961),
+        (10001, 40.75065, -73.997298),
+    ]
+
+
+class FakePartnerService:
+    def __init__(self, groups):
+        self.groups = groups
+
+    async def stream_manifest(self, partner_id):
+        for group in self.groups:
+            yield group
+
+
+def shipment(location: int, status=ShipmentStatus.out_for_delivery) -> dict:
+    return {"id": uuid4(), "status": status, "location": location}
+
+
+async def test_plan_orders_the_out_for_delivery_stops(tmp_path):
+    file = tmp_path / "zip_coordinates.csv"
+    file.write_text(
+        "zip_code,latitude,longitude\n"
+        "100,0.0,0.0\n200,0.0,0.3\n300,0.0,0.1\n400,0.0,0.2\n"
+    )
+    groups = [
+        {"destination": 200, "shipments": [shipment(100)]},
+        {"destination": 300, "shipments": [shipment(100), shipment(100)]},
+        {"destination": 400, "shipments": [shipment(100)]},
+        # still in transit -> not part of the batch
+        {"destination": 500, "shipments": [shipment(100, ShipmentStatus.in_transit)]},
+    ]
+
+    plan = await RoutePlannerService(
+        FakePartnerService(groups), ZipCoordinates(file)
+    ).plan(uuid4())
+
+    assert plan["start"] == 100
+    assert [stop["destination"] for stop in plan["stops"]] == [300, 400, 200]
+    etas = [stop["eta"] for stop in plan["stops"]]
+    assert etas == sorted(etas)
+    assert plan["distance_km"] == plan["stops"][-1]["distance_km"]
+    assert not any(stop["approximate"] for stop in plan["stops"])
+
+
+async def test_plan_flags_zip_codes_without_coordinates(tmp_path, caplog):
+    file = tmp_path / "zip_coordinates.csv"
+    file.write_text("zip_code,latitude,longitude\n100,0.0,0.0\n300,0.0,0.1\n")
+    groups = [
+        {"destination": 300, "shipments": [shipment(100)]},
+        {"destination": 301, "shipments": [shipment(100)]},
+    ]
+
+    plan = await RoutePlannerService(
+        FakePartnerService(groups), ZipCoordinates(file)
+    ).plan(uuid4())
+
+    assert not plan["approximate_start"]
+    assert {stop["destination"]: stop["approximate"] for stop in plan["stops"]} == {
+        300: False,
+        301: True,
+    }
+    assert "[301]" in caplog.text
@@ -0,0 +1,64 @@
+from uuid import uuid4
+
+from database.models import ShipmentStatus
+from services.seller_stats import SellerStatsService, StatusChange
+
+
+async def test_transitions_are_aggregated_per_row(monkeypatch):
+    increments = []
+
+    async def increment(self, deltas):
+        increments.append(deltas)
+
+    monkeypatch.setattr(SellerStatsService, "_increment", increment)
+    seller_id = uuid4()
+
+    await SellerStatsService(None).transitions(
+        [
+            StatusChange(seller_id, None, ShipmentStatus.placed),
+            StatusChange(seller_id, None, ShipmentStatus.placed),
+            StatusChange(seller_id, ShipmentStatus.placed, ShipmentStatus.in_transit),
+            # another scan in the same status
+            StatusChange(
+                seller_id, ShipmentStatus.in_transit, ShipmentStatus.in_transit
+            ),
+            StatusChange(
+                seller_id, ShipmentStatus.in_transit, ShipmentStatus.delivered, 7200.0
+            ),
+        ]
+    )
+
+    counters = {status: dict(c) for (_, _, status), c in increments[0].items()}
+    assert counters == {
+        ShipmentStatus.placed: {"entered": 2, "delivery_seconds": 0.0, "exited": 1},
+        ShipmentStatus.in_transit: {
+            "entered": 1,
+            "delivery_seconds": 0.0,
+            "exited": 1,
+        },
+        ShipmentStatus.delivered: {"entered": 1, "delivery_seconds": 7200.0},
+    }
+
+
+async def test_removed_shipments_exit_their_status(monkeypatch):
+    increments = []
+
+    async def increment(self, deltas):
+        increments.append(deltas)
+
+    monkeypatch.setattr(SellerStatsService, "_increment", increment)
+    seller_id = uuid4()
+
+    # deleted or archived
+    await SellerStatsService(None).transitions(
+        [
+            StatusChange(seller_id, ShipmentStatus.delivered, None),
+            StatusChange(seller_id, ShipmentStatus.placed, None),
+        ]
+    )
+
+    counters = {status: dict(c) for (_, _, status), c in increments[0].items()}
+    assert counters == {
+        ShipmentStatus.delivered: {"exited": 1},
+        ShipmentStatus.placed: {"exited": 1},
+    }
@@ -0,0 +1,58 @@
+import json
+from datetime import datetime
+from uuid import uuid4
+
+from api.schemas.schema import ShipmentRead
+from api.serializers import shipment_payload
+from database.models import (
+    Seller,
+    Shipment,
+    ShipmentEvent,
+    ShipmentStatus,
+    Tag,
+    TagName,
+)
+
+
+def test_shipment_payload_matches_shipment_read():
+    seller = Seller(
+        id=uuid4(), name="Seller", email="seller@example.com", password_hash="x"
+    )
+    shipment = Shipment(
+        id=uuid4(),
+        content="books",
+        weight=1.5,
+        destination=11001,
+        estimated_delivery=datetime(2026, 1, 4, 10, 30),
+        client_contact_email="client@example.com",
+        client_contact_phone=None,
+        created_at=datetime(2026, 1, 1, 9, 0, 0, 123456),
+        seller_id=seller.id,
+        delivery_partner_id=uuid4(),
+    )
+    timeline = [
+        ShipmentEvent(
+            id=uuid4(),
+            created_at=datetime(2026, 1, 1, 9, 0, 0, 123456),
+            location=11000,
+            status=ShipmentStatus.placed,
+            shipment_id=shipment.id,
+        ),
+        ShipmentEvent(
+            id=uuid4(),
+            created_at=datetime(2026, 1, 2, 12, 0),
+            location=11001,
+            status=ShipmentStatus.in_transit,
+            description="on the way",
+            shipment_id=shipment.id,
+        ),
+    ]
+    object.__setattr__(shipment, "seller", seller)
+    object.__setattr__(shipment, "timeline", timeline)
+    object.__setattr__(
+        shipment, "tags", [Tag(name=TagName.FRAGILE, instruction="Handle with care")]
+    )
+
+    expected = json.loads(ShipmentRead.model_validate(shipment).model_dump_json())
+
+    assert shipment_payload(shipment) == expected
@@ -0,0 +1,48 @@
+import asyncio
+
+from utils import single_flight
+from utils.single_flight import SingleFlight
+
+
+async def test_concurrent_loads_are_shared():
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"id": calls}
+
+    flight = SingleFlight()
+    results = await asyncio.gather(*(flight.do("shipment:1", load) for _ in range(5)))
+
+    assert calls == 1
+    assert results == [{"id": 1}] * 5
+
+    # finished loads are not cached
+    assert await flight.do("shipment:1", load) == {"id": 2}
+
+
+async def test_redis_waiters_skip_results_of_earlier_loads(monkeypatch):
+    # another worker holds the lock, an older result is still stored
+    store = {"result": {"sequence": 3, "value": {"id": "stale"}}}
+
+    async def acquire(key, ttl):
+        return None
+
+    async def get_result(key):
+        return store["result"]
+
+    monkeypatch.setattr(single_flight, "acquire_flight_lock", acquire)
+    monkeypatch.setattr(single_flight, "get_flight_result", get_result)
+
+    async def load():
+        raise AssertionError("the lock holder loads")
+
+    flight = SingleFlight(use_redis=True, lock_timeout=5)
+    waiter = asyncio.ensure_future(flight.do("shipment:1", load))
+    await asyncio.sleep(0.05)
+    assert not waiter.done()
+
+    store["result"] = {"sequence": 4, "value": {"id": "fresh"}}
+    assert await waiter == {"id": "fresh"}
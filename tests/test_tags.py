@@ -0,0 +1,67 @@
+import os
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import SQLModel, select
+
+from config import db_settings
+from database import tags
+from database.models import Seller, TagName
+from database.tags import TagEntry, TagRegistry
+
+
+async def test_unknown_tag_id_reloads_once(monkeypatch):
+    express = TagEntry(uuid4(), TagName.EXPRESS, "Deliver with priority")
+    added = TagEntry(uuid4(), TagName.GIFT, "Gift wrapped, hide the invoice")
+    rows = [[express], [express, added]]
+    loads = 0
+
+    async def load(self):
+        nonlocal loads
+        entries = rows[min(loads, 1)]
+        loads += 1
+        self._by_name = {entry.name: entry for entry in entries}
+        self._by_id = {entry.id: entry for entry in entries}
+
+    monkeypatch.setattr(TagRegistry, "_load", load)
+    registry = TagRegistry()
+
+    assert await registry.by_id(express.id) == express
+    # added by another worker after the load
+    assert await registry.by_id(added.id) == added
+    assert await registry.by_id(added.id) == added
+    assert loads == 2
+
+
+@pytest.mark.skipif(
+    not os.environ.get("QUERY_PLAN_TESTS"),
+    reason="set QUERY_PLAN_TESTS=1 with a throwaway postgres",
+)
+async def test_reload_does_not_commit_the_callers_session(monkeypatch):
+    engine = create_async_engine(db_settings.POSTGRES_URL, poolclass=NullPool)
+    # registry sessions on this test's engine
+    monkeypatch.setattr(tags, "async_session", lambda: AsyncSession(engine))
+    email = f"seller-{uuid4().hex}@example.com"
+    registry = TagRegistry()
+
+    try:
+        async with engine.begin() as connection:
+            await connection.run_sync(SQLModel.metadata.create_all)
+
+        async with AsyncSession(engine) as session:
+            # half done change of a service call
+            session.add(Seller(name="tags", email=email, password_hash="x"))
+            await session.flush()
+
+            assert (await registry.get(TagName.EXPRESS)).name == TagName.EXPRESS
+            await session.rollback()
+
+        async with AsyncSession(engine) as session:
+            assert (
+                await session.scalar(select(Seller).where(Seller.email == email))
+                is None
+            )
+    finally:
+        await engine.dispose()
@@ -0,0 +1,59 @@
+import pytest
+from celery.exceptions import Retry
+
+from worker import tasks
+from worker.tasks import send_template_emails
+
+
+def message(email: str) -> dict:
+    return {"recipients": [email], "subject": "test", "context": {}}
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    sent = []
+
+    def send_template_email(recipients, **kwargs):
+        if recipients[0].startswith("bad"):
+            raise ValueError("invalid address")
+        sent.append(recipients[0])
+
+    monkeypatch.setattr(tasks, "send_template_email", send_template_email)
+    return sent
+
+
+def test_failed_email_does_not_stop_the_batch(sent, monkeypatch):
+    retried = []
+
+    def retry(args):
+        retried.append(args)
+        return Retry()
+
+    monkeypatch.setattr(send_template_emails, "retry", retry)
+
+    with pytest.raises(Retry):
+        send_template_emails(
+            [
+                message("a@example.com"),
+                message("bad@example.com"),
+                message("b@example.com"),
+            ]
+        )
+
+    assert sent == ["a@example.com", "b@example.com"]
+    # only the failed message is sent again
+    assert retried == [([message("bad@example.com")],)]
+
+
+def test_batch_gives_up_after_the_last_retry(sent, caplog):
+    send_template_emails.push_request(retries=send_template_emails.max_retries)
+    try:
+        result = send_template_emails(
+            [message("bad@example.com"), message("a@example.com")]
+        )
+    finally:
+        send_template_emails.pop_request()
+
+    assert result == "1 of 2 messages sent"
+    assert sent == ["a@example.com"]
+    assert "email to ['bad@example.com'] not sent" in caplog.text
@@ -0,0 +1,164 @@
+import csv
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+
+class ZipCoordinates:
+    """
+    zip code -> (latitude, longitude) from a csv file with the columns
+    zip_code,latitude,longitude. Loaded on first use. Zip codes missing from
+    the file take the coordinates of the numerically closest one -> nearby
+    zip codes share their leading digits; exact() tells them apart.
+    """
+
+    def __init__(self, file: Path | str):
+        self.file = Path(file)
+        self._zip_codes: np.ndarray | None = None
+        self._coordinates: np.ndarray | None = None
+
+    def _load(self):
+        with open(self.file, newline="", encoding="utf-8") as file:
+            rows = sorted(
+                (int(row["zip_code"]), float(row["latitude"]), float(row["longitude"]))
+                for row in csv.DictReader(file)
+            )
+        if not rows:
+            raise ValueError(f"{self.file} has no zip codes")
+
+        table = np.array(rows)
+        self._zip_codes = table[:, 0].astype(np.int64)
+        self._coordinates = table[:, 1:]
+
+    @property
+    def available(self) -> bool:
+        return self._zip_codes is not None or self.file.exists()
+
+    def exact(self, zip_codes: list[int]) -> np.ndarray:
+        """
+        True for the zip codes listed in the file
+        """
+        if self._zip_codes is None:
+            self._load()
+
+        return np.isin(np.asarray(zip_codes, dtype=np.int64), self._zip_codes)
+
+    def lookup(self, zip_codes: list[int]) -> np.ndarray:
+        """
+        (n, 2) latitudes and longitudes in degrees
+        """
+        if self._zip_codes is None:
+            self._load()
+
+        zip_codes = np.asarray(zip_codes, dtype=np.int64)
+        if len(self._zip_codes) == 1:
+            return np.repeat(self._coordinates, len(zip_codes), axis=0)
+
+        # neighbours on both sides of the insertion point, the closer one wins
+        right = np.clip(
+            np.searchsorted(self._zip_codes, zip_codes), 1, len(self._zip_codes) - 1
+        )
+        left = right - 1
+        closest = np.where(
+            np.abs(self._zip_codes[left] - zip_codes)
+            <= np.abs(self._zip_codes[right] - zip_codes),
+            left,
+            right,
+        )
+
+        return self._coordinates[closest]
+
+
+def gazetteer_coordinates(lines: Iterable[str]) -> Iterator[tuple[int, float, float]]:
+    """
+    (zip code, latitude, longitude) from the tab separated census ZCTA
+    gazetteer, the internal point of every zip code tabulation area
+    """
+    # the last header name is padded with spaces
+    reader = csv.DictReader((line.rstrip() + "\n" for line in lines), delimiter="\t")
+    for row in reader:
+        yield int(row["GEOID"]), float(row["INTPTLAT"]), float(row["INTPTLONG"])
+
+
+def haversine_matrix(coordinates: np.ndarray) -> np.ndarray:
+    """
+    Great circle distances in km between all (latitude, longitude) rows
+    """
+    latitudes, longitudes = np.radians(coordinates).T
+    dlat = latitudes[:, None] - latitudes[None, :]
+    dlon = longitudes[:, None] - longitudes[None, :]
+
+    a = (
+        np.sin(dlat / 2) ** 2
+        + np.cos(latitudes[:, None])
+        * np.cos(latitudes[None, :])
+        * np.sin(dlon / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def nearest_neighbor(distances: np.ndarray, start: int = 0) -> np.ndarray:
+    """
+    Visiting order of all nodes from start, always to the closest unvisited
+    """
+    size = len(distances)
+    order = np.empty(size, dtype=np.int64)
+    visited = np.zeros(size, dtype=bool)
+
+    current = start
+    for step in range(size):
+        order[step] = current
+        visited[current] = True
+        if step < size - 1:
+            current = int(np.argmin(np.where(visited, np.inf, distances[current])))
+
+    return order
+
+
+def two_opt(distances: np.ndarray, order: np.ndarray, max_moves: int = 10_000):
+    """
+    Improves an open path that starts at order[0] by reversing segments while
+    that shortens it. Every move evaluates all segment pairs at once and
+    applies the best one.
+    """
+    size = len(order)
+    if size < 4:
+        return order
+
+    # free end: a virtual node at distance 0 from every stop closes the path
+    padded = np.zeros((size + 1, size + 1))
+    padded[:size, :size] = distances
+    path = np.append(order, size)
+
+    edges = np.arange(size)
+    # only non adjacent edge pairs k < l
+    candidates = edges[:, None] + 1 < edges[None, :]
+
+    for _ in range(max_moves):
+        starts, ends = path[:-1], path[1:]
+        lengths = padded[starts, ends]
+        # edges (k, k+1) and (l, l+1) -> (k, l) and (k+1, l+1)
+        gains = (
+            lengths[:, None]
+            + lengths[None, :]
+            - padded[np.ix_(starts, starts)]
+            - padded[np.ix_(ends, ends)]
+        )
+        gains[~candidates] = 0
+
+        k, l = np.unravel_index(np.argmax(gains), gains.shape)
+        if gains[k, l] <= 1e-9:
+            break
+        path[k + 1 : l + 1] = path[k + 1 : l + 1][::-1]
+
+    return path[:-1]
+
+
+def path_distances(distances: np.ndarray, order: np.ndarray) -> np.ndarray:
+    """
+    Cumulative distance at every node of the path, 0 at the start
+    """
+    return np.r_[0.0, np.cumsum(distances[order[:-1], order[1:]])]
@@ -0,0 +1,81 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable
+
+from database.redis import (
+    acquire_flight_lock,
+    get_flight_result,
+    next_flight_sequence,
+    release_flight_lock,
+    set_flight_result,
+)
+
+
+class SingleFlight:
+    """
+    Concurrent calls with the same key share one in flight load. Nothing is
+    cached: a call arriving after the load finished starts a new one.
+
+    Loads outlive the caller that started them -> they must not use
+    anything of its request, e.g. its db session.
+
+    With use_redis one worker loads while the others wait for its result,
+    values have to be json serializable then.
+    """
+
+    POLL_INTERVAL = 0.01  # seconds
+
+    def __init__(self, use_redis: bool = False, lock_timeout: int = 5):
+        self.use_redis = use_redis
+        self.lock_timeout = lock_timeout
+        self._flights: dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, load: Callable[[], Awaitable[Any]]) -> Any:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = asyncio.ensure_future(self._load(key, load))
+            self._flights[key] = flight
+            flight.add_done_callback(lambda _: self._forget(key, flight))
+
+        # a cancelled caller must not cancel the load of the others
+        return await asyncio.shield(flight)
+
+    def _forget(self, key: str, flight: asyncio.Future):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    async def _load(self, key: str, load: Callable[[], Awaitable[Any]]) -> Any:
+        if not self.use_redis:
+            return await load()
+
+        # results carry the sequence number of their load -> only loads
+        # finished after we arrived count, without comparing host clocks
+        previous = await get_flight_result(key)
+        seen = previous["sequence"] if previous is not None else 0
+        deadline = time.monotonic() + self.lock_timeout
+
+        while True:
+            token = await acquire_flight_lock(key, self.lock_timeout)
+            if token is not None:
+                try:
+                    value = await load()
+                    await set_flight_result(
+                        key,
+                        {
+                            "sequence": await next_flight_sequence(key),
+                            "value": value,
+                        },
+                        self.lock_timeout,
+                    )
+                    return value
+                finally:
+                    await release_flight_lock(key, token)
+
+            result = await get_flight_result(key)
+            if result is not None and result["sequence"] > seen:
+                return result["value"]
+
+            # lock holder is stuck -> load it ourselves
+            if time.monotonic() > deadline:
+                return await load()
+            await asyncio.sleep(self.POLL_INTERVAL)
@@ -0,0 +1,44 @@
+import csv
+import io
+import json
+from enum import Enum
+from typing import Any, AsyncIterable, AsyncIterator
+
+from fastapi.encoders import jsonable_encoder
+
+
+# async iterable of dicts -> newline delimited json lines
+async def ndjson_lines(rows: AsyncIterable[dict[str, Any]]) -> AsyncIterator[str]:
+    async for row in rows:
+        yield json.dumps(jsonable_encoder(row)) + "\n"
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+# async iterable of dicts -> csv chunks of roughly chunk_size chars
+async def csv_lines(
+    fieldnames: list[str],
+    rows: AsyncIterable[dict[str, Any]],
+    chunk_size: int = 64 * 1024,
+    header: bool = True,
+) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction="ignore")
+
+    if header:
+        writer.writeheader()
+    async for row in rows:
+        writer.writerow({key: _csv_value(value) for key, value in row.items()})
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+
+    if buffer.tell():
+        yield buffer.getvalue()
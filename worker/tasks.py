@@ -1,11 +1,19 @@
+import asyncio
+import os
 from typing import Any
 import mailtrap as mt
 
 from celery import Celery
+from celery.signals import worker_init, worker_process_shutdown
+from celery.utils.log import get_task_logger
 from jinja2 import Environment, FileSystemLoader
+from prometheus_client import multiprocess, start_http_server
 from pydantic import EmailStr
 
-from config import db_settings, notification_settings
+from config import app_settings, db_settings, notification_settings
+from core.metrics import EMAIL_SEND_DURATION, metrics_registry, reset_multiprocess_dir
+
+logger = get_task_logger(__name__)
 
 app = Celery(
     "api_tasks",
@@ -24,7 +32,23 @@ client = mt.MailtrapClient(
 )
 
 
+# worker side prometheus exporter, runs in the prefork parent -> the tasks
+# record their metrics in the children and reach it through
+# PROMETHEUS_MULTIPROC_DIR
+@worker_init.connect
+def start_metrics_server(**kwargs):
+    reset_multiprocess_dir()
+    start_http_server(app_settings.WORKER_METRICS_PORT, registry=metrics_registry())
+
+
+@worker_process_shutdown.connect
+def remove_process_metrics(pid=None, **kwargs):
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(pid)
+
+
 @app.task
+@EMAIL_SEND_DURATION.time()
 def send_template_email(
     recipients: list[EmailStr],
     subject: str,
@@ -46,3 +70,48 @@ def send_template_email(
     # send email
     client.send(mail)
     return "Message sent successfully"
+
+
+# many emails in one task -> used by bulk operations to avoid one task per row
+# a failed send doesn't stop the batch, only the failed messages are retried
+@app.task(bind=True, max_retries=3, default_retry_delay=60)
+def send_template_emails(self, messages: list[dict[str, Any]]):
+    failed = []
+    for message in messages:
+        try:
+            send_template_email(**message)
+        except Exception:
+            logger.exception("email to %s not sent", message["recipients"])
+            failed.append(message)
+
+    if failed and self.request.retries < self.max_retries:
+        raise self.retry(args=(failed,))
+
+    return f"{len(messages) - len(failed)} of {len(messages)} messages sent"
+
+
+# emails per send_template_emails task
+EMAIL_BATCH_SIZE = 100
+
+
+def queue_template_emails(messages: list[dict[str, Any]]):
+    for start in range(0, len(messages), EMAIL_BATCH_SIZE):
+        send_template_emails.delay(messages[start : start + EMAIL_BATCH_SIZE])
+
+
+# delay emails for open shipments past their estimated_delivery
+@app.task
+def notify_overdue_shipments():
+    # services import this module -> imported when the task runs
+    from services.overdue import notify_overdue
+
+    return f"{asyncio.run(notify_overdue())} overdue shipments notified"
+
+
+# celery -A worker.tasks beat
+app.conf.beat_schedule = {
+    "notify-overdue-shipments": {
+        "task": notify_overdue_shipments.name,
+        "schedule": app_settings.OVERDUE_CHECK_INTERVAL,
+    },
+}